@@ -6,12 +6,17 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.mutable import MutableList
 from home import authenticate_user
 from utils.time_utils import TIME_CONVERTER, hour_str_to_index, times_list_to_indices
+from utils.timing import span
 
 
-def user_db_match():
-    # Match database to authenticated user
-    authenticated_user = authenticate_user()
-    working_db = authenticated_user[1]
+def user_db_match(ward_db=None):
+    # Match database to authenticated user, unless a ward database is named
+    if ward_db is None:
+        with span("authentication"):
+            authenticated_user = authenticate_user()
+        working_db = authenticated_user[1]
+    else:
+        working_db = ward_db
 
     # Create an engine to carry on with the table. This is the SQLite engine.
     engine = create_engine(f'sqlite:///{working_db}.db')
@@ -21,9 +26,8 @@ def user_db_match():
     return Base, engine
 
 
-def allocations_db_tables():
-    Base = user_db_match()[0]
-    engine = user_db_match()[1]
+def allocations_db_tables(ward_db=None):
+    Base, engine = user_db_match(ward_db)
 
     # Define the StaffTable class
     class StaffTable(Base):
@@ -95,10 +99,29 @@ def allocations_db_tables():
             return {c.name: getattr(self, c.name) for c in
                     self.__table__.columns}
 
+    # Define the PublishedAllocationTable class: the allocation in force for
+    # a shift, kept so a mid-shift re-plan can freeze the slots already worked
+    class PublishedAllocationTable(Base):
+        __tablename__ = 'published_allocation_table'
+
+        id = Column(Integer, primary_key=True)
+        shift = Column(String(1))
+        published_at = Column(String)
+        cells = Column(PickleType)
+
+        def __init__(self, shift, published_at, cells):
+            self.shift = shift
+            self.published_at = published_at
+            self.cells = cells
+
+        def as_dict(self):
+            return {c.name: getattr(self, c.name) for c in
+                    self.__table__.columns}
+
     # Create the tables in the database
     Base.metadata.create_all(engine)
 
-    return StaffTable, PatientTable, engine
+    return StaffTable, PatientTable, engine, PublishedAllocationTable
 
 
 if __name__ == "__main__":
@@ -1,12 +1,16 @@
 # milo_input_data.py
 
+from datetime import datetime
+
 from database.database_creation import allocations_db_tables
 from sqlalchemy.orm import sessionmaker
+from utils.timing import span
 
 
 def connect_database():
     # Instantiate the working SQLite engine.
-    engine = allocations_db_tables()[2]
+    with span("allocations_db_tables"):
+        engine = allocations_db_tables()[2]
 
     # Construct a session-maker object and bind it to the engine
     Session = sessionmaker(bind=engine)
@@ -15,7 +19,8 @@ def connect_database():
 
 
 def get_staff_rows_as_dict():
-    staff_table = allocations_db_tables()[0]
+    with span("allocations_db_tables"):
+        staff_table = allocations_db_tables()[0]
     with connect_database() as session:
         staff_rows = session.query(staff_table).all()
         staff_rows_as_dict = [staff_row.as_dict() for staff_row in staff_rows]
@@ -24,7 +29,8 @@ def get_staff_rows_as_dict():
 
 
 def get_patient_rows_as_dict():
-    patient_table = allocations_db_tables()[1]
+    with span("allocations_db_tables"):
+        patient_table = allocations_db_tables()[1]
     with connect_database() as session:
         patient_rows = session.query(patient_table).all()
         patient_rows_as_dict = [patient_row.as_dict() for patient_row in
@@ -32,6 +38,36 @@ def get_patient_rows_as_dict():
 
     return patient_rows_as_dict
 
+def get_ward_rows_as_dict(ward_db):
+    # Staff and patient rows of any ward database, for hospital-level planning
+    with span("allocations_db_tables"):
+        staff_table, patient_table, engine, _ = allocations_db_tables(ward_db)
+    with sessionmaker(bind=engine)() as session:
+        staff_rows = [row.as_dict() for row in session.query(staff_table).all()]
+        patient_rows = [row.as_dict() for row in session.query(patient_table).all()]
+    return staff_rows, patient_rows
+
+
+def save_published_allocation(shift, cells):
+    # cells: (staff id, patient id, slot) for every assigned cell
+    with span("allocations_db_tables"):
+        published_table = allocations_db_tables()[3]
+    with connect_database() as session:
+        session.add(published_table(shift, datetime.now().isoformat(timespec="seconds"),
+                                    [tuple(cell) for cell in cells]))
+        session.commit()
+
+
+def get_published_allocation(shift):
+    # Most recently published allocation for the shift, or None
+    with span("allocations_db_tables"):
+        published_table = allocations_db_tables()[3]
+    with connect_database() as session:
+        row = session.query(published_table).filter_by(shift=shift) \
+            .order_by(published_table.id.desc()).first()
+        return row.as_dict() if row else None
+
+
 # Print the dictionaries of each row in the StaffTable
 # staff_rows_as_dict = get_staff_rows_as_dict()
 # print('\nStaff')
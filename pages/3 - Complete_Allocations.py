@@ -4,6 +4,26 @@ import streamlit as st
 from solver import milo_solve
 from services.staff_service import check_allocation_feasibility
 from database_utils.database_operations import connect_database
+from database_utils.milo_input_data import get_published_allocation, save_published_allocation
+from utils import timing
+from utils.shift_calendar import HOURLY
+from utils.time_utils import index_to_hour_str
+
+
+def repair_allocation(shift, cells):
+    '''Show the fewest changes that make ``cells`` (an edit breaking the rules) valid, in place of the suggestion.'''
+    st.session_state['repair_allocation'] = (shift, cells)
+
+
+def discard_repair():
+    '''Go back to the suggested allocation.'''
+    st.session_state.pop('repair_allocation', None)
+
+
+def publish_allocation(shift, cells):
+    '''Publish ``cells``; the published allocation then replaces any repair on show.'''
+    save_published_allocation(shift, cells)
+    discard_repair()
 
 
 def app():
@@ -15,29 +35,85 @@ def app():
         else:
             st.title(":orange[Suggested Allocations]")
             # Check allocation feasibility before allow solve
-            db_session = connect_database()
-            try:
-                feas = check_allocation_feasibility(db_session)
-                if not feas['success']:
-                    st.error(feas['message'])
-                    for w in feas['warnings']:
-                        st.warning(w)
-                    st.stop()
-            finally:
-                db_session.close()
+            with timing.span("feasibility_check"):
+                db_session = connect_database()
+                try:
+                    feas = check_allocation_feasibility(db_session)
+                finally:
+                    db_session.close()
+            if not feas['success']:
+                st.error(feas['message'])
+                for w in feas['warnings']:
+                    st.warning(w)
+                st.stop()
             pick = st.radio(label='**:green[Shift Selector]**',
                             options=['Days', 'Nights'],
                             index=0, key=None, help=None, on_change=None,
                             args=None, kwargs=None, disabled=False,
                             horizontal=True, label_visibility="visible")
-            if pick == 'Days':
-                milo_solve.solve_staff_allocation('D')
+            shift = 'D' if pick == 'Days' else 'n'
+            quick = st.checkbox('Quick preview (heuristic, not proven optimal)', value=False)
+            options = st.number_input('Allocations to choose from', min_value=1, max_value=10, value=1,
+                                      help='Extra options have the same max workload as the best allocation')
+            # Mid-shift, keep the hours already worked from the published allocation
+            published = get_published_allocation(shift)
+            current_slot, min_changes = 0, False
+            if published:
+                hours = [index_to_hour_str(t, 'day' if shift == 'D' else 'night') for t in range(HOURLY.n_slots)]
+                replan = st.selectbox('Re-plan from', ['Whole shift'] + hours[1:],
+                                      help=f"Hours before this keep the allocation published at "
+                                           f"{published['published_at']}")
+                current_slot = 0 if replan == 'Whole shift' else hours.index(replan)
+                min_changes = st.checkbox('Keep changes to the published allocation to a minimum', value=True)
+            repair = st.session_state.get('repair_allocation')
+            if repair is not None and repair[0] == shift:
+                # A repaired edit stands in for the suggestion until it is published or discarded
+                st.info('Showing the repair of your edited allocation')
+                st.button('Back to the suggested allocation', on_click=discard_repair)
+                _staff, _observations, assignments = milo_solve.solve_staff_allocation(
+                    shift, backend='sparse', live=True, published=repair[1], min_changes=True, alternatives=options)
             else:
-                milo_solve.solve_staff_allocation('n')
+                # The full solve streams its progress and can be stopped early from the page
+                backend = 'heuristic' if quick else 'sparse'
+                _staff, _observations, assignments = milo_solve.solve_staff_allocation(
+                    shift, backend=backend, live=True, current_slot=current_slot,
+                    published=published['cells'] if published else None, min_changes=min_changes and not quick,
+                    alternatives=options)
+            if assignments is not None:
+                cells = [key for key, value in assignments.items() if value.value() and value.value() > 0.5]
+                st.button('Publish this allocation', on_click=publish_allocation, args=(shift, cells),
+                          help='Make this the allocation in force, used when re-planning mid-shift')
+
+            # Swap staff by hand, checked cell by cell as the grid is edited; a repair reloads the grid
+            if assignments is not None and st.checkbox('Edit this allocation', value=False):
+                edited, valid = milo_solve.edit_allocation(shift, assignments)
+                if valid:
+                    st.button('Publish the edited allocation', on_click=publish_allocation,
+                              args=(shift, edited), key='publish_grid')
+                else:
+                    st.button('Repair with as few changes as possible', on_click=repair_allocation,
+                              args=(shift, edited), key='repair_grid')
+
+            # Hand-edited copies of Table 1 / Table 2 come back through the validator
+            st.divider()
+            uploaded = st.file_uploader('Check an edited Table 1 or Table 2 CSV', type='csv')
+            if uploaded is not None:
+                edited, valid = milo_solve.check_uploaded_allocation(shift, uploaded)
+                if valid:
+                    st.button('Publish the edited allocation', on_click=publish_allocation,
+                              args=(shift, edited))
+                else:
+                    st.button('Repair with as few changes as possible', on_click=repair_allocation,
+                              args=(shift, edited))
 
     except KeyError:
         st.warning('You are not logged in')
 
 
 if __name__ == "__main__":
-    app()
+    # Time the whole page run when a sink is configured via ALLOCATION_TIMING
+    timing.start_run("Suggested Allocations", timing.sinks_from_env())
+    try:
+        app()
+    finally:
+        timing.finish_run()
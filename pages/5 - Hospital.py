@@ -0,0 +1,48 @@
+# 5 - Hospital.py
+
+import streamlit as st
+from database_utils.milo_input_data import get_ward_rows_as_dict
+from solver.budget import cbc_options, solve_budget
+from solver.hospital import plan_float_pool
+from utils import timing
+
+
+def app():
+    try:
+        if st.session_state['db'] == 'empty':
+            st.markdown("# The Allocations Helper")
+            st.divider()
+            return st.warning('You are not logged in')
+        st.title(":orange[Hospital Float Pool]")
+        # Every ward database a login maps to; floats are the assigned staff of the float pool database
+        float_db = st.secrets.get('float_pool_db')
+        if not float_db:
+            return st.info('No float pool database is configured (float_pool_db in the app secrets)')
+        ward_dbs = sorted(set(st.secrets['user_db_dict'].values()) - {float_db, 'empty'})
+        picked = st.multiselect('Wards', ward_dbs, default=ward_dbs)
+        if not st.button('Allocate the float pool', disabled=not picked):
+            return
+        with timing.span("load_wards"):
+            wards = [dict(zip(("staff", "observations"), get_ward_rows_as_dict(db)), name=db) for db in picked]
+            floats = [s for s in get_ward_rows_as_dict(float_db)[0] if s.get('assigned')]
+        with timing.span("float_pool"), st.spinner(f"Allocating {len(floats)} floats across "
+                                                   f"{len(wards)} wards..."):
+            # Every ward subproblem runs under the default solve budget, so none can block the page
+            budget = solve_budget(None, st.secrets.get('solve_budgets', {}))
+            assignment, table = plan_float_pool(wards, floats, options=cbc_options(budget))
+        if not table['feasible'].all():
+            st.error(f"{int((~table['feasible']).sum())} ward(s) cannot be covered even with the float pool")
+        unused = len(floats) - sum(len(names) for names in assignment.values())
+        if unused:
+            st.info(f"{unused} float(s) are not needed by any ward")
+        st.dataframe(table, hide_index=True)
+    except KeyError:
+        st.warning('You are not logged in')
+
+
+if __name__ == "__main__":
+    timing.start_run("Hospital Float Pool", timing.sinks_from_env())
+    try:
+        app()
+    finally:
+        timing.finish_run()
@@ -1,5 +1,6 @@
 from sqlalchemy.exc import SQLAlchemyError
 from models import StaffTable
+from utils.shift_calendar import HOURLY
 
 VALID_ROLES = ['HCA', 'RMN']
 VALID_GENDERS = ['F', 'M']
@@ -110,24 +111,24 @@ def delete_staff_entry(db_session, staff_name):
         return True
     return False
 
-def check_allocation_feasibility(db_session):
+def check_allocation_feasibility(db_session, calendar=HOURLY):
     from models import PatientTable
     staff_list = db_session.query(StaffTable).filter_by(assigned=True).all()
     patient_list = db_session.query(PatientTable).all()
     # Count for each obs slot/time, what's minimally required.
-    min_staff_per_time = [0] * 12  # Assume 12 slots/blocks per day
+    min_staff_per_time = [0] * calendar.n_slots  # Slots per shift
     for p in patient_list:
         try:
             level = int(p.observation_level or 0)
         except (ValueError, TypeError):
             level = 0
         if level > 0:
-            for t in range(12):
+            for t in range(calendar.n_slots):
                 min_staff_per_time[t] += level
     # For each time slot, count available staff
-    available_per_time = [0] * 12
+    available_per_time = [0] * calendar.n_slots
     for s in staff_list:
-        for t in range(12):
+        for t in range(calendar.n_slots):
             if s.start_time <= t < s.end_time:
                 available_per_time[t] += 1
     # Warnings, errors
@@ -0,0 +1,101 @@
+# allocation_csv.py
+
+"""
+Read hand-edited Table 1 / Table 2 CSVs (as downloaded from print_results)
+back into an (S, P, T) allocation array for the validator.
+
+Table 1 has one column per observed patient ("name level:1 | type | rm. X")
+holding the comma-separated staff on that patient each hour; Table 2 has one
+column per staff member holding the patient they observe, or "OFF". Rows are
+labelled with the shift hours; Table 2's TOTAL row is ignored.
+"""
+
+import csv
+
+import numpy as np
+
+from utils.time_utils import hour_str_to_index
+from .validator import invalid_cells
+
+OFF = "OFF"
+
+
+def name_index(names):
+    '''Map each name to its position; a name shared by several rows maps to None.'''
+    index = {}
+    for position, name in enumerate(names):
+        index[name] = None if name in index else position
+    return index
+
+
+def _patient_name(header):
+    # "Donna Mcarthur 1:1 | None | rm. 12" -> "Donna Mcarthur"
+    return header.split(" | ")[0].rsplit(" ", 1)[0]
+
+
+def read_allocation_csv(lines, snapshot):
+    """
+    Parse an edited Table 1 or Table 2 CSV from ``lines`` (any iterable of
+    text lines, e.g. an uploaded file wrapped in io.TextIOWrapper) row by row.
+
+    Returns (x, table, problems): the (S, P, T) 0/1 allocation, "patients"
+    for Table 1 or "staff" for Table 2, and messages for names or hours that
+    could not be matched (those entries are skipped).
+    """
+    staff_index = name_index(s["name"] for s in snapshot["staff"])
+    patient_index = name_index(o["name"] for o in snapshot["observations"])
+    x = np.zeros(snapshot["allowed"].shape, dtype=np.int8)
+    problems = []
+
+    def lookup(index, name, kind):
+        position = index.get(name)
+        if position is None:
+            problems.append(f"{kind} '{name}' is " + ("not on the ward" if name not in index else
+                                                       "ambiguous: several share this name"))
+        return position
+
+    reader = csv.reader(lines)
+    headers = next(reader, [])[1:]
+    table = "patients" if any(" | " in header for header in headers) else "staff"
+    if table == "patients":
+        columns = [lookup(patient_index, _patient_name(header), "Patient") for header in headers]
+    else:
+        columns = [lookup(staff_index, header, "Staff member") for header in headers]
+
+    for row in reader:
+        if not row or row[0] == "TOTAL":
+            continue
+        t = hour_str_to_index(row[0].strip(), snapshot["calendar"])
+        if t is None:
+            problems.append(f"Row '{row[0]}' is not a shift hour")
+            continue
+        for column, cell in zip(columns, row[1:]):
+            if column is None:
+                continue
+            if table == "patients":
+                for name in filter(None, (part.strip() for part in cell.split(","))):
+                    i = lookup(staff_index, name, "Staff member")
+                    if i is not None:
+                        x[i, column, t] = 1
+            elif cell.strip() and cell.strip() != OFF:
+                j = lookup(patient_index, cell.strip(), "Patient")
+                if j is not None:
+                    x[column, j, t] = 1
+    return x, table, problems
+
+
+def violation_grids(snapshot, masks):
+    """
+    Collapse rule_masks onto the two table layouts for highlighting.
+
+    Returns {"patients": (T, P), "staff": (T, S)} boolean grids marking the
+    Table 1 / Table 2 cells involved in any violation.
+    """
+    cells = invalid_cells(masks) | masks["consecutive"]
+    long_break = np.zeros(masks["short_break"].shape, dtype=bool)
+    break_slots = snapshot["rules"]["break_slots"]
+    long_break[:, break_slots.start:break_slots.stop] = masks["long_break"][:, None]
+    return {
+        "patients": (masks["coverage"] | cells.any(axis=0)).T,
+        "staff": (cells.any(axis=1) | masks["staff_slot"] | masks["short_break"] | long_break).T,
+    }
@@ -0,0 +1,78 @@
+# alternatives.py
+
+"""
+Alternative allocations at the optimal max_workload.
+
+Every allocation of a ward fills the same number of cells (coverage is
+exact), so an allocation differs from x exactly when it drops some of x's
+assigned cells. ``solve_alternatives`` therefore adds one "no-good" row per
+allocation found, sum(v[c] for c assigned in x) <= |x| - min_difference, and
+re-solves with max_workload fixed, until k allocations are found or none is
+left. CBC has no solution pool reachable from its command line, so the pool
+is built from these cuts, after the cheap alternatives stage two of the
+break-first decomposition gives for the same break placement.
+"""
+
+import random
+
+import numpy as np
+
+from .decomposition import assign_slots
+from .sparse_model import append_rows, build_sparse_model, solve_sparse_model
+from .validator import max_workload
+
+
+def add_no_good_cut(model, x, min_difference=1):
+    '''Copy of the sparse model with a row cutting off x and every allocation within min_difference cells of it.'''
+    cell_index = model["cell_index"]
+    columns = cell_index[(np.asarray(x) > 0) & (cell_index >= 0)]
+    return append_rows(model, "no_good", "L", [(columns, 1.0, len(columns) - min_difference)])
+
+
+def _distinct(pool, y, min_difference):
+    return all(((x > 0) & (y == 0)).sum() >= min_difference for x in pool)
+
+
+def solve_alternatives(snapshot, x, k=5, options=(), slack=0, min_difference=1, attempts=50, seed=0,
+                       symmetry_breaking=False):
+    """
+    Up to k distinct allocations, starting with x, each with max_workload
+    at most max_workload(x) + slack.
+
+    Cheap ones come first: re-matching staff to patients slot by slot with
+    shuffled preferences keeps who works when (so every workload) and only
+    changes who observes whom. When ``attempts`` shuffles run dry, CBC
+    solves the sparse model with a no-good cut per allocation found; with
+    slack 0 the workload column is fixed, so each run stops at its first
+    feasible allocation. ``min_difference`` is the number of assigned cells
+    of every earlier allocation a new one must drop (swapping two staff
+    drops two). Returns the list of (S, P, T) allocations.
+    """
+    pool = [np.asarray(x, dtype=np.int8)]
+    if not pool[0].any():
+        # Nothing to observe: the empty allocation is the only one
+        return pool
+    works = pool[0].any(axis=1)
+    rng = random.Random(seed)
+    # Re-plans keep their frozen past, which stage two knows nothing about
+    for _ in range(attempts if "frozen" not in snapshot else 0):
+        if len(pool) >= k:
+            return pool
+        y = assign_slots(snapshot, works, rng=rng)
+        if y is not None and _distinct(pool, y, min_difference):
+            pool.append(y)
+
+    workload = max_workload(snapshot, x) + slack
+    model = build_sparse_model(snapshot, symmetry_breaking=symmetry_breaking)
+    model["col_upper"][model["workload_col"]] = workload
+    if not slack:
+        model["col_lower"][model["workload_col"]] = workload
+    for y in pool:
+        model = add_no_good_cut(model, y, min_difference)
+    while len(pool) < k:
+        _, _, alternative = solve_sparse_model(snapshot, model, options=options)
+        if alternative is None:
+            break
+        pool.append(alternative)
+        model = add_no_good_cut(model, alternative, min_difference)
+    return pool
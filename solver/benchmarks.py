@@ -0,0 +1,395 @@
+# benchmarks.py
+
+"""
+Synthetic benchmark wards and timing comparisons for the allocation solvers.
+
+Run ``python -m solver.benchmarks`` from the repository root to print a
+comparison table.
+"""
+
+import math
+import random
+import time
+
+# Level mix drawn for benchmark patients (weighted towards generals and 1:1)
+LEVEL_WEIGHTS = {"0": 3, "1": 6, "2": 2, "3": 1}
+
+
+def make_benchmark_ward(n_patients, n_staff=None, seed=0, short_shift_share=0.2,
+                        restriction_share=0.1, slots_per_hour=1):
+    """
+    Generate a synthetic ward as (staff, observations) rows in the format of
+    get_staff_rows_as_dict / get_patient_rows_as_dict.
+
+    Without ``n_staff`` the ward is staffed with enough 12h staff to cover
+    the 12h break window plus a share of shorter shifts, so it is normally
+    feasible. ``restriction_share`` controls how often gender requirements,
+    omit_staff, omit_time and special lists are drawn. Staff hours are in
+    slots of 60 / ``slots_per_hour`` minutes (see utils.shift_calendar); the
+    ward is the same for every slot length, only finer.
+    """
+    rng = random.Random(seed)
+    levels = rng.choices(list(LEVEL_WEIGHTS), weights=list(LEVEL_WEIGHTS.values()), k=n_patients)
+    observations = []
+    for j, level in enumerate(levels):
+        gender_req = rng.choice(["M", "F"]) if rng.random() < restriction_share else None
+        observations.append({
+            "id": 100 + j,
+            "name": f"Patient {j}",
+            "observation_level": level,
+            "obs_type": "within eyesight" if level == "1" else "arms length",
+            "room_number": str(j + 1),
+            "gender_req": gender_req,
+            "omit_staff": [],
+        })
+
+    demand = sum(int(level) for level in levels)
+    if n_staff is None:
+        # 12h staff work at most 5 of the 7 break-window slots
+        n_staff = math.ceil(demand * 7 / 5) + 2 + math.ceil(demand * short_shift_share)
+
+    staff = []
+    for i in range(n_staff):
+        if rng.random() < short_shift_share:
+            start_time = rng.choice([0, 4, 6])
+            end_time = min(12, start_time + rng.choice([4, 6, 8]))
+        else:
+            start_time, end_time = 0, 12
+        omit_time = sorted(rng.sample(range(start_time, end_time), 1)) \
+            if rng.random() < restriction_share else []
+        start_time, end_time = start_time * slots_per_hour, end_time * slots_per_hour
+        omit_time = [t * slots_per_hour + k for t in omit_time for k in range(slots_per_hour)]
+        staff.append({
+            "id": i + 1,
+            "name": f"Staff {i}",
+            "role": "RMN" if i % 5 == 0 else "HCA",
+            "gender": rng.choice(["M", "F"]),
+            "assigned": True,
+            "start_time": start_time,
+            "end_time": end_time,
+            "duration": end_time - start_time,
+            "omit_time": omit_time,
+            "special_list": [],
+        })
+
+    observed = [o for o in observations if o["observation_level"] != "0"]
+    for o in observed:
+        if rng.random() < restriction_share:
+            o["omit_staff"] = [rng.choice(staff)["name"]]
+    for s in staff:
+        if observed and rng.random() < restriction_share / 2:
+            s["special_list"] = [o["name"] for o in rng.sample(observed, min(len(observed), 3))]
+    return staff, observations
+
+
+def time_call(func, *args, **kwargs):
+    '''Return (result, elapsed seconds) of one call.'''
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def compare_builders(sizes=(10, 25, 50, 100)):
+    '''Model construction time and size, PuLP builder vs sparse builder.'''
+    from .milo_model import build_allocation_model
+    from .snapshot import build_snapshot
+    from .sparse_model import build_sparse_model
+
+    rows = []
+    for n_patients in sizes:
+        staff, observations = make_benchmark_ward(n_patients)
+        (problem, _), pulp_seconds = time_call(build_allocation_model, staff, observations)
+        snapshot, snapshot_seconds = time_call(build_snapshot, staff, observations)
+        model, sparse_seconds = time_call(build_sparse_model, snapshot)
+        rows.append({
+            "patients": n_patients,
+            "staff": len(staff),
+            "pulp_build_s": round(pulp_seconds, 3),
+            "pulp_rows": len(problem.constraints),
+            "sparse_build_s": round(snapshot_seconds + sparse_seconds, 3),
+            "sparse_rows": len(model["rhs"]),
+            "sparse_nonzeros": len(model["indices"]),
+        })
+    return rows
+
+
+def compare_slot_lengths(sizes=(25, 50, 100), slot_minutes=(60, 30, 15)):
+    '''Sparse model construction time and size of the same wards at finer slot lengths.'''
+    from utils.shift_calendar import ShiftCalendar
+    from .snapshot import build_snapshot
+    from .sparse_model import build_sparse_model
+
+    rows = []
+    for n_patients in sizes:
+        for minutes in slot_minutes:
+            calendar = ShiftCalendar(slot_minutes=minutes)
+            staff, observations = make_benchmark_ward(n_patients, slots_per_hour=calendar.slots_per_hour)
+            snapshot, snapshot_seconds = time_call(build_snapshot, staff, observations, calendar)
+            model, sparse_seconds = time_call(build_sparse_model, snapshot)
+            rows.append({
+                "patients": n_patients,
+                "slots": calendar.n_slots,
+                "sparse_build_s": round(snapshot_seconds + sparse_seconds, 3),
+                "sparse_rows": len(model["rhs"]),
+                "sparse_nonzeros": len(model["indices"]),
+            })
+    return rows
+
+
+def solve_pulp_model(problem, **solver_options):
+    '''Solve a PuLP model quietly; return (status, objective, seconds).'''
+    import pulp
+
+    _, seconds = time_call(problem.solve, pulp.PULP_CBC_CMD(msg=False, **solver_options))
+    return pulp.LpStatus[problem.status], pulp.value(problem.objective), seconds
+
+
+def compare_symmetry_breaking(sizes=(6, 10, 14, 20), seeds=(0, 1), time_limit=60):
+    '''Time to optimal with and without symmetry breaking on wards with large identical HCA pools.'''
+    from .milo_model import build_allocation_model
+    from .snapshot import build_snapshot, staff_equivalence_classes
+
+    rows = []
+    for n_patients in sizes:
+        for seed in seeds:
+            staff, observations = make_benchmark_ward(n_patients, seed=seed, short_shift_share=0,
+                                                      restriction_share=0)
+            classes = staff_equivalence_classes(build_snapshot(staff, observations))
+            row = {"patients": n_patients, "seed": seed, "staff": len(staff),
+                   "largest_class": max((len(c) for c in classes), default=1)}
+            for label, flag in (("plain", False), ("symmetry", True)):
+                problem, _ = build_allocation_model(staff, observations, symmetry_breaking=flag)
+                status, objective, seconds = solve_pulp_model(problem, timeLimit=time_limit)
+                row[f"{label}_s"] = round(seconds, 2)
+                row[f"{label}_obj"] = objective
+            rows.append(row)
+    return rows
+
+
+def compare_lower_bound(sizes=(6, 10, 14, 20), seeds=(0, 1), time_limit=60):
+    '''Solve time with and without the analytic max_workload lower bound.'''
+    from .bounds import workload_lower_bound
+    from .milo_model import build_allocation_model
+    from .snapshot import build_snapshot
+
+    rows = []
+    for n_patients in sizes:
+        for seed in seeds:
+            staff, observations = make_benchmark_ward(n_patients, seed=seed)
+            bound, bound_seconds = time_call(workload_lower_bound, build_snapshot(staff, observations))
+            row = {"patients": n_patients, "seed": seed, "staff": len(staff), "bound": bound,
+                   "bound_s": round(bound_seconds, 4)}
+            for label, workload_bound in (("plain", None), ("bounded", bound)):
+                problem, _ = build_allocation_model(staff, observations, workload_bound=workload_bound)
+                status, objective, seconds = solve_pulp_model(problem, timeLimit=time_limit)
+                row[f"{label}_s"] = round(seconds, 2)
+                row[f"{label}_obj"] = objective
+            rows.append(row)
+    return rows
+
+
+def compare_heuristic(sizes=(10, 25, 50, 100, 200), seeds=(0, 1)):
+    '''Heuristic run time and max workload against the analytic lower bound.'''
+    from .bounds import workload_lower_bound
+    from .heuristic import solve_heuristic
+    from .snapshot import build_snapshot
+    from .validator import find_violations, max_workload
+
+    rows = []
+    for n_patients in sizes:
+        for seed in seeds:
+            staff, observations = make_benchmark_ward(n_patients, seed=seed)
+            snapshot = build_snapshot(staff, observations)
+            x, seconds = time_call(solve_heuristic, snapshot)
+            rows.append({
+                "patients": n_patients, "seed": seed, "staff": len(staff),
+                "bound": workload_lower_bound(snapshot),
+                "heuristic": None if x is None else max_workload(snapshot, x),
+                "violations": None if x is None else len(find_violations(snapshot, x)),
+                "heuristic_s": round(seconds, 3),
+            })
+    return rows
+
+
+def compare_lp_preview(sizes=(10, 25, 50, 100, 200), seeds=(0, 1)):
+    '''Provisional allocation rounded from the LP relaxation: time, proven bound and max workload.'''
+    from .bounds import workload_lower_bound
+    from .heuristic import solve_heuristic
+    from .relaxation import preview_allocation
+    from .snapshot import build_snapshot
+    from .validator import max_workload
+
+    rows = []
+    for n_patients in sizes:
+        for seed in seeds:
+            staff, observations = make_benchmark_ward(n_patients, seed=seed, restriction_share=0.3)
+            snapshot = build_snapshot(staff, observations)
+            bound = workload_lower_bound(snapshot)
+            if bound is None:
+                continue
+            initial, heuristic_seconds = time_call(solve_heuristic, snapshot)
+            preview = preview_allocation(snapshot, workload_bound=bound, initial=initial)
+            rows.append({
+                "patients": n_patients, "seed": seed, "analytic_bound": bound,
+                "heuristic": None if initial is None else max_workload(snapshot, initial),
+                "heuristic_s": round(heuristic_seconds, 3),
+                "status": preview["status"], "lp_bound": preview["bound"], "preview": preview["max_workload"],
+                "method": preview["method"], "preview_s": preview["seconds"],
+            })
+    return rows
+
+
+def compare_min_changes(sizes=(10, 25, 50), seeds=(0, 1)):
+    '''Cells moved and solve time after raising one patient's level: cold re-solve vs minimum-change repair.'''
+    import copy
+
+    from .bounds import workload_lower_bound
+    from .heuristic import solve_heuristic
+    from .repair import changed_cells, solve_min_changes
+    from .snapshot import build_snapshot
+    from .sparse_model import build_sparse_model, solve_sparse_model
+
+    rows = []
+    for n_patients in sizes:
+        for seed in seeds:
+            staff, observations = make_benchmark_ward(n_patients, seed=seed)
+            snapshot = build_snapshot(staff, observations)
+            _, _, published = solve_sparse_model(snapshot)
+            if published is None:
+                continue
+            observations = copy.deepcopy(observations)
+            raised = next(o for o in observations if o["observation_level"] == "1")
+            raised["observation_level"] = "2"
+            changed = build_snapshot(staff, observations)
+            # Both solves get the analytic bound and the heuristic start, as in solve_staff_allocation
+            bound = workload_lower_bound(changed)
+            initial = solve_heuristic(changed)
+            (_, _, fresh), cold_seconds = time_call(
+                solve_sparse_model, changed, build_sparse_model(changed, workload_bound=bound), initial=initial)
+            (_, _, repaired, changes), repair_seconds = time_call(solve_min_changes, changed, published,
+                                                                   workload_bound=bound, initial=initial)
+            rows.append({
+                "patients": n_patients, "seed": seed, "staff": len(staff),
+                "cold_changes": None if fresh is None else changed_cells(published, fresh),
+                "cold_s": round(cold_seconds, 2),
+                "repair_changes": changes,
+                "repair_s": round(repair_seconds, 2),
+            })
+    return rows
+
+
+def compare_lazy_rows(sizes=(10, 25, 50), seeds=(0, 1)):
+    '''Rows and solve time of the full sparse model against lazy consecutive-hours rows.'''
+    from .lazy import solve_lazy
+    from .snapshot import build_snapshot
+    from .sparse_model import build_sparse_model, solve_sparse_model
+
+    rows = []
+    for n_patients in sizes:
+        for seed in seeds:
+            staff, observations = make_benchmark_ward(n_patients, seed=seed)
+            snapshot = build_snapshot(staff, observations)
+            model = build_sparse_model(snapshot)
+            (status, objective, _), full_seconds = time_call(solve_sparse_model, snapshot, model)
+            (lazy_status, lazy_objective, _, rounds, lazy_rows), lazy_seconds = time_call(solve_lazy, snapshot,
+                                                                                          model)
+            rows.append({
+                "patients": n_patients, "seed": seed, "rows": len(model["rhs"]),
+                "full_obj": objective, "full_s": round(full_seconds, 2),
+                "lazy_rows": lazy_rows, "rounds": rounds,
+                "lazy_obj": lazy_objective, "lazy_s": round(lazy_seconds, 2),
+            })
+    return rows
+
+
+def _root_bound_and_nodes(log_path):
+    from .progress import parse_progress
+
+    bound = nodes = None
+    with open(log_path) as log:
+        for line in log:
+            if bound is None and line.startswith("Continuous objective value"):
+                bound = parse_progress(line)["bound"]
+            if line.startswith("Enumerated nodes:"):
+                nodes = int(line.split(":")[1])
+    return bound, nodes
+
+
+def compare_formulations(sizes=(6, 10, 14, 25, 50), seeds=(0, 1)):
+    '''Root LP bound, nodes and solve time: per-patient break rows vs aggregated works/break variables.'''
+    import os
+    import tempfile
+
+    from .snapshot import build_snapshot
+    from .sparse_model import build_aggregated_model, build_sparse_model, solve_sparse_model
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "cbc.log")
+        for n_patients in sizes:
+            for seed in seeds:
+                staff, observations = make_benchmark_ward(n_patients, seed=seed)
+                snapshot = build_snapshot(staff, observations)
+                row = {"patients": n_patients, "seed": seed}
+                for label, builder in (("rows", build_sparse_model), ("agg", build_aggregated_model)):
+                    model = builder(snapshot)
+                    (_, objective, _), seconds = time_call(solve_sparse_model, snapshot, model, log_path=log_path)
+                    lp_bound, nodes = _root_bound_and_nodes(log_path)
+                    row.update({f"{label}_nnz": len(model["indices"]), f"{label}_lp": lp_bound,
+                                f"{label}_nodes": nodes, f"{label}_obj": objective,
+                                f"{label}_s": round(seconds, 2)})
+                rows.append(row)
+    return rows
+
+
+def compare_decomposition(sizes=(10, 25, 50, 100), seeds=(0, 1)):
+    '''Solve time of the full sparse model against the break-first decomposition.'''
+    from .decomposition import solve_decomposed
+    from .snapshot import build_snapshot
+    from .sparse_model import solve_sparse_model
+
+    rows = []
+    for n_patients in sizes:
+        for seed in seeds:
+            staff, observations = make_benchmark_ward(n_patients, seed=seed)
+            snapshot = build_snapshot(staff, observations)
+            (status, objective, _), full_seconds = time_call(solve_sparse_model, snapshot)
+            (_, split_objective, _, method), split_seconds = time_call(solve_decomposed, snapshot)
+            rows.append({
+                "patients": n_patients, "seed": seed, "status": status,
+                "full_obj": objective, "full_s": round(full_seconds, 2),
+                "split_obj": split_objective, "split_s": round(split_seconds, 2), "method": method,
+            })
+    return rows
+
+
+def print_table(rows):
+    if not rows:
+        return
+    headers = list(rows[0])
+    print("  ".join(f"{h:>15}" for h in headers))
+    for row in rows:
+        print("  ".join(f"{str(row[h]):>15}" for h in headers))
+
+
+if __name__ == "__main__":
+    print("Model construction: PuLP vs sparse arrays")
+    print_table(compare_builders())
+    print("\nSparse model construction at finer slot lengths")
+    print_table(compare_slot_lengths())
+    print("\nTime to optimal with/without symmetry breaking")
+    print_table(compare_symmetry_breaking())
+    print("\nSolve time with/without the analytic workload lower bound")
+    print_table(compare_lower_bound())
+    print("\nConstructive heuristic + local search")
+    print_table(compare_heuristic())
+    print("\nProvisional allocation from the LP relaxation vs the heuristic alone")
+    print_table(compare_lp_preview())
+    print("\nCells moved by a one-patient change: cold re-solve vs minimum-change repair")
+    print_table(compare_min_changes())
+    print("\nFull model vs lazy consecutive-hours rows")
+    print_table(compare_lazy_rows())
+    print("\nPer-patient break rows vs aggregated works/break variables")
+    print_table(compare_formulations())
+    print("\nFull model vs break-first decomposition")
+    print_table(compare_decomposition())
@@ -0,0 +1,64 @@
+# bounds.py
+
+"""
+Cheap bounds on the min-max workload objective, computed from a snapshot.
+"""
+
+import math
+
+import numpy as np
+
+
+
+def staff_capacity(snapshot):
+    """
+    Upper bound on how many slots each staff member can be assigned.
+
+    Counts the slots where they can observe at least one patient, capped by
+    their break rule: at most break_max_worked slots in the long-shift break
+    window, and at most short_break_cap of every short_break_window slots
+    once the short-break windows start for shorter shifts (for hourly slots:
+    no two consecutive slots from start_time + 2 onwards).
+    """
+    rules = snapshot["rules"]
+    workable = snapshot["allowed"].any(axis=1)
+    capacity = np.zeros(len(workable), dtype=int)
+    break_slots = np.zeros(snapshot["n_slots"], dtype=bool)
+    break_slots[rules["break_slots"].start:rules["break_slots"].stop] = True
+    length, cap = rules["short_break_window"], rules["short_break_cap"]
+    for i, slots in enumerate(workable):
+        if snapshot["long_break"][i]:
+            capacity[i] = slots[~break_slots].sum() + min(rules["break_max_worked"], slots[break_slots].sum())
+        else:
+            # Every window of `length` slots from the first short-break window on holds at most `cap`
+            alternating_from = int(snapshot["start"][i]) + rules["short_break_from"] - length + 1
+            alternating = slots[alternating_from:int(snapshot["end"][i])]
+            most = len(alternating) // length * cap + min(len(alternating) % length, cap)
+            capacity[i] = slots[:alternating_from].sum() + min(alternating.sum(), most)
+    return capacity
+
+
+def required_staff_slots(snapshot):
+    '''Total staff-slots the observation levels require over the shift.'''
+    return int(snapshot["required"][snapshot["covered"]].sum()) * snapshot["n_slots"]
+
+
+def workload_lower_bound(snapshot):
+    """
+    Smallest W such that the staff, each working at most min(W, capacity),
+    can supply every required staff-slot. This is at least the required
+    staff-slots divided over the staff who can work, rounded up, and never
+    exceeds the optimal max_workload. Returns None when even unlimited W
+    cannot supply the demand (the ward is infeasible).
+    """
+    capacity = staff_capacity(snapshot)
+    demand = required_staff_slots(snapshot)
+    if demand == 0:
+        return 0
+    if capacity.sum() < demand:
+        return None
+    working = capacity[capacity > 0]
+    bound = math.ceil(demand / len(working))
+    while np.minimum(working, bound).sum() < demand:
+        bound += 1
+    return bound
@@ -0,0 +1,89 @@
+# budget.py
+
+"""
+Per-ward solve budgets (wall-clock limit, relative gap, threads) and the
+assessment of what a budgeted solve actually proved.
+
+Budgets live in the app secrets under ``solve_budgets``, keyed by ward
+database name, with an optional ``default`` entry applied to every ward:
+
+    [solve_budgets.default]
+    time_limit = 60
+    [solve_budgets.ward_a]
+    time_limit = 180
+    gap = 0.05
+    threads = 4
+
+An entry's ``parameters`` table passes further CBC options to every solve
+(e.g. a set found by solver.tuning); a ward's parameters add to, and
+override, the default entry's:
+
+    [solve_budgets.default.parameters]
+    presolve = "more"
+    strategy = 2
+"""
+
+import math
+
+DEFAULT_BUDGET = {"time_limit": 60, "gap": 0.0, "threads": 1}
+
+
+def solve_budget(ward, budgets=None):
+    '''Budget for ``ward``: DEFAULT_BUDGET overridden by the "default" entry, then the ward's own entry.'''
+    budgets = budgets or {}
+    budget = dict(DEFAULT_BUDGET)
+    parameters = {}
+    for entry in (budgets.get("default", {}), budgets.get(ward, {}) if ward is not None else {}):
+        budget.update(entry)
+        parameters.update(entry.get("parameters", {}))
+    if parameters:
+        budget["parameters"] = parameters
+    return budget
+
+
+def pulp_options(budget):
+    '''Keyword arguments for PULP_CBC_CMD enforcing the budget.'''
+    options = {"timeLimit": budget["time_limit"] or None, "gapRel": budget["gap"] or None,
+               "threads": budget["threads"] or None}
+    if budget.get("parameters"):
+        options["options"] = [f"{name} {value}" for name, value in budget["parameters"].items()]
+    return options
+
+
+def cbc_options(budget):
+    '''CBC command-line options enforcing the budget, as PuLP would pass them.'''
+    options = []
+    if budget["time_limit"]:
+        options += ["sec", str(budget["time_limit"])]
+    if budget["gap"]:
+        options += ["ratio", str(budget["gap"])]
+    if budget["threads"]:
+        options += ["threads", str(budget["threads"])]
+    for name, value in budget.get("parameters", {}).items():
+        options += [name, str(value)]
+    if budget["time_limit"]:
+        options += ["timeMode", "elapsed"]
+    return options
+
+
+def assess_result(objective, summary, budget, workload_bound=None):
+    """
+    Decide whether a budgeted solve proved optimality.
+
+    ``summary`` is the dict from cbc.read_log_summary and ``workload_bound``
+    the analytic lower bound, if any. max_workload is integral, so any bound
+    can be rounded up before comparing. Returns a dict with ``proven`` and
+    ``gap`` (relative to the objective; None when no bound is known).
+    """
+    bounds = [b for b in (workload_bound, summary.get("bound")) if b is not None]
+    optimal = (summary.get("result") or "").startswith("Optimal")
+    # Without a gap tolerance CBC only reports an optimal solution it has proven
+    if optimal and not budget["gap"]:
+        bounds.append(objective)
+    if not bounds:
+        # "Optimal" under a gap tolerance: within the tolerance, exact gap unknown
+        return {"proven": False, "gap": budget["gap"] if optimal else None}
+    bound = math.ceil(max(bounds) - 1e-6)
+    if bound >= objective - 1e-6:
+        return {"proven": True, "gap": 0.0}
+    return {"proven": False, "gap": (objective - bound) / objective}
@@ -0,0 +1,147 @@
+# cbc.py
+
+"""
+Thin wrapper around the CBC binary bundled with PuLP, for models that are
+written straight to MPS rather than built as PuLP objects.
+"""
+
+import shutil
+import subprocess
+
+import pulp
+
+
+def cbc_path():
+    '''Path of the CBC executable PuLP would use.'''
+    return pulp.PULP_CBC_CMD().path
+
+
+def _cbc_args(mps_path, solution_path, options=(), mip_start_path=None):
+    args = [cbc_path(), mps_path]
+    if mip_start_path:
+        args += ["mips", mip_start_path]
+    return args + [*options, "branch", "printingOptions", "all", "solution", solution_path]
+
+
+def run_cbc(mps_path, solution_path, log_path=None, options=(), mip_start_path=None):
+    """
+    Solve the model in ``mps_path`` with CBC, writing the solution file to
+    ``solution_path``. ``mip_start_path`` is an optional file written by
+    write_mip_start. Returns the CBC exit code.
+    """
+    args = _cbc_args(mps_path, solution_path, options, mip_start_path)
+    if log_path:
+        with open(log_path, "w") as log:
+            return subprocess.call(args, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+    return subprocess.call(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL)
+
+
+def start_cbc(mps_path, solution_path, log_path, options=(), mip_start_path=None):
+    """
+    Start CBC on ``mps_path`` without waiting for it, logging to ``log_path``
+    line by line so the log can be tailed while it runs. Returns the Popen;
+    sending it SIGINT makes CBC stop and write its best solution so far.
+    """
+    args = _cbc_args(mps_path, solution_path, options, mip_start_path)
+    # CBC block-buffers stdout when it is not a terminal; force line buffering where possible
+    if shutil.which("stdbuf"):
+        args = ["stdbuf", "-oL"] + args
+    with open(log_path, "w") as log:
+        return subprocess.Popen(args, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+
+
+def write_mip_start(path, values):
+    '''Write column values (name -> value) as a CBC MIP start file, in the layout PuLP uses.'''
+    with open(path, "w") as file:
+        file.write("Stopped on time - objective value 0\n")
+        for i, (name, value) in enumerate(values.items()):
+            file.write(f"{i:>7} {name} {value:>15} {0:>23}\n")
+
+
+def read_solution(solution_path):
+    """
+    Read a CBC solution file.
+
+    Returns (status, objective, values) where status is the pulp.LpStatus
+    string ("Optimal", "Infeasible", "Not Solved", ...), objective is the
+    reported objective value (None if absent) and values maps column names to
+    their values.
+    """
+    values = {}
+    with open(solution_path) as file:
+        header = file.readline()
+        for line in file:
+            fields = line.split()
+            if len(fields) < 3:
+                break
+            # Infeasible rows/columns are flagged with a leading "**"
+            if fields[0] == "**":
+                fields = fields[1:]
+            values[fields[1]] = float(fields[2])
+
+    lowered = header.lower()
+    if lowered.startswith("optimal"):
+        status = "Optimal"
+    elif "infeasible" in lowered:
+        status = "Infeasible"
+    elif "unbounded" in lowered:
+        status = "Unbounded"
+    else:
+        status = "Not Solved"
+
+    objective = None
+    if "objective value" in lowered:
+        try:
+            objective = float(header.rsplit(None, 1)[-1])
+        except ValueError:
+            objective = None
+    return status, objective, values
+
+
+def read_duals(solution_path):
+    """
+    Read the marginals of a CBC solution file written with printingOptions
+    all: the dual value of each row and the reduced cost of each column, by
+    name. Only meaningful for LP solves.
+    """
+    duals = {}
+    with open(solution_path) as file:
+        file.readline()
+        for line in file:
+            fields = line.split()
+            if fields and fields[0] == "**":
+                fields = fields[1:]
+            if len(fields) < 4:
+                break
+            duals[fields[1]] = float(fields[3])
+    return duals
+
+
+def read_log_summary(log_path):
+    """
+    Read the result summary CBC prints at the end of its log.
+
+    Returns a dict with ``result`` (the text after "Result - ", e.g.
+    "Optimal solution found" or "Stopped on time limit"), ``objective``,
+    ``bound`` (best possible objective) and ``gap`` (relative, as CBC
+    reports it); each is None when the log does not contain it.
+    """
+    summary = {"result": None, "objective": None, "bound": None, "gap": None}
+    fields = {"Objective value:": "objective", "Lower bound:": "bound", "Gap:": "gap"}
+    try:
+        with open(log_path) as log:
+            lines = log.readlines()
+    except OSError:
+        return summary
+    for line in lines:
+        line = line.strip()
+        if line.startswith("Result - "):
+            summary["result"] = line[len("Result - "):]
+            continue
+        for label, key in fields.items():
+            if line.startswith(label):
+                try:
+                    summary[key] = float(line[len(label):].split()[0])
+                except (ValueError, IndexError):
+                    pass
+    return summary
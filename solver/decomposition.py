@@ -0,0 +1,184 @@
+# decomposition.py
+
+"""
+Break-first decomposition of the allocation problem.
+
+Stage one decides only who works which slot: a small MIP over
+"works this slot" variables with the break rules, the number of staff each
+slot needs and enough eligible staff for every group of patients. Stage two
+then assigns the working staff to patients one slot at a time (a bipartite
+matching per slot), carrying only the consecutive-hours rule from slot to
+slot.
+
+Stage one is a relaxation of the full model, so when stage two succeeds the
+allocation is optimal; when a slot cannot be matched the full model is solved
+instead, with stage one's optimum as a lower bound on max_workload.
+"""
+
+import numpy as np
+
+from .snapshot import consecutive_window_starts, short_break_window_ends
+from .sparse_model import build_sparse_model, solve_sparse_model
+from .validator import max_workload
+
+
+def build_break_model(snapshot, workload_bound=None):
+    """
+    Stage-one model over works[s, t] in the sparse model layout.
+
+    Rows: each slot's working staff equal the summed observation levels;
+    staff eligible for a group of patients (patients with the same eligible
+    staff at that slot) are at least the group's summed levels; short-shift
+    and 12h break rules; workload <= max_workload. ``cell_index`` has shape
+    (S, 1, T), so solve_sparse_model returns works as an (S, 1, T) array.
+    """
+    if "frozen" in snapshot:
+        raise ValueError("Re-plans are only supported by build_sparse_model")
+    allowed = snapshot["allowed"]
+    n_staff, n_patients, n_slots = allowed.shape
+    works = allowed.any(axis=1)
+    work_index = np.full(works.shape, -1, dtype=np.int64)
+    work_index[works] = np.arange(int(works.sum()))
+    workload_col = int(works.sum())
+
+    rows = []  # (kind, sense, rhs, columns, coefficients)
+    demand = snapshot["required"] * snapshot["covered"]
+    for t in range(n_slots):
+        rows.append(("demand", "E", int(demand.sum()), work_index[works[:, t], t], 1.0))
+        # Patients sharing the same eligible staff need that many of them working
+        groups = {}
+        for j in np.flatnonzero(demand):
+            groups.setdefault(allowed[:, j, t].tobytes(), [allowed[:, j, t], 0])[1] += demand[j]
+        for eligible, needed in groups.values():
+            rows.append(("eligible", "L", -needed, work_index[eligible, t], -1.0))
+
+    rules = snapshot["rules"]
+    length, short_cap = rules["short_break_window"], rules["short_break_cap"]
+    for s, t in zip(*np.nonzero(short_break_window_ends(snapshot))):
+        slots = np.arange(max(t - length + 1, 0), t + 1)
+        columns = work_index[s, slots][works[s, slots]]
+        if len(columns) > short_cap:
+            rows.append(("short_break", "L", short_cap, columns, 1.0))
+
+    window = slice(rules["break_slots"].start, rules["break_slots"].stop)
+    for s in np.flatnonzero(snapshot["long_break"]):
+        columns = work_index[s, window][works[s, window]]
+        if len(columns) > rules["break_max_worked"]:
+            rows.append(("long_break", "L", rules["break_max_worked"], columns, 1.0))
+
+    for s in np.flatnonzero(snapshot["assigned"] & works.any(axis=1)):
+        rows.append(("workload", "L", 0, np.append(work_index[s][works[s]], workload_col),
+                     np.append(np.ones(int(works[s].sum())), -1.0)))
+
+    counts = np.array([len(r[3]) for r in rows], dtype=np.int64)
+    n_cols = workload_col + 1
+    objective = np.zeros(n_cols)
+    objective[workload_col] = 1.0
+    return {
+        "indptr": np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+        "indices": np.concatenate([r[3] for r in rows]).astype(np.int64),
+        "data": np.concatenate([np.broadcast_to(r[4], len(r[3])) for r in rows]).astype(float),
+        "sense": np.array([r[1] for r in rows]),
+        "rhs": np.array([r[2] for r in rows], dtype=float),
+        "row_kind": np.array([r[0] for r in rows], dtype=object),
+        "col_lower": np.concatenate([np.zeros(workload_col), [workload_bound or 0]]),
+        "col_upper": np.concatenate([np.ones(workload_col), [np.inf]]),
+        "integer": np.concatenate([np.ones(workload_col, dtype=bool), [workload_bound is not None]]),
+        "objective": objective,
+        "cell_index": work_index[:, None, :],
+        "workload_col": workload_col,
+    }
+
+
+def _match_slot(candidates, capacity):
+    """
+    Assign every staff member in ``candidates`` (staff -> patients in order of
+    preference) to one patient without exceeding ``capacity`` (patient ->
+    staff needed). Returns staff -> patient, or None if no such assignment exists.
+    """
+    assigned, holders = {}, {p: [] for p in capacity}
+
+    def augment(s, seen):
+        for p in candidates[s]:
+            if p in seen:
+                continue
+            seen.add(p)
+            if len(holders[p]) < capacity[p]:
+                holders[p].append(s)
+                assigned[s] = p
+                return True
+            for other in list(holders[p]):
+                if augment(other, seen):
+                    holders[p].remove(other)
+                    holders[p].append(s)
+                    assigned[s] = p
+                    return True
+        return False
+
+    for s in candidates:
+        if not augment(s, set()):
+            return None
+    return assigned
+
+
+def assign_slots(snapshot, works, rng=None):
+    """
+    Stage two: match the staff working each slot to patients, slot by slot.
+
+    A staff member cannot take a patient they would then have watched for
+    more than consecutive_cap slots in a row, and prefers patients they did
+    not watch in the previous slot. A random.Random ``rng`` shuffles the
+    order staff and patients are tried in, giving a different matching for
+    the same works. Returns the (S, P, T) allocation, or None if some slot
+    cannot be matched.
+    """
+    allowed = snapshot["allowed"]
+    n_staff, n_patients, n_slots = allowed.shape
+    demand = snapshot["required"] * snapshot["covered"]
+    capped = consecutive_window_starts(snapshot)
+    cap = snapshot["rules"]["consecutive_cap"]
+    x = np.zeros(allowed.shape, dtype=np.int8)
+    for t in range(n_slots):
+        candidates = {}
+        working = list(np.flatnonzero(works[:, t]))
+        if rng is not None:
+            rng.shuffle(working)
+        for s in working:
+            eligible = allowed[s, :, t] & (demand > 0)
+            if t >= cap and capped[s, t - cap + 1]:
+                eligible &= x[s, :, t - cap:t].sum(axis=1) < cap
+            previous = x[s, :, t - 1] if t > 0 else np.zeros(n_patients, dtype=np.int8)
+            patients = np.flatnonzero(eligible)
+            if rng is not None:
+                rng.shuffle(patients)
+            candidates[s] = list(patients[np.argsort(previous[patients], kind="stable")])
+        matched = _match_slot(candidates, {j: int(demand[j]) for j in np.flatnonzero(demand)})
+        if matched is None or len(matched) != demand.sum():
+            return None
+        for s, j in matched.items():
+            x[s, j, t] = 1
+    return x
+
+
+def solve_decomposed(snapshot, options=(), log_path=None, workload_bound=None, initial=None):
+    """
+    Break-first solve with a fallback to the full sparse model.
+
+    Returns (status, objective, x, method) where method is "decomposed" when
+    stage two matched every slot and "full model" after a fallback.
+    """
+    status, objective, works = solve_sparse_model(snapshot, build_break_model(snapshot, workload_bound),
+                                                  options=options, log_path=log_path)
+    if status == "Infeasible":
+        # Stage one is a relaxation, so the full model is infeasible too
+        return status, None, None, "decomposed"
+    if works is not None:
+        x = assign_slots(snapshot, works[:, 0, :].astype(bool))
+        if x is not None:
+            return status, max_workload(snapshot, x), x, "decomposed"
+
+    bounds = [b for b in (workload_bound, objective if status == "Optimal" else None) if b is not None]
+    model = build_sparse_model(snapshot, workload_bound=int(round(max(bounds))) if bounds else None)
+    status, objective, x = solve_sparse_model(snapshot, model, options=options, log_path=log_path,
+                                              initial=initial)
+    return status, objective, x, "full model"
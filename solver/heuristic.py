@@ -0,0 +1,185 @@
+# heuristic.py
+
+"""
+Constructive allocation heuristic with local-search workload balancing.
+
+``construct_allocation`` fills the rota slot by slot, choosing for each
+patient the least-loaded staff who may take them without breaking the
+consecutive-hours or break rules. ``improve_allocation`` then moves single
+(patient, slot) assignments off the most loaded staff onto lighter ones,
+with a short tabu list so it does not bounce the same cell back and forth.
+
+The result is an (S, P, T) array in the same layout as the MIP models, so it
+can be displayed through print_results, checked with the validator and
+passed to CBC as a MIP start.
+"""
+
+import random
+
+import numpy as np
+
+from .snapshot import consecutive_window_starts, short_break_window_ends
+
+
+def _rule_state(snapshot):
+    return {
+        **snapshot["rules"],
+        "consecutive": consecutive_window_starts(snapshot),
+        "short_break": short_break_window_ends(snapshot),
+    }
+
+
+def can_take(snapshot, rules, x, busy, window_worked, s, p, t):
+    """
+    True if staff s may be given patient p at slot t on top of allocation x
+    without breaking any rule. ``busy`` is x summed over patients and
+    ``window_worked`` the per-staff count of worked break-window slots.
+    """
+    if not snapshot["allowed"][s, p, t] or busy[s, t]:
+        return False
+    n_slots = snapshot["n_slots"]
+    # Consecutive hours: every capped window (u - 1, ..., u + cap - 1) containing t
+    cap = rules["consecutive_cap"]
+    row = x[s, p]
+    for u in range(max(0, t - cap + 1), min(n_slots, t + 2)):
+        if rules["consecutive"][s, u]:
+            total = 1 + sum(row[v] for v in range(max(0, u - 1), min(n_slots, u + cap)) if v != t)
+            if total > cap:
+                return False
+    # Short shifts: every window ending at t, ..., t + window - 1 (for hourly slots (t - 1, t) and (t, t + 1))
+    window = rules["short_break_window"]
+    for end in range(t, min(n_slots, t + window)):
+        if rules["short_break"][s, end] and 1 + busy[s, max(0, end - window + 1):end + 1].sum() > \
+                rules["short_break_cap"]:
+            return False
+    # Long shifts: break-window budget
+    if snapshot["long_break"][s] and t in rules["break_slots"] and window_worked[s] >= rules["break_max_worked"]:
+        return False
+    return True
+
+
+def _assign(rules, x, busy, window_worked, workload, s, p, t, value):
+    step = 1 if value else -1
+    x[s, p, t] = value
+    busy[s, t] += step
+    workload[s] += step
+    if t in rules["break_slots"]:
+        window_worked[s] += step
+
+
+def construct_allocation(snapshot, rng=None, preference=None):
+    """
+    Build a feasible allocation slot by slot; returns the (S, P, T) array or
+    None if some patient could not be covered at some slot.
+
+    ``preference`` is an optional (S, P, T) score (e.g. LP relaxation
+    values): staff with higher scores for the cell are tried first, the
+    least loaded among equal scores.
+    """
+    rng = rng or random.Random(0)
+    allowed = snapshot["allowed"]
+    n_staff, n_patients, n_slots = allowed.shape
+    rules = _rule_state(snapshot)
+    x = np.zeros(allowed.shape, dtype=np.int8)
+    busy = np.zeros((n_staff, n_slots), dtype=int)
+    window_worked = np.zeros(n_staff, dtype=int)
+    workload = np.zeros(n_staff, dtype=int)
+    tie_break = np.array([rng.random() for _ in range(n_staff)])
+    patients = [j for j in range(n_patients) if snapshot["covered"][j] and snapshot["required"][j]]
+
+    for t in range(n_slots):
+        # Later slots are still empty, so each short-break window containing t
+        # only holds the slots worked before t (for hourly slots: the window ending at t)
+        free = np.ones(n_staff, dtype=bool)
+        window = rules["short_break_window"]
+        for end in range(t, min(n_slots, t + window)):
+            worked = busy[:, max(0, end - window + 1):t].sum(axis=1)
+            free &= ~(rules["short_break"][:, end] & (worked >= rules["short_break_cap"]))
+        if t in rules["break_slots"]:
+            free &= ~(snapshot["long_break"] & (window_worked >= rules["break_max_worked"]))
+        candidates = allowed[:, :, t] & free[:, None]
+        cap = rules["consecutive_cap"]
+        if t >= cap:
+            candidates &= ~(rules["consecutive"][:, t - cap + 1, None] & (x[:, :, t - cap:t].sum(axis=2) >= cap))
+
+        # Long-shift staff who still owe rests in the break window go after the rest
+        owed = np.zeros(n_staff, dtype=int)
+        if t in rules["break_slots"]:
+            remaining_window = rules["break_slots"].stop - t
+            owed = np.where(snapshot["long_break"],
+                            np.maximum(0, remaining_window - (rules["break_max_worked"] - window_worked)), 0)
+
+        # Most constrained patients first: fewest candidates per required staff member
+        order = sorted(patients, key=lambda j: (candidates[:, j].sum() / snapshot["required"][j], rng.random()))
+        for j in order:
+            pool = np.flatnonzero(candidates[:, j])
+            if len(pool) < snapshot["required"][j]:
+                return None
+            keys = (tie_break[pool], workload[pool] + 2 * owed[pool])
+            if preference is not None:
+                keys += (-preference[pool, j, t],)
+            ranked = pool[np.lexsort(keys)]
+            for s in ranked[:snapshot["required"][j]]:
+                _assign(rules, x, busy, window_worked, workload, s, j, t, 1)
+                candidates[s, :] = False
+    return x
+
+
+def improve_allocation(snapshot, x, max_iterations=2000, tabu_tenure=7, rng=None):
+    """
+    Lower the maximum workload of a feasible allocation by moving single
+    assignments from the most loaded staff to staff at least two slots
+    lighter. Returns the improved copy.
+    """
+    rng = rng or random.Random(0)
+    x = np.array(x, dtype=np.int8)
+    n_staff, n_patients, n_slots = x.shape
+    rules = _rule_state(snapshot)
+    busy = x.sum(axis=1).astype(int)
+    workload = busy.sum(axis=1)
+    window_worked = busy[:, rules["break_slots"].start:rules["break_slots"].stop].sum(axis=1)
+    tabu = {}
+
+    for iteration in range(max_iterations):
+        peak = workload.max(initial=0)
+        moved = False
+        heavy = [s for s in range(n_staff) if workload[s] == peak]
+        rng.shuffle(heavy)
+        for s in heavy:
+            cells = list(zip(*np.nonzero(x[s])))
+            rng.shuffle(cells)
+            for p, t in cells:
+                for target in np.argsort(workload, kind="stable"):
+                    if workload[target] > peak - 2:
+                        break
+                    if tabu.get((target, p, t), -1) >= iteration:
+                        continue
+                    # Take the cell off s first so rule checks see the final state
+                    _assign(rules, x, busy, window_worked, workload, s, p, t, 0)
+                    if can_take(snapshot, rules, x, busy, window_worked, target, p, t):
+                        _assign(rules, x, busy, window_worked, workload, target, p, t, 1)
+                        tabu[(s, p, t)] = iteration + tabu_tenure
+                        moved = True
+                        break
+                    _assign(rules, x, busy, window_worked, workload, s, p, t, 1)
+                if moved:
+                    break
+            if moved:
+                break
+        if not moved:
+            break
+    return x
+
+
+def solve_heuristic(snapshot, restarts=20, seed=0):
+    """
+    Run the constructive heuristic with up to ``restarts`` randomised
+    tie-breaks, improve the first feasible allocation found and return it,
+    or None if no restart produced a feasible allocation.
+    """
+    rng = random.Random(seed)
+    for _ in range(restarts):
+        x = construct_allocation(snapshot, rng)
+        if x is not None:
+            return improve_allocation(snapshot, x, rng=rng)
+    return None
@@ -0,0 +1,157 @@
+# horizon.py
+
+"""
+Multi-shift planning with a rolling horizon.
+
+A run of shifts (e.g. day and night over several days) is planned one
+window at a time: the shifts of the window are solved as one model, the
+first is committed and the window slides on by one shift. Each shift keeps
+its own rules; the window only couples them through fairness: the
+objective first minimises the largest cumulative observation hours of any
+staff member (matched across shifts by name), counting the hours carried in
+from committed shifts, then the largest workload of any single shift. Staff
+worked hard on earlier shifts are therefore given fewer hours on later ones.
+
+The window model is the sparse model of a block-diagonal snapshot (staff
+rows and patient columns of every shift, with each shift's staff only
+allowed its own patients), plus one cumulative-hours row per staff member.
+Each window is warm-started from the previous window's plan for the shifts
+they share and the heuristic for the new one, so only one shift per window
+is new to CBC.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from .bounds import required_staff_slots, workload_lower_bound
+from .heuristic import solve_heuristic
+from .snapshot import build_snapshot
+from .sparse_model import append_rows, build_sparse_model, solve_sparse_model
+from .validator import max_workload
+
+
+def window_snapshot(shifts):
+    """
+    Block-diagonal snapshot of several shifts ({"staff", "observations"}
+    dicts). ``staff_shift`` and ``patient_shift`` give the shift of each row
+    and column; pairs from different shifts count as omitted.
+    """
+    snapshot = build_snapshot([row for shift in shifts for row in shift["staff"]],
+                              [row for shift in shifts for row in shift["observations"]])
+    staff_shift = np.repeat(np.arange(len(shifts)), [len(shift["staff"]) for shift in shifts])
+    patient_shift = np.repeat(np.arange(len(shifts)), [len(shift["observations"]) for shift in shifts])
+    other = staff_shift[:, None] != patient_shift[None, :]
+    return {**snapshot, "omitted": snapshot["omitted"] | other, "pairable": snapshot["pairable"] & ~other,
+            "allowed": snapshot["allowed"] & ~other[:, :, None], "staff_shift": staff_shift,
+            "patient_shift": patient_shift}
+
+
+def shift_blocks(snapshot, x):
+    '''Split an allocation of a window snapshot into the (S, P, T) allocation of each shift.'''
+    return [x[snapshot["staff_shift"] == k][:, snapshot["patient_shift"] == k]
+            for k in range(int(snapshot["staff_shift"].max(initial=-1)) + 1)]
+
+
+def join_blocks(snapshot, blocks):
+    '''Allocation of a window snapshot from the allocation of each of its shifts.'''
+    x = np.zeros(snapshot["allowed"].shape, dtype=np.int8)
+    for k, block in enumerate(blocks):
+        x[np.ix_(snapshot["staff_shift"] == k, snapshot["patient_shift"] == k)] = block
+    return x
+
+
+def window_model(snapshot, carried, workload_bound=None):
+    """
+    Sparse model of a window snapshot with a cumulative-hours column after
+    max_workload: for each staff name, the hours ``carried`` in plus their
+    cells over the window are at most that column, which the objective
+    weighs above any single shift's max_workload. Both columns are integer,
+    bounded below by ``workload_bound`` and by the average hours per staff
+    member.
+    """
+    model = build_sparse_model(snapshot, workload_bound=workload_bound)
+    names = [row["name"] for row in snapshot["staff"]]
+    groups = list(dict.fromkeys(names))
+    group_index = np.array([groups.index(name) for name in names], dtype=np.int64)
+    hours = np.array([carried.get(name, 0) for name in groups], dtype=float)
+    cumulative_col = len(model["objective"])
+
+    # Every required staff-slot of the window adds to some staff member's hours
+    working = np.unique(group_index[snapshot["allowed"].any(axis=(1, 2))])
+    average = (hours[working].sum() + required_staff_slots(snapshot)) / max(len(working), 1)
+    model["objective"] = np.append(model["objective"], snapshot["n_slots"] + 1.0)
+    model["col_lower"] = np.append(model["col_lower"], max(hours.max(initial=0), np.ceil(average)))
+    model["col_upper"] = np.append(model["col_upper"], np.inf)
+    model["integer"] = np.append(model["integer"], True)
+    model.update(group_index=group_index, carried=hours, cumulative_col=cumulative_col)
+
+    cell_index = model["cell_index"]
+    rows = []
+    for g in range(len(groups)):
+        cells = cell_index[group_index == g]
+        cells = cells[cells >= 0]
+        if len(cells):
+            rows.append((np.append(cells, cumulative_col), np.append(np.ones(len(cells)), -1.0), -hours[g]))
+    return append_rows(model, "cumulative", "L", rows) if rows else model
+
+
+def plan_rolling_horizon(shifts, window=2, options=(), carried=None, restarts=20):
+    """
+    Plan ``shifts`` (a list of {"name", "staff", "observations"} dicts, in
+    order) with a rolling horizon of ``window`` shifts. ``carried`` maps
+    staff names to observation hours already worked in the run.
+
+    Shifts the analytic bound shows infeasible are left out of every window
+    and get no allocation; a window CBC cannot solve is retried with its
+    first shift alone.
+
+    Returns (allocations, carried, table): the committed (S, P, T)
+    allocation of each shift (None when infeasible), the cumulative hours
+    per staff name after the run, and a DataFrame with one row per shift
+    (shift, status, max_workload, cumulative_max, window, warm_start,
+    seconds).
+    """
+    carried = dict(carried or {})
+    snapshots = [build_snapshot(shift["staff"], shift["observations"]) for shift in shifts]
+    bounds = [workload_lower_bound(snapshot) for snapshot in snapshots]
+    feasible = [bound is not None for bound in bounds]
+    previous, allocations, rows = {}, [], []
+
+    for k, shift in enumerate(shifts):
+        started = time.perf_counter()
+        row = {"shift": shift["name"], "status": "Infeasible", "max_workload": None, "cumulative_max": None,
+               "window": 0, "warm_start": False}
+        committed = None
+        members = [m for m in range(k, min(k + window, len(shifts))) if feasible[m]]
+        attempts = ([members] + ([[k]] if len(members) > 1 else [])) if feasible[k] else []
+        for members in attempts:
+            snapshot = window_snapshot([shifts[m] for m in members])
+            # The previous window already planned every shift but the new last one
+            starts = [previous[m] if m in previous else solve_heuristic(snapshots[m], restarts=restarts)
+                      for m in members]
+            initial = None if any(start is None for start in starts) else join_blocks(snapshot, starts)
+            model = window_model(snapshot, carried, workload_bound=max(bounds[m] for m in members))
+            status, _, x = solve_sparse_model(snapshot, model, options=options, initial=initial)
+            if x is not None and status != "Infeasible":
+                blocks = shift_blocks(snapshot, x)
+                previous = dict(zip(members, blocks))
+                committed = blocks[0]
+                row.update(status=status, window=len(members), warm_start=initial is not None)
+                break
+        if committed is None:
+            previous = {}
+        else:
+            for staff_row, hours in zip(shift["staff"], committed.sum(axis=(1, 2))):
+                carried[staff_row["name"]] = carried.get(staff_row["name"], 0) + int(hours)
+            row.update(max_workload=max_workload(snapshots[k], committed), cumulative_max=max(carried.values()))
+        row["seconds"] = round(time.perf_counter() - started, 3)
+        allocations.append(committed)
+        rows.append(row)
+
+    table = pd.DataFrame(rows, columns=["shift", "status", "max_workload", "cumulative_max", "window",
+                                        "warm_start", "seconds"])
+    for column in ("max_workload", "cumulative_max"):
+        table[column] = table[column].astype("Int64")
+    return allocations, carried, table
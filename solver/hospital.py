@@ -0,0 +1,194 @@
+# hospital.py
+
+"""
+Hospital-level allocation of a shared float pool across wards.
+
+Each ward stays its own allocation problem; the wards only interact through
+which floats they receive. The plan is decomposed accordingly:
+
+* the master hands out floats, one at a time, to the ward with the worst
+  analytic workload bound, using only the capacity bounds of
+  solver.bounds, which are cheap enough for 30+ wards. Infeasible wards
+  come first, the one closest to covering its demand first, and keep
+  receiving floats while each float shrinks their capacity shortfall;
+* the ward subproblems (each ward with its floats) are solved in parallel
+  with the break-first decomposition;
+* coordination rounds then move floats from the least loaded ward that
+  can spare them (or from the floats still unassigned) to the ward the
+  subproblems show to be worst, re-solving only the wards involved, while
+  the hospital objective improves. A move into an infeasible ward carries
+  as many floats as its capacity shortfall calls for.
+
+The hospital objective is lexicographic: fewest infeasible wards, then the
+smallest largest max_workload, then the smallest total.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .bounds import required_staff_slots, staff_capacity, workload_lower_bound
+from .scenarios import apply_scenario, evaluate_scenario
+from .snapshot import build_snapshot
+
+
+def float_changes(floats):
+    '''add_staff scenario changes placing the float rows on a ward (ward-specific fields are cleared).'''
+    changes = []
+    for row in floats:
+        row = {key: value for key, value in row.items() if key not in ("id", "special_list", "special_string")}
+        changes.append({"kind": "add_staff", "staff": {**row, "assigned": True, "name": f"{row['name']} (float)"}})
+    return changes
+
+
+def _ward_bound(ward, floats):
+    # (workload bound, capacity shortfall): the shortfall is the required staff-slots the
+    # staff cannot supply, above 0 exactly when the bound is None
+    staff, observations = apply_scenario(ward["staff"], ward["observations"],
+                                         {"name": ward["name"], "changes": float_changes(floats)})
+    snapshot = build_snapshot(staff, observations)
+    shortfall = max(0, required_staff_slots(snapshot) - int(staff_capacity(snapshot).sum()))
+    return workload_lower_bound(snapshot), shortfall
+
+
+def _bound_key(state):
+    # Smaller is better: feasible, then the smallest shortfall, then the smallest bound
+    bound, shortfall = state
+    return (bound is None, shortfall, bound or 0)
+
+
+def _worst_first(state):
+    # Infeasible wards first, the one closest to feasible first (it leaves the infeasible
+    # count soonest), then the largest bounds
+    bound, shortfall = state
+    return (bound is not None, shortfall, -(bound or 0))
+
+
+def _floats_needed(ward, floats, candidates):
+    '''Fewest of ``candidates`` (in order) the ward needs on top of ``floats`` to cover its demand, at least 1.'''
+    for n in range(1, len(candidates) + 1):
+        if _ward_bound(ward, floats + candidates[:n])[0] is not None:
+            return n
+    return max(1, len(candidates))
+
+
+def master_allocation(wards, floats):
+    """
+    Greedy first allocation of floats: floats with the longest shifts go
+    first, each to the ward whose workload bound is currently worst, as long
+    as the float lowers that bound or, on an infeasible ward, its capacity
+    shortfall. An infeasible ward therefore takes floats until it is
+    feasible or the pool runs out.
+
+    Returns {ward name: [float indices]}.
+    """
+    assignment = {ward["name"]: [] for ward in wards}
+    bounds = {ward["name"]: _ward_bound(ward, []) for ward in wards}
+    by_name = {ward["name"]: ward for ward in wards}
+    order = sorted(range(len(floats)), key=lambda f: -(floats[f]["end_time"] - floats[f]["start_time"]))
+    for f in order:
+        for name in sorted(bounds, key=lambda name: _worst_first(bounds[name])):
+            bound = _ward_bound(by_name[name], [floats[g] for g in assignment[name] + [f]])
+            if _bound_key(bound) < _bound_key(bounds[name]):
+                assignment[name].append(f)
+                bounds[name] = bound
+                break
+    return assignment
+
+
+def _solve_ward(task):
+    name, staff, observations, floats, options = task
+    try:
+        row = evaluate_scenario(staff, observations, {"name": name, "changes": float_changes(floats)}, options)
+    except ValueError as error:
+        row = {"scenario": name, "feasible": False, "max_workload": None, "bound": None,
+               "method": f"error: {error}", "seconds": 0.0}
+    return row
+
+
+def hospital_objective(results):
+    '''Lexicographic hospital objective of per-ward results: (infeasible wards, largest, total max_workload).'''
+    workloads = [row["max_workload"] for row in results.values() if row["feasible"]]
+    return (sum(not row["feasible"] for row in results.values()), max(workloads, default=0), sum(workloads))
+
+
+def plan_float_pool(wards, floats, workers=None, options=(), rounds=10, tries=3, start_method="spawn"):
+    """
+    Allocate the float pool across wards.
+
+    ``wards`` is a list of {"name", "staff", "observations"} dicts (as loaded
+    by get_ward_rows_as_dict) and ``floats`` a list of staff rows. Ward
+    subproblems run in a process pool of ``workers`` (``workers=1`` solves
+    them in this process). Each coordination round tries the first
+    unassigned floats and the last floats of the ``tries`` least loaded
+    wards: one float, or as many as an infeasible worst ward needs to cover
+    its demand (and, from the unassigned floats, doubling batches beyond).
+
+    Returns (assignment, table): {ward name: [float names]} and a DataFrame
+    with one row per ward (ward, floats, feasible, max_workload, bound,
+    method, seconds), worst wards first.
+    """
+    by_name = {ward["name"]: ward for ward in wards}
+    assignment = master_allocation(wards, floats)
+    results = {}
+    pool = None
+    if workers != 1:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method))
+
+    def solve(names):
+        tasks = [(name, by_name[name]["staff"], by_name[name]["observations"],
+                  [floats[f] for f in assignment[name]], options) for name in names]
+        rows = pool.map(_solve_ward, tasks) if pool else map(_solve_ward, tasks)
+        results.update({name: row for name, row in zip(names, rows)})
+
+    try:
+        solve(list(assignment))
+        for _ in range(rounds):
+            before = hospital_objective(results)
+            worst = max(results, key=lambda name: (not results[name]["feasible"],
+                                                   results[name]["max_workload"] or 0))
+            # An unassigned float first, then one from the least loaded wards that have any
+            spare = [f for f in range(len(floats)) if not any(f in fs for fs in assignment.values())]
+            donors = sorted((name for name in results if name != worst and assignment[name]
+                             and results[name]["feasible"]), key=lambda name: results[name]["max_workload"])
+            held = [floats[f] for f in assignment[worst]]
+            moves = []
+            for donor, offered in [(None, spare)] + [(donor, assignment[donor][::-1]) for donor in donors[:tries]]:
+                if not offered:
+                    continue
+                if results[worst]["feasible"]:
+                    moves.append((donor, offered[:1]))
+                    continue
+                # The bound can call for fewer floats than the ward turns out to need, so the
+                # unassigned floats are also offered in doubling batches
+                n = _floats_needed(by_name[worst], held, [floats[f] for f in offered])
+                moves.append((donor, offered[:n]))
+                while donor is None and n < len(offered):
+                    n = min(2 * n, len(offered))
+                    moves.append((donor, offered[:n]))
+            for donor, moved in moves:
+                changed = [name for name in (donor, worst) if name]
+                saved = {name: (list(assignment[name]), results[name]) for name in changed}
+                if donor:
+                    assignment[donor] = [f for f in assignment[donor] if f not in moved]
+                assignment[worst] += moved
+                solve(changed)
+                if hospital_objective(results) < before:
+                    break
+                for name, (floats_before, row) in saved.items():
+                    assignment[name], results[name] = floats_before, row
+            else:
+                break
+    finally:
+        if pool:
+            pool.shutdown()
+
+    table = pd.DataFrame([{"ward": name, "floats": ", ".join(floats[f]["name"] for f in assignment[name]),
+                           **{key: results[name][key] for key in ("feasible", "max_workload", "bound", "method",
+                                                                  "seconds")}}
+                          for name in assignment])
+    table["max_workload"] = table["max_workload"].astype("Int64")
+    table = table.sort_values(["feasible", "max_workload"], ascending=[True, False],
+                              na_position="first").reset_index(drop=True)
+    return {name: [floats[f]["name"] for f in fs] for name, fs in assignment.items()}, table
@@ -0,0 +1,154 @@
+# incremental.py
+
+"""
+Incremental rule checking for hand edits of an allocation.
+
+``AllocationChecker`` keeps the counters the rules are stated in (coverage
+per patient and slot, patients per staff slot, slots worked in the 12h break
+window) and the set of rule instances currently broken. Changing one cell
+only touches the counters and rule instances around that cell, so each edit
+costs constant time however large the ward; ``rule_masks`` is only used once,
+to seed the state.
+"""
+
+import numpy as np
+
+from .snapshot import consecutive_window_starts, short_break_window_ends
+from .validator import CELL_RULES, consecutive_message, rule_masks, short_break_message
+
+# Why staff i may not observe patient j at slot t, per cell rule (frozen is handled separately)
+_CELL_REASONS = {
+    "level_0": lambda snapshot, i, j, t: snapshot["ignored"][j],
+    "gender": lambda snapshot, i, j, t: snapshot["gender_conflict"][i, j],
+    "off_shift": lambda snapshot, i, j, t: not snapshot["on_shift"][i, t],
+    "omit_time": lambda snapshot, i, j, t: snapshot["on_shift"][i, t] and not snapshot["available"][i, t],
+    "omit_staff": lambda snapshot, i, j, t: snapshot["omitted"][i, j],
+    "special_list": lambda snapshot, i, j, t: snapshot["outside_special"][i, j],
+}
+
+
+class AllocationChecker:
+    """
+    Rule state of an (S, P, T) allocation under single-cell edits.
+
+    ``violated[rule]`` holds the broken instances of each rule, keyed as in
+    rule_masks: (patient, slot) for coverage, (staff, patient, slot) for the
+    per-cell rules and consecutive (second slot of the window), (staff, slot)
+    for staff_slot and short_break, (staff,) for long_break.
+    """
+
+    def __init__(self, snapshot, x):
+        self.snapshot = snapshot
+        self.x = np.array(x, dtype=np.int8)
+        self.coverage = self.x.sum(axis=0)
+        self.busy = self.x.sum(axis=1)
+        self.rules = snapshot["rules"]
+        self.in_window = self.busy[:, self.rules["break_slots"].start:self.rules["break_slots"].stop].sum(axis=1)
+        # Patients of each (staff, slot), so reassigning a staff slot needs no scan over patients
+        self.patients = {}
+        for i, j, t in zip(*np.nonzero(self.x)):
+            self.patients.setdefault((int(i), int(t)), set()).add(int(j))
+        self._window_starts = consecutive_window_starts(snapshot)
+        self._break_ends = short_break_window_ends(snapshot)
+        self._current_slot = snapshot.get("current_slot", 0)
+        self.violated = {rule: {tuple(int(k) for k in key) for key in zip(*np.nonzero(mask))}
+                         for rule, mask in rule_masks(snapshot, self.x).items()}
+
+    @property
+    def valid(self):
+        return not any(self.violated.values())
+
+    def violation_counts(self):
+        return {rule: len(keys) for rule, keys in self.violated.items()}
+
+    def _broken(self, rule, key):
+        snapshot, x = self.snapshot, self.x
+        if rule == "coverage":
+            j, t = key
+            return bool(snapshot["covered"][j]) and t >= self._current_slot and \
+                self.coverage[j, t] != snapshot["required"][j]
+        if rule in CELL_RULES:
+            i, j, t = key
+            if not x[i, j, t]:
+                return False
+            if rule == "frozen":
+                return t < self._current_slot and not snapshot["frozen"][i, j, t]
+            return t >= self._current_slot and bool(_CELL_REASONS[rule](snapshot, i, j, t))
+        if rule == "staff_slot":
+            return self.busy[key] > 1
+        if rule == "consecutive":
+            i, j, t = key
+            return bool(self._window_starts[i, t]) and \
+                x[i, j, max(t - 1, 0):t + self.rules["consecutive_cap"]].sum() > self.rules["consecutive_cap"]
+        if rule == "short_break":
+            i, t = key
+            window = self.rules["short_break_window"]
+            return bool(self._break_ends[i, t]) and \
+                self.busy[i, max(t - window + 1, 0):t + 1].sum() > self.rules["short_break_cap"]
+        if rule == "long_break":
+            return bool(self.snapshot["long_break"][key[0]]) and self.in_window[key[0]] > self.rules["break_max_worked"]
+        raise ValueError(f"Unknown rule {rule}")
+
+    def _recheck(self, rule, key):
+        if self._broken(rule, key):
+            self.violated[rule].add(key)
+        else:
+            self.violated[rule].discard(key)
+
+    def set_cell(self, i, j, t, value):
+        '''Set x[i, j, t] to value (0 or 1), updating the counters and the rule instances it touches.'''
+        i, j, t, value = int(i), int(j), int(t), int(bool(value))
+        change = value - self.x[i, j, t]
+        if not change:
+            return
+        self.x[i, j, t] = value
+        self.coverage[j, t] += change
+        self.busy[i, t] += change
+        if value:
+            self.patients.setdefault((i, t), set()).add(j)
+        else:
+            self.patients[(i, t)].discard(j)
+        n_slots = self.x.shape[2]
+
+        self._recheck("coverage", (j, t))
+        for rule in CELL_RULES:
+            self._recheck(rule, (i, j, t))
+        self._recheck("staff_slot", (i, t))
+        for key in range(max(t - self.rules["consecutive_cap"] + 1, 0), min(t + 2, n_slots)):
+            self._recheck("consecutive", (i, j, key))
+        for end in range(t, min(t + self.rules["short_break_window"], n_slots)):
+            self._recheck("short_break", (i, end))
+        if t in self.rules["break_slots"]:
+            self.in_window[i] += change
+            self._recheck("long_break", (i,))
+
+    def assign(self, i, t, j):
+        '''Staff i observes patient j at slot t, or nobody when j is None (a Table 2 cell edit).'''
+        i, t = int(i), int(t)
+        for other in list(self.patients.get((i, t), ())):
+            if other != j:
+                self.set_cell(i, other, t, 0)
+        if j is not None:
+            self.set_cell(i, int(j), t, 1)
+
+    def messages(self):
+        '''Human-readable list of the broken rule instances, worded as find_violations words them.'''
+        staff = [s["name"] for s in self.snapshot["staff"]]
+        patients = [o["name"] for o in self.snapshot["observations"]]
+        messages = [f"{patients[j]} at slot {t}: {self.coverage[j, t]} staff assigned, "
+                    f"level needs {self.snapshot['required'][j]}" for j, t in sorted(self.violated["coverage"])]
+        reasons = {}
+        for rule in CELL_RULES:
+            for key in self.violated[rule]:
+                reasons.setdefault(key, []).append(rule)
+        messages += [f"{staff[i]} may not observe {patients[j]} at slot {t} ({', '.join(reasons[i, j, t])})"
+                     for i, j, t in sorted(reasons)]
+        messages += [f"{staff[i]} has {self.busy[i, t]} patients at slot {t}"
+                     for i, t in sorted(self.violated["staff_slot"])]
+        messages += [consecutive_message(staff[i], patients[j], t, self.rules)
+                     for i, j, t in sorted(self.violated["consecutive"])]
+        messages += [short_break_message(staff[i], t, self.rules) for i, t in sorted(self.violated["short_break"])]
+        messages += [f"{staff[i]} works {self.in_window[i]} of the break-window slots "
+                     f"(at most {self.rules['break_max_worked']})"
+                     for i, in sorted(self.violated["long_break"])]
+        return messages
@@ -0,0 +1,71 @@
+# lazy.py
+
+"""
+Lazy row generation for the sparse allocation model.
+
+The consecutive-hours and break rows make up most of the model but few of
+them bind at the optimum. ``solve_lazy`` solves the model without them, adds
+back only the rows the allocation violates and repeats; an optimum of the
+relaxed model that satisfies every row is an optimum of the full model.
+"""
+
+import numpy as np
+
+from .sparse_model import build_sparse_model, column_values, solve_sparse_model
+
+# Break rows are also valid choices, but relaxing them lowers the LP bound
+# and costs many more rounds on the benchmark wards
+LAZY_KINDS = ("consecutive",)
+
+
+def select_rows(model, rows):
+    '''Copy of the sparse model keeping only the rows where the boolean mask ``rows`` is True.'''
+    counts = np.diff(model["indptr"])
+    entries = np.repeat(rows, counts)
+    sub = dict(model)
+    sub["indptr"] = np.concatenate([[0], np.cumsum(counts[rows])]).astype(np.int64)
+    sub["indices"] = model["indices"][entries]
+    sub["data"] = model["data"][entries]
+    for key in ("sense", "rhs", "row_kind"):
+        sub[key] = model[key][rows]
+    return sub
+
+
+def violated_rows(model, x, tolerance=1e-6):
+    '''Boolean mask of the non-workload model rows the (S, P, T) allocation x violates.'''
+    columns = column_values(model, x)
+    counts = np.diff(model["indptr"])
+    row_of_entry = np.repeat(np.arange(len(counts)), counts)
+    activity = np.bincount(row_of_entry, weights=model["data"] * columns[model["indices"]],
+                           minlength=len(counts))
+    violated = np.where(model["sense"] == "L", activity > model["rhs"] + tolerance,
+                        np.abs(activity - model["rhs"]) > tolerance)
+    # Workload rows only define max_workload, so any allocation satisfies them
+    return violated & (model["row_kind"] != "workload")
+
+
+def solve_lazy(snapshot, model=None, lazy_kinds=LAZY_KINDS, options=(), log_path=None, initial=None,
+               max_rounds=100):
+    """
+    Solve the sparse model adding ``lazy_kinds`` rows only once violated.
+
+    ``initial`` (feasible for the full model, hence for every relaxation) is
+    the MIP start of each round; with a model built with a workload_bound it
+    usually ends the first round at once. Returns (status, objective, x, rounds,
+    rows) where rows is the number of rows in the last model solved.
+    """
+    if model is None:
+        model = build_sparse_model(snapshot)
+    lazy = np.isin(model["row_kind"], lazy_kinds)
+    active = ~lazy
+    for rounds in range(1, max_rounds + 1):
+        status, objective, x = solve_sparse_model(snapshot, select_rows(model, active), options=options,
+                                                  log_path=log_path, initial=initial)
+        if x is None:
+            # An infeasible relaxation means the full model is infeasible too
+            return status, objective, None, rounds, int(active.sum())
+        violated = violated_rows(model, x) & ~active
+        if not violated.any():
+            return status, objective, x, rounds, int(active.sum())
+        active |= violated
+    return "Not Solved", None, None, max_rounds, int(active.sum())
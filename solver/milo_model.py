@@ -0,0 +1,213 @@
+# milo_model.py
+
+import pulp
+
+from utils.shift_calendar import HOURLY
+from .snapshot import build_snapshot, slot_rules, staff_equivalence_classes
+
+
+def build_allocation_model(staff, observations, symmetry_breaking=False, workload_bound=None, calendar=HOURLY):
+    """
+    Build the allocation MIP for the given staff and observation rows.
+
+    With ``symmetry_breaking`` interchangeable staff are ordered by workload
+    (any allocation can be relabelled within a class so workloads are
+    non-increasing), so CBC does not explore relabelled copies of the same
+    allocation.
+
+    ``workload_bound`` is a proven lower bound on the optimum (see
+    bounds.workload_lower_bound). It becomes max_workload's lower bound and
+    max_workload is declared integer (workloads are whole slots), so CBC's
+    bound starts there and the search stops as soon as an incumbent meets it.
+
+    Staff hours are in slots of ``calendar``; the break and consecutive-hours
+    rules are converted to those slots by snapshot.slot_rules.
+
+    Returns the PuLP problem and the dict of binary assignment variables
+    keyed by (staff id, observation id, time slot).
+    """
+    n_slots = calendar.n_slots
+    rules = slot_rules(calendar)
+
+    # Create a new optimization problem
+    problem = pulp.LpProblem("Staff_Observation_Assignment_Problem", pulp.LpMinimize)
+
+    # Define the decision variables
+    assignments = pulp.LpVariable.dicts("Assignments",
+                                        ((s["id"], o["id"], t) for s in staff for o in observations for t in range(n_slots)),
+                                        cat="Binary")
+
+    # Patients whose observation level == 0 may be ignored
+    for o in observations:
+        if o["observation_level"] == "0":
+            for s in staff:
+                for t in range(n_slots):
+                    problem += assignments[(s["id"], o["id"],
+                                            t)] == 0, f"Ignore Observation (observation {o['id']}, staff {s['id']}, time {t}) Constraint"
+
+    # Patients whose observation level == 1 must be assigned 1 staff for each time
+    for o in observations:
+        if o["observation_level"] == "1":
+            for t in range(n_slots):
+                problem += pulp.lpSum([assignments[(s["id"], o["id"], t)] for s in
+                                       staff]) == 1, f"Observation Level 1 (observation {o['id']}, time {t}) Constraint"
+
+    # Patients whose observation level == 2 must be assigned 2 staff for each time
+    for o in observations:
+        if o["observation_level"] == "2":
+            for t in range(n_slots):
+                problem += pulp.lpSum([assignments[(s["id"], o["id"], t)] for s in
+                                       staff]) == 2, f"Observation Level 2 (observation {o['id']}, time {t}) Constraint"
+
+    # Patients whose observation level == 3 must be assigned 3 staff for each time
+    for o in observations:
+        if o["observation_level"] == "3":
+            for t in range(n_slots):
+                problem += pulp.lpSum([assignments[(s["id"], o["id"], t)] for s in
+                                       staff]) == 3, f"Observation Level 3 (observation {o['id']}, time {t}) Constraint"
+
+    # Patients whose observation level == 4 must be assigned 4 staff for each
+    # time
+    for o in observations:
+        if o["observation_level"] == "4":
+            for t in range(n_slots):
+                problem += pulp.lpSum([assignments[(s["id"], o["id"], t)] for s in
+                                       staff]) == 4, f"Observation Level 4 (observation {o['id']}, time {t}) Constraint"
+
+    # If gender_req == M staff whose gender == F must not be assigned any time
+    # for that patient If gender_req == F staff whose gender == M must not be
+    # assigned any time for that patient
+    for o in observations:
+        for s in staff:
+            if (o["gender_req"] == "M" and s["gender"] == "F") or (o["gender_req"] == "F" and s["gender"] == "M"):
+                for t in range(n_slots):
+                    problem += assignments[(s["id"], o["id"],
+                                            t)] == 0, f"Gender Constraint (observation {o['id']}, staff {s['id']}, time {t}) Constraint"
+
+    # Ignore staff if assigned==False
+    for s in staff:
+        if not s["assigned"]:
+            for t in range(n_slots):
+                for o in observations:
+                    problem += assignments[(
+                        s["id"], o["id"], t)] == 0, f"Unassigned_Staff_(staff_{s['id']})_Constraint_o={o['id']}_t={t}"
+
+    # Staff must only be assigned from their start_time to end_time
+    for s in staff:
+        for t in range(n_slots):
+            if t < s["start_time"] or t >= s["end_time"]:
+                for o in observations:
+                    problem += assignments[(s["id"], o["id"],
+                                            t)] == 0, f"Staff_Time_Availability_(staff_{s['id']},_observation_{o['id']},_time_{t})_Constraint"
+
+    # Ensure staff are not assigned at specific times
+    for s in staff:
+        if 'omit_time' in s:
+            for t in s['omit_time']:
+                for o in observations:
+                    problem += assignments[(s["id"], o["id"],
+                                            t)] == 0, f"Omit Time (staff {s['id']}, observation {o['id']}, time {t}) Constraint"
+
+    # Names in omit_staff must not be assigned any time for that patient
+    for o in observations:
+        for s in staff:
+            if s["name"] in o["omit_staff"]:
+                for t in range(n_slots):
+                    problem += assignments[(
+                        s["id"], o["id"],
+                        t)] == 0, f"Omit Staff (observation {o['id']}, staff {s['id']}, time {t}) Constraint"
+
+    # Enforce staff are only assigned to patients in their special_list (if any)
+    for s in staff:
+        special = set(s.get("special_list") or [])
+        if special:
+            for o in observations:
+                if o["name"] not in special:
+                    for t in range(n_slots):
+                        problem += assignments[(s["id"], o["id"], t)] == 0, \
+                            f"Special List Restriction (staff {s['id']}, observation {o['id']}, time {t}) Constraint"
+
+    # Ensure staff are assigned to no more than one patient at a time
+    for t in range(n_slots):
+        for s in staff:
+            # Create a list of patients assigned to the current staff at the
+            # current time
+            assigned_patients = [assignments[(s["id"], o["id"], t)] for o in observations]
+            # Add a constraint that the sum of the assigned_patients list
+            # must be less than or equal to 1
+            problem += pulp.lpSum(
+                assigned_patients) <= 1, f"Staff Row Constraint (staff {s['id']}, time {t}) Constraint"
+
+    # Ensure each staff member is not assigned to THE SAME observation for more
+    # than 2 consecutive hours (consecutive_cap slots)
+    cap = rules["consecutive_cap"]
+    for s in staff:
+        for o in observations:
+            for t in range(n_slots - cap + 1):
+                if s["assigned"] and s["start_time"] <= t and t + cap - 1 < s["end_time"]:
+                    problem += pulp.lpSum([assignments[(s["id"], o["id"], t_prime)] for t_prime in
+                                           range(max(0, t - 1),
+                                                 t + cap)]) <= cap, f"Consecutive Hours (staff {s['id']}, observation {o['id']}, time {t}) Constraint"
+
+    # Staff whose duration is < 12 hours must have >= 1 unassigned time slot
+    # between their start_time + 3 and end_time (for hourly slots; in general
+    # at most short_break_cap of every short_break_window slots)
+    for s in staff:
+        if s["duration"] < rules["long_shift_slots"]:
+            for t in range(s["start_time"] + rules["short_break_from"], s["end_time"]):
+                problem += pulp.lpSum([assignments[(s["id"], o["id"], t_prime)] for o in observations for t_prime in
+                                       range(t - rules["short_break_window"] + 1,
+                                             t + 1)]) <= rules["short_break_cap"], f"Minimum Break (staff {s['id']}, time {t}) Constraint"
+
+    # Staff whose duration is >= 12 hours must have >= 2 unassigned time slots
+    # between 5 and 11 (break_slots, working at most break_max_worked of them)
+    for s in staff:
+        if s["duration"] >= rules["long_shift_slots"]:
+            problem += pulp.lpSum(
+                [assignments[(s["id"], o["id"], t)] for o in observations for t in rules["break_slots"]]) <= \
+                rules["break_max_worked"], f"Break Constraint (staff {s['id']}) Constraint"
+
+    # Add the objective function to minimize workload imbalance
+    # We minimize the maximum workload (min-max optimization) to ensure fair distribution
+    
+    # Create auxiliary variable for maximum workload
+    if workload_bound is None:
+        max_workload = pulp.LpVariable("max_workload", lowBound=0, cat="Continuous")
+    else:
+        max_workload = pulp.LpVariable("max_workload", lowBound=workload_bound, cat="Integer")
+    
+    # For each staff member, calculate their total workload and constrain it to be <= max_workload
+    for s in staff:
+        if s["assigned"]:  # Only consider assigned staff
+            staff_total_workload = pulp.lpSum([assignments[(s["id"], o["id"], t)] 
+                                               for o in observations 
+                                               for t in range(n_slots)
+                                               if s["start_time"] <= t < s["end_time"]])
+            problem += staff_total_workload <= max_workload, f"Max_Workload_Constraint_Staff_{s['id']}"
+    
+    # Objective: minimize the maximum workload (this tends to balance workload across staff)
+    problem += max_workload, "Minimize_Maximum_Workload"
+
+    # Order interchangeable staff so relabelled copies of an allocation are cut off
+    if symmetry_breaking:
+        snapshot = build_snapshot(staff, observations, calendar)
+        for members in staff_equivalence_classes(snapshot):
+            workloads = [pulp.lpSum([assignments[(staff[i]["id"], o["id"], t)]
+                                     for j, o in enumerate(observations) for t in range(n_slots)
+                                     if snapshot["allowed"][i, j, t]])
+                         for i in members]
+            for a, b, workload_a, workload_b in zip(members, members[1:], workloads, workloads[1:]):
+                problem += workload_a >= workload_b, \
+                    f"Symmetry Breaking (staff {staff[a]['id']}, staff {staff[b]['id']}) Constraint"
+
+    return problem, assignments
+
+
+def set_mip_start(problem, assignments, snapshot, x):
+    '''Load allocation array x as initial values so CBC can use it as a MIP start (warmStart=True).'''
+    for i, s_id in enumerate(snapshot["staff_ids"]):
+        for j, o_id in enumerate(snapshot["patient_ids"]):
+            for t in range(snapshot["n_slots"]):
+                assignments[(s_id, o_id, t)].setInitialValue(int(x[i, j, t]))
+    max_workload = problem.variablesDict()["max_workload"]
+    max_workload.setInitialValue(max(int(x.sum(axis=(1, 2)).max(initial=0)), max_workload.lowBound or 0))
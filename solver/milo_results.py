@@ -6,12 +6,14 @@ import streamlit as st
 from matplotlib import pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 import csv
+from utils.shift_calendar import HOURLY
+from utils.timing import span
 
 
-def get_staff_assignments(staff, observations, assignments):
+def get_staff_assignments(staff, observations, assignments, calendar=HOURLY):
     assignments_dict = {}
     for o in observations:
-        for t in range(12):
+        for t in range(calendar.n_slots):
             staff_assigned = [s["name"] for s in staff if
                               assignments[(s["id"], o["id"], t)].value() == 1]
             assignments_dict[(o["name"], t)] = staff_assigned
@@ -41,15 +43,11 @@ def export_to_csv(data, headers, filename, index=None, index_label=''):
                 writer.writerow([i] + row)
 
 
-def print_results(staff, observations, assignments, shift):
+def print_results(staff, observations, assignments, shift, calendar=HOURLY):
     tab1, tab2 = st.tabs(["Table1", "Table2"])
     # each item (time) in the shift_hours list is used as the label for each
     # respective row in the table
-    shift_hours = ['08:00', '09:00', '10:00', '11:00', '12:00', '13:00', '14:00'
-        , '15:00', '16:00', '17:00', '18:00', '19:00'] if shift == \
-                                                          'D' else \
-        ['20:00', '21:00', '22:00', '23:00', '00:00', '01:00', '02:00',
-         '03:00', '04:00', '05:00', '06:00', '07:00']
+    shift_hours = list(calendar.labels['day' if shift == 'D' else 'night'])
 
     # Table 1: Patient names are the column headers. Rows labels are shift
     # hours. Each cell contains the staff name(s) allocated to the patient at
@@ -60,10 +58,10 @@ def print_results(staff, observations, assignments, shift):
         f"{o['name']} {o['observation_level']}:1 | {o['obs_type']} | rm. "
         f"{o['room_number']}" for o in observations if
         int(o["observation_level"]) >= 1]
-    assignments_dict = get_staff_assignments(staff, observations, assignments)
+    assignments_dict = get_staff_assignments(staff, observations, assignments, calendar)
     headers = observations_names
     data = [[", ".join(assignments_dict[(o_name, t)]) for o_name in ob_names]
-            for t in range(12)]
+            for t in range(calendar.n_slots)]
 
     # generate CSV file of table 1 for downloading
     filename = "patient_col.csv"
@@ -83,11 +81,11 @@ def print_results(staff, observations, assignments, shift):
     # Table 2: Staff names are column headers. Rows labels are shift hours.
     # Each cell contains the patient the staff member(s) are allocated to at
     # that time.
-    schedule = [["OFF" for _ in staff] for _ in range(12)]
+    schedule = [["OFF" for _ in staff] for _ in range(calendar.n_slots)]
     assignments_count = [0] * len(
         staff)  # initialize a list to store the number of assignments for
     # each staff member
-    for t in range(12):
+    for t in range(calendar.n_slots):
         for i, s in enumerate(staff):
             for o in observations:
                 if assignments[(s["id"], o["id"], t)].value() == 1:
@@ -116,7 +114,7 @@ def print_results(staff, observations, assignments, shift):
         st.dataframe(df_t2, width=1200, height=490)
         # generate CSV file of table 2 for downloading
         filename = "staff_col.csv"
-        export_to_csv(data, headers, filename, index=shift_hours)
+        export_to_csv(schedule, headers, filename, index=shift_hours)
         st.download_button(label="Download Table 2 as an editable CSV file",
                            data=open('staff_col.csv', 'rb'),
                            file_name='table2.csv', mime='text/csv')
@@ -126,7 +124,7 @@ def print_results(staff, observations, assignments, shift):
     df_t2.insert(0, '', df_t2.index)
 
     # save both tables to a PDF file
-    with PdfPages('tables.pdf') as pdf:
+    with span("pdf_generation"), PdfPages('tables.pdf') as pdf:
         fig, ax = plt.subplots(figsize=(8.5, 11))
         ax.axis('off')
         ax.table(cellText=df_t2.values, colLabels=df_t2.columns, loc='center')
@@ -137,10 +135,6 @@ def print_results(staff, observations, assignments, shift):
         ax.table(cellText=df_t1.values, colLabels=df_t1.columns, loc='center')
         pdf.savefig(fig)
 
-        # generate CSV file of table 2 for downloading
-        filename = "staff_col.csv"
-        export_to_csv(schedule, headers, filename, index=shift_hours)
-
     st.download_button(label="Download Tables as a PDF",
                        data=open('tables.pdf', 'rb'), file_name='tables.pdf',
                        mime='pdf/a4')
@@ -2,17 +2,49 @@
 
 import os
 import sys
+import codecs
+import hashlib
+import logging
+import time
 
 from pulp import PULP_CBC_CMD
 
 # add the path to the custom module to the system's path list
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import numpy as np
+import pandas as pd
 import pulp
 from database_utils.milo_input_data import get_staff_rows_as_dict, get_patient_rows_as_dict
+from .heuristic import solve_heuristic
+from .incremental import AllocationChecker
+from .milo_model import build_allocation_model, set_mip_start
+from .alternatives import solve_alternatives
+from .bounds import workload_lower_bound
+from .allocation_csv import read_allocation_csv, violation_grids
+from .budget import solve_budget, pulp_options, cbc_options, assess_result
+from .cbc import read_log_summary
 from .milo_results import print_results
+from .portfolio import solve_portfolio
+from .decomposition import solve_decomposed
+from .lazy import solve_lazy
+from .progress import LiveSolve
+from .relaxation import preview_allocation
+from .repair import solve_min_changes
+from .scenarios import evaluate_scenarios, suggest_scenarios
+from .sensitivity import sensitivity_report
+from .tuning import store_ward
+from .staffing import minimum_staffing
+from .snapshot import (build_snapshot, freeze_past, assignments_from_array, array_from_assignments,
+                       array_from_cells)
+from .sparse_model import build_aggregated_model, build_sparse_model, solve_sparse_model
+from .validator import find_violations, max_workload, rule_masks
+from utils.time_utils import index_to_hour_str
+from utils.timing import span
 import streamlit as st
 
+logger = logging.getLogger(__name__)
+
 
 def handle_infeasibility(staff, observations, shift):
     """
@@ -56,6 +88,44 @@ def handle_infeasibility(staff, observations, shift):
             shortage = required_in_break_window - capacity_in_break_window
             st.error(f"⚠️ **SHORTAGE: {shortage} staff-slots** in break window!")
     
+    # Which slots, patients and staff rules hold the ward back, from one LP solve
+    if st.button("📉 Show what limits this shift"):
+        with span("sensitivity"), st.spinner("Solving the LP relaxation..."):
+            report = sensitivity_report(build_snapshot(staff, observations))
+        show_sensitivity(report, shift)
+
+    # Try the usual fixes on copies of the ward instead of guessing
+    if st.button("🔬 Test which single change would fix this"):
+        with span("scenarios"), st.spinner("Solving each what-if scenario..."):
+            ranked = evaluate_scenarios(staff, observations, suggest_scenarios(staff, observations),
+                                        options=cbc_options(ward_budget()))
+        fixes = ranked[ranked["feasible"]]
+        if fixes.empty:
+            st.warning("No single change makes this shift feasible; combine several of the solutions below.")
+        st.dataframe(ranked, hide_index=True)
+
+    # How many bank staff would it take, for 12h or custom hours
+    st.markdown("**Minimum extra staff**")
+    start_time, end_time = st.slider("Bank shift (slots)", min_value=0, max_value=12, value=(0, 12),
+                                     key="minimum_staffing_hours")
+    if st.button("🧮 Calculate the minimum extra staff"):
+        patterns = tuple(dict.fromkeys([(0, 12), (start_time, end_time)]))
+        with span("minimum_staffing"), st.spinner("Searching for the fewest extra staff..."):
+            staffing = minimum_staffing(staff, observations, patterns=patterns,
+                                        options=cbc_options(ward_budget()))
+        if staffing["extra"] is None:
+            st.warning("Even the largest bank team tried does not make this shift feasible; "
+                       "combine it with the other solutions below.")
+        else:
+            proven = "" if staffing["status"] == "Optimal" else " (best found, not proven minimal)"
+            st.success(f"✅ **{staffing['extra']} extra staff** make this shift feasible{proven}, "
+                       f"with a max workload of {staffing['max_workload']} hours.")
+            shift_type = 'day' if shift == 'D' else 'night'
+            st.dataframe(pd.DataFrame([{"Name": row["name"], "Gender": row["gender"],
+                                        "Starts": index_to_hour_str(row["start_time"], shift_type),
+                                        "Hours": row["duration"]} for row in staffing["added"]]),
+                         hide_index=True)
+
     # Recommendations
     st.markdown("### 💡 Recommended Solutions")
     
@@ -113,182 +183,438 @@ def handle_infeasibility(staff, observations, shift):
     st.info("💡 **Tip:** Start with Solution 1 (add more staff) - it's the quickest fix!")
 
 
-def solve_staff_allocation(shift):
+def show_sensitivity(report, shift, top=10):
+    '''Slot, patient and staff rankings of a sensitivity_report, most pressing first.'''
+    if report["shortfall"] is None:
+        st.warning(f"The LP relaxation could not be solved ({report['status']}).")
+        return
+    if report["shortfall"] > 0:
+        st.error(f"Even a fractional allocation leaves **{report['shortfall']:g} staff-slots** uncovered, "
+                 f"so more staff or lower levels are needed, not just a different rota.")
+    else:
+        st.info(f"A fractional allocation covers everyone with a max workload of {report['bound']:g}; "
+                f"it is the whole-slot rules that cannot be met.")
+    st.caption("Pressure: how much the shortfall (or the workload bound) rises per extra staff-slot "
+               "required, or falls per unit the staff member's rule is relaxed.")
+    slots = report["slots"].copy()
+    slots.insert(0, "time", [index_to_hour_str(t, 'day' if shift == 'D' else 'night') for t in slots["slot"]])
+    tabs = st.tabs(["Slots", "Patients", "Staff rules"])
+    for tab, frame in zip(tabs, (slots.drop(columns="slot"), report["patients"], report["staff"])):
+        with tab:
+            st.dataframe(frame.head(top), hide_index=True)
+
+
+def ward_budget():
+    '''Solve budget for the logged-in ward, from the solve_budgets secrets.'''
+    try:
+        budgets = st.secrets.get("solve_budgets", {})
+    except FileNotFoundError:
+        budgets = {}
+    return solve_budget(st.session_state.get("db"), budgets)
+
+
+def tuning_corpus():
+    '''Directory solves are stored in for solver.tuning, from the tuning_corpus secret (None: not stored).'''
+    try:
+        return st.secrets.get("tuning_corpus")
+    except FileNotFoundError:
+        return None
+
+
+def recall(name, key):
+    '''Value remembered in session state under ``name`` for ``key``, or None.'''
+    # Keys hold the ward's rows, which are unhashable, so entries are matched with ==
+    return next((value for entry_key, value in st.session_state.get(name, []) if entry_key == key), None)
+
+
+def remember(name, key, value, keep=1):
+    '''Keep ``value`` in session state under ``name`` for ``key``, with up to ``keep`` - 1 older keys.'''
+    entries = [entry for entry in st.session_state.get(name, []) if entry[0] != key]
+    st.session_state[name] = entries[len(entries) - keep + 1:] + [(key, value)]
+    return value
+
+
+def live_key(shift, snapshot):
+    '''Inputs a live solve (and its LP preview) is kept for: the shift, the ward's rows and the current slot.'''
+    return shift, snapshot["staff"], snapshot["observations"], snapshot.get("current_slot", 0)
+
+
+def run_live_solve(shift, snapshot, budget, initial=None, symmetry_breaking=False, workload_bound=None):
+    """
+    Solve the sparse model in a background CBC process, streaming the best
+    allocation's max workload, the bound and the elapsed time into the page.
+
+    The solve is kept in session state: pressing "Accept current best" stops
+    CBC and reruns the page, which picks the same solve back up and shows the
+    allocation it stopped with. The finished result is kept too, so later
+    reruns (edits, publishing, downloads) return it instead of solving again
+    until the ward, the shift or the current slot changes. Returns (status,
+    objective, x) as solve_sparse_model does.
+    """
+    key = live_key(shift, snapshot)
+    finished = recall("live_result", key)
+    if finished is not None:
+        return finished
+    solve = None
+    if "live_solve" in st.session_state:
+        previous_key, solve = st.session_state["live_solve"]
+        if previous_key != key:
+            # The ward or shift changed since this solve started
+            solve.cancel()
+            solve = None
+    if solve is None:
+        with span("model_build"):
+            model = build_sparse_model(snapshot, symmetry_breaking=symmetry_breaking,
+                                       workload_bound=workload_bound)
+        solve = LiveSolve(snapshot, model, options=cbc_options(budget), initial=initial, log_path="log.txt")
+        st.session_state["live_solve"] = (key, solve)
+
+    st.button("Accept current best", on_click=solve.accept, disabled=solve.accepted,
+              help="Stop the solver and use the best allocation found so far")
+    placeholder = st.empty()
+    while solve.running:
+        progress = solve.poll()
+        with placeholder.container():
+            best, bound, elapsed = st.columns(3)
+            best.metric("Best max workload", "-" if progress["incumbent"] is None else f"{progress['incumbent']:g}")
+            bound.metric("Lower bound", "-" if progress["bound"] is None else f"{progress['bound']:.2f}")
+            elapsed.metric("Elapsed", f"{progress['elapsed']:.0f}s")
+        time.sleep(0.5)
+    placeholder.empty()
+    st.session_state.pop("live_solve", None)
+    return remember("live_result", key, solve.result())
+
+
+def show_provisional(snapshot, preview, shift):
+    '''Table 2 view of a preview_allocation result, shown while the full solve runs.'''
+    bound = "" if preview['bound'] is None else f"; no allocation can do better than {preview['bound']}"
+    st.info(f"⏳ Provisional allocation ({preview['method']}): max workload {preview['max_workload']}{bound}. "
+            f"The full solver is still running and will replace it.")
+    x = preview["x"]
+    hours = [index_to_hour_str(t, 'day' if shift == 'D' else 'night') for t in range(snapshot["n_slots"])]
+    patient_names = [o["name"] for o in snapshot["observations"]]
+    working = np.flatnonzero(x.any(axis=(1, 2)))
+    busy, patient = x.any(axis=1), x.argmax(axis=1)
+    frame = pd.DataFrame([[patient_names[patient[i, t]] if busy[i, t] else "OFF" for i in working]
+                          for t in range(len(hours))], index=hours,
+                         columns=[snapshot["staff"][i]["name"] for i in working])
+    st.dataframe(frame, width=1200, height=455)
+
+
+def show_allocation(staff, observations, snapshot, pool, quality, shift):
+    '''Show the solve status and the chosen allocation of ``pool`` (a list of (S, P, T) arrays).'''
+    if quality['proven']:
+        st.success("✅ Allocation Status: Optimal")
+    elif quality['gap'] is not None:
+        st.info(f"⚡ Allocation Status: Best found - within {quality['gap']:.0%} of optimal, "
+                f"not proven optimal")
+    else:
+        st.info("⚡ Allocation Status: Best found - valid, but not proven optimal")
+    choice = 0
+    if len(pool) > 1:
+        choice = st.radio("Allocation option", range(len(pool)), format_func=lambda k: f"Option {k + 1}",
+                          horizontal=True, help="Allocations with the same max workload")
+    assignments = assignments_from_array(snapshot, pool[choice])
+    with span("print_results"):
+        print_results(staff, observations, assignments, shift)
+    return staff, observations, assignments
+
+
+def solve_staff_allocation(shift, backend="pulp", symmetry_breaking=False, use_lower_bound=True,
+                           warm_start=True, budget=None, live=False, current_slot=0, published=None,
+                           min_changes=False, lazy_constraints=False, aggregated=False, decomposition=False,
+                           alternatives=1):
+    """
+    Solve the ward's allocation for the given shift ('D' or 'n') and display it.
+
+    ``backend`` selects the engine: "pulp" builds the PuLP model, "sparse"
+    emits coefficient arrays straight to MPS (much faster to build for large
+    wards, same allocations) and "heuristic" returns the constructive
+    heuristic's allocation without calling CBC (a sub-second preview).
+    "portfolio" races the heuristic and several CBC configurations in
+    parallel processes and keeps the first proven answer, or the best
+    allocation found within the time limit.
+    ``symmetry_breaking`` orders interchangeable staff by workload in either
+    model. ``use_lower_bound`` passes the analytic max_workload bound to CBC
+    so it stops as soon as an incumbent meets it; a ward whose staff cannot
+    supply the required staff-slots at all is reported infeasible without
+    solving. ``warm_start`` gives CBC the heuristic allocation as a MIP start.
+    ``budget`` (time_limit seconds, relative gap, threads and any tuned CBC
+    parameters) defaults to the ward's entry in the solve_budgets secrets;
+    when it runs out the best allocation found so far is shown with its gap
+    instead of blocking. With a tuning_corpus directory in the secrets, the
+    ward's rows are stored there for solver.tuning.
+    ``live`` (sparse backend only) streams CBC's progress into the page and
+    lets the user accept the current best allocation early. Until CBC
+    finishes, the page shows a provisional allocation rounded from an LP
+    relaxation, with the bound that relaxation proves.
+    ``published`` (cells of the allocation in force) with ``current_slot``
+    > 0 re-plans mid-shift: earlier slots keep the published allocation and
+    only the remaining slots are solved, with the sparse backend, carrying
+    over consecutive-hours, break and workload state from the frozen slots.
+    ``min_changes`` (with ``published``) keeps the best max_workload and then
+    changes as few cells of the published allocation as possible.
+    ``lazy_constraints`` (sparse backend, not live) leaves out the
+    consecutive-hours rows and adds back only those the solution violates.
+    ``aggregated`` (sparse backend, not live) solves the formulation with
+    "works this slot" and break indicator variables instead.
+    ``decomposition`` (sparse backend, not live) places breaks first with a
+    small model and then matches staff to patients slot by slot, falling back
+    to the full model when a slot cannot be matched.
+    ``alternatives`` > 1 also finds up to that many distinct allocations
+    with the same max_workload.
+    Solved allocations are kept in session state under the solve's inputs,
+    so reruns of the page (flipping between alternatives, editing the grid,
+    publishing) show the same allocation again without solving.
+    """
+    budget = budget or ward_budget()
+
     # Define input data
-    staff = get_staff_rows_as_dict()
-    observations = get_patient_rows_as_dict()
-
-    # Create a new optimization problem
-    problem = pulp.LpProblem("Staff_Observation_Assignment_Problem", pulp.LpMinimize)
-
-    # Define the decision variables
-    assignments = pulp.LpVariable.dicts("Assignments",
-                                        ((s["id"], o["id"], t) for s in staff for o in observations for t in range(12)),
-                                        cat="Binary")
-
-    # Patients whose observation level == 0 may be ignored
-    for o in observations:
-        if o["observation_level"] == "0":
-            for s in staff:
-                for t in range(12):
-                    problem += assignments[(s["id"], o["id"],
-                                            t)] == 0, f"Ignore Observation (observation {o['id']}, staff {s['id']}, time {t}) Constraint"
-
-    # Patients whose observation level == 1 must be assigned 1 staff for each time
-    for o in observations:
-        if o["observation_level"] == "1":
-            for t in range(12):
-                problem += pulp.lpSum([assignments[(s["id"], o["id"], t)] for s in
-                                       staff]) == 1, f"Observation Level 1 (observation {o['id']}, time {t}) Constraint"
-
-    # Patients whose observation level == 2 must be assigned 2 staff for each time
-    for o in observations:
-        if o["observation_level"] == "2":
-            for t in range(12):
-                problem += pulp.lpSum([assignments[(s["id"], o["id"], t)] for s in
-                                       staff]) == 2, f"Observation Level 2 (observation {o['id']}, time {t}) Constraint"
-
-    # Patients whose observation level == 3 must be assigned 3 staff for each time
-    for o in observations:
-        if o["observation_level"] == "3":
-            for t in range(12):
-                problem += pulp.lpSum([assignments[(s["id"], o["id"], t)] for s in
-                                       staff]) == 3, f"Observation Level 3 (observation {o['id']}, time {t}) Constraint"
-
-    # Patients whose observation level == 4 must be assigned 4 staff for each
-    # time
-    for o in observations:
-        if o["observation_level"] == "4":
-            for t in range(12):
-                problem += pulp.lpSum([assignments[(s["id"], o["id"], t)] for s in
-                                       staff]) == 4, f"Observation Level 4 (observation {o['id']}, time {t}) Constraint"
-
-    # If gender_req == M staff whose gender == F must not be assigned any time
-    # for that patient If gender_req == F staff whose gender == M must not be
-    # assigned any time for that patient
-    for o in observations:
-        for s in staff:
-            if (o["gender_req"] == "M" and s["gender"] == "F") or (o["gender_req"] == "F" and s["gender"] == "M"):
-                for t in range(12):
-                    problem += assignments[(s["id"], o["id"],
-                                            t)] == 0, f"Gender Constraint (observation {o['id']}, staff {s['id']}, time {t}) Constraint"
-
-    # Ignore staff if assigned==False
-    for s in staff:
-        if not s["assigned"]:
-            for t in range(12):
-                for o in observations:
-                    problem += assignments[(
-                        s["id"], o["id"], t)] == 0, f"Unassigned_Staff_(staff_{s['id']})_Constraint_o={o['id']}_t={t}"
-
-    # Staff must only be assigned from their start_time to end_time
-    for s in staff:
-        for t in range(12):
-            if t < s["start_time"] or t >= s["end_time"]:
-                for o in observations:
-                    problem += assignments[(s["id"], o["id"],
-                                            t)] == 0, f"Staff_Time_Availability_(staff_{s['id']},_observation_{o['id']},_time_{t})_Constraint"
-
-    # Ensure staff are not assigned at specific times
-    for s in staff:
-        if 'omit_time' in s:
-            for t in s['omit_time']:
-                for o in observations:
-                    problem += assignments[(s["id"], o["id"],
-                                            t)] == 0, f"Omit Time (staff {s['id']}, observation {o['id']}, time {t}) Constraint"
-
-    # Names in omit_staff must not be assigned any time for that patient
-    for o in observations:
-        for s in staff:
-            if s["name"] in o["omit_staff"]:
-                for t in range(12):
-                    problem += assignments[(
-                        s["id"], o["id"],
-                        t)] == 0, f"Omit Staff (observation {o['id']}, staff {s['id']}, time {t}) Constraint"
-
-    # Enforce staff are only assigned to patients in their special_list (if any)
-    for s in staff:
-        special = set(s.get("special_list") or [])
-        if special:
-            for o in observations:
-                if o["name"] not in special:
-                    for t in range(12):
-                        problem += assignments[(s["id"], o["id"], t)] == 0, \
-                            f"Special List Restriction (staff {s['id']}, observation {o['id']}, time {t}) Constraint"
-
-    # Ensure staff are assigned to no more than one patient at a time
-    for t in range(12):
-        for s in staff:
-            # Create a list of patients assigned to the current staff at the
-            # current time
-            assigned_patients = [assignments[(s["id"], o["id"], t)] for o in observations]
-            # Add a constraint that the sum of the assigned_patients list
-            # must be less than or equal to 1
-            problem += pulp.lpSum(
-                assigned_patients) <= 1, f"Staff Row Constraint (staff {s['id']}, time {t}) Constraint"
-
-    # Ensure each staff member is not assigned to THE SAME observation for more
-    # than 2 consecutive hours
-    for s in staff:
-        for o in observations:
-            for t in range(11):
-                if s["assigned"] and s["start_time"] <= t < s["end_time"] - 1:
-                    problem += pulp.lpSum([assignments[(s["id"], o["id"], t_prime)] for t_prime in
-                                           range(max(0, t - 1),
-                                                 t + 2)]) <= 2, f"Consecutive Hours (staff {s['id']}, observation {o['id']}, time {t}) Constraint"
-
-    # Staff whose duration is < 12 must have >= 1 unassigned time slot
-    # between their start_time + 3 and end_time
-    for s in staff:
-        if s["duration"] < 12:
-            for t in range(s["start_time"] + 3, s["end_time"]):
-                problem += pulp.lpSum([assignments[(s["id"], o["id"], t_prime)] for o in observations for t_prime in
-                                       range(t - 1,
-                                             t + 1)]) <= 1, f"Minimum Break (staff {s['id']}, time {t}) Constraint"
-
-    # Staff whose duration is >= 12 must have >= 2 unassigned time slots
-    # between 5 and 11
-    for s in staff:
-        if s["duration"] >= 12:
-            problem += pulp.lpSum(
-                [assignments[(s["id"], o["id"], t)] for o in observations for t in range(5, 12)]) <= 5, \
-                f"Break Constraint (staff {s['id']}) Constraint"
-
-    # Add the objective function to minimize workload imbalance
-    # We minimize the maximum workload (min-max optimization) to ensure fair distribution
-    
-    # Create auxiliary variable for maximum workload
-    max_workload = pulp.LpVariable("max_workload", lowBound=0, cat="Continuous")
-    
-    # For each staff member, calculate their total workload and constrain it to be <= max_workload
-    for s in staff:
-        if s["assigned"]:  # Only consider assigned staff
-            staff_total_workload = pulp.lpSum([assignments[(s["id"], o["id"], t)] 
-                                               for o in observations 
-                                               for t in range(12)
-                                               if s["start_time"] <= t < s["end_time"]])
-            problem += staff_total_workload <= max_workload, f"Max_Workload_Constraint_Staff_{s['id']}"
-    
-    # Objective: minimize the maximum workload (this tends to balance workload across staff)
-    problem += max_workload, "Minimize_Maximum_Workload"
+    with span("snapshot_load"):
+        staff = get_staff_rows_as_dict()
+        observations = get_patient_rows_as_dict()
+        if tuning_corpus():
+            store_ward(tuning_corpus(), staff, observations, ward=st.session_state.get("db"))
+
+    with span("lower_bound"):
+        snapshot = build_snapshot(staff, observations)
+        if published is not None and current_slot > 0:
+            # The analytic bound and the heuristic plan whole shifts, so re-plans go straight to CBC
+            snapshot = freeze_past(snapshot, published, current_slot)
+            backend, use_lower_bound, warm_start = "sparse", False, False
+        workload_bound = workload_lower_bound(snapshot) if use_lower_bound else None
+
+    # Every argument that changes the allocation or how it is labelled (proven, gap) is part of the key
+    pool_key = (shift, backend, staff, observations, current_slot, published, min_changes, alternatives,
+                symmetry_breaking, use_lower_bound, warm_start, live, lazy_constraints, aggregated,
+                decomposition, budget)
+    solved = recall("solved_allocation", pool_key)
+    if solved is not None:
+        pool, quality = solved
+        return show_allocation(staff, observations, snapshot, pool, quality, shift)
+    initial = None
+    if (warm_start or backend == "heuristic") and backend != "portfolio" and not (use_lower_bound and workload_bound is None):
+        with span("heuristic"):
+            initial = solve_heuristic(snapshot)
+
+    # x is the (S, P, T) allocation when one was found; CBC backends fill in the log summary
+    x, summary = None, {}
+    if use_lower_bound and workload_bound is None:
+        status = 'Infeasible'
+    elif min_changes and published is not None:
+        with span("cbc_solve"):
+            status, _, x, changes = solve_min_changes(snapshot, array_from_cells(snapshot, published),
+                                                      options=cbc_options(budget), log_path="log.txt",
+                                                      workload_bound=workload_bound, initial=initial,
+                                                      symmetry_breaking=symmetry_breaking)
+        # Stage one is skipped (leaving no log) when a start already meets the analytic bound
+        summary = {"result": "Optimal solution found"} if status == 'Optimal' else read_log_summary("log.txt")
+        if x is not None:
+            st.caption(f"{changes} cell(s) changed from the reference allocation")
+    elif backend == "heuristic":
+        if initial is None:
+            st.warning("⚠️ The quick allocation could not find a feasible rota; run the full solver.")
+            return None, None, None
+        status, x = 'Feasible', initial
+    elif backend == "portfolio":
+        with span("portfolio"):
+            race = solve_portfolio(staff, observations, deadline=budget["time_limit"] or None)
+        logger.info("Portfolio winner: %s after %ss", race['winner'], race['elapsed'])
+        status, x = race['status'], race['x']
+        # The winner proved its answer (CBC's optimality, or the heuristic meeting the bound)
+        summary = {"result": "Optimal solution found"} if race['proven'] and status == 'Optimal' else {}
+    elif backend == "sparse" and live:
+        # The LP relaxation gives a provisional board and a bound within a second; an
+        # infeasible relaxation proves the ward infeasible without starting the MIP
+        preview = None
+        if "frozen" not in snapshot:
+            # Kept like the live solve, so reruns while CBC runs do not solve the LP again
+            preview = recall("lp_preview", live_key(shift, snapshot))
+            if preview is None:
+                with span("lp_preview"):
+                    preview = remember("lp_preview", live_key(shift, snapshot),
+                                       preview_allocation(snapshot, workload_bound=workload_bound, initial=initial))
+        if preview is not None and preview["status"] == 'Infeasible':
+            status = 'Infeasible'
+        else:
+            provisional = st.empty()
+            if preview is not None and preview["x"] is not None:
+                initial = preview["x"]
+                with provisional.container():
+                    show_provisional(snapshot, preview, shift)
+            with span("cbc_solve"):
+                status, _, x = run_live_solve(shift, snapshot, budget, initial=initial,
+                                              symmetry_breaking=symmetry_breaking, workload_bound=workload_bound)
+            provisional.empty()
+            summary = read_log_summary("log.txt")
+    elif backend == "sparse" and decomposition and "frozen" not in snapshot:
+        with span("cbc_solve"):
+            status, _, x, method = solve_decomposed(snapshot, options=cbc_options(budget), log_path="log.txt",
+                                                    workload_bound=workload_bound, initial=initial)
+        logger.info("Decomposition: %s", method)
+        summary = read_log_summary("log.txt")
+    elif backend == "sparse":
+        with span("model_build"):
+            if aggregated and "frozen" not in snapshot:
+                model = build_aggregated_model(snapshot, workload_bound=workload_bound)
+            else:
+                model = build_sparse_model(snapshot, symmetry_breaking=symmetry_breaking,
+                                           workload_bound=workload_bound)
+        with span("cbc_solve"):
+            if lazy_constraints:
+                status, _, x, rounds, rows = solve_lazy(snapshot, model, options=cbc_options(budget),
+                                                        log_path="log.txt", initial=initial)
+                logger.info("Lazy rows: %d round(s), %d of %d rows", rounds, rows, len(model['rhs']))
+            else:
+                status, _, x = solve_sparse_model(snapshot, model, options=cbc_options(budget),
+                                                  log_path="log.txt", initial=initial)
+        summary = read_log_summary("log.txt")
+    else:
+        with span("model_build"):
+            problem, assignments = build_allocation_model(staff, observations,
+                                                          symmetry_breaking=symmetry_breaking,
+                                                          workload_bound=workload_bound)
+            if initial is not None:
+                set_mip_start(problem, assignments, snapshot, initial)
 
-    # Solve the problem with logging enabled
-    problem.solve(PULP_CBC_CMD(logPath="log.txt", keepFiles=True, msg=True))
-    problem.writeLP('allocations.lp')
+        # Solve the problem with logging enabled
+        with span("cbc_solve"):
+            problem.solve(PULP_CBC_CMD(logPath="log.txt", keepFiles=True, msg=True,
+                                       warmStart=initial is not None, **pulp_options(budget)))
+        with span("write_lp"):
+            problem.writeLP('allocations.lp')
+        status = pulp.LpStatus[problem.status]
+        if problem.sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+            x = array_from_assignments(snapshot, assignments)
+        summary = read_log_summary("log.txt")
+
+    # Budget ran out before CBC found anything better than the MIP start
+    if x is None and status != 'Infeasible' and initial is not None:
+        x = initial
 
     # Check solver status and handle infeasibility
-    status = pulp.LpStatus[problem.status]
-    
     if status == 'Infeasible':
         print(f"Status: {status}")
         handle_infeasibility(staff, observations, shift)
         return None, None, None
-    elif status == 'Optimal':
-        st.success(f"✅ Allocation Status: {status}")
-        print_results(staff, observations, assignments, shift)
-        return staff, observations, assignments
+    if x is None:
+        st.warning(f"⚠️ Allocation Status: {status} - no allocation found within "
+                   f"{budget['time_limit']}s; try a longer time limit for this ward.")
+        return None, None, None
+
+    # Every backend's allocation goes through the same rule check before it is shown
+    with span("validate"):
+        violations = find_violations(snapshot, x)
+    if violations:
+        logger.warning("\n".join(violations))
+        st.error(f"❌ The {backend} allocation breaks {len(violations)} rule(s) and was not shown: "
+                 f"{violations[0]}")
+        return None, None, None
+
+    quality = assess_result(max_workload(snapshot, x), summary, budget, workload_bound)
+    pool = [x]
+    if alternatives > 1:
+        with span("alternatives"):
+            pool = solve_alternatives(snapshot, x, k=alternatives, options=cbc_options(budget))
+    # Room for the page's own solve next to repairs of edited or uploaded allocations
+    remember("solved_allocation", pool_key, (pool, quality), keep=4)
+    return show_allocation(staff, observations, snapshot, pool, quality, shift)
+
+
+def check_uploaded_allocation(shift, uploaded):
+    """
+    Validate an uploaded, hand-edited Table 1 or Table 2 CSV against the
+    ward's current staff and patients, showing the table with the cells that
+    break a rule highlighted.
+
+    Returns (cells, valid) where cells lists the (staff id, patient id, slot)
+    cells of the uploaded allocation, e.g. to repair it with
+    solve_staff_allocation(shift, backend="sparse", published=cells, min_changes=True).
+    """
+    snapshot = build_snapshot(get_staff_rows_as_dict(), get_patient_rows_as_dict())
+    with span("upload_validate"):
+        uploaded.seek(0)
+        x, table, problems = read_allocation_csv(codecs.iterdecode(uploaded, "utf-8-sig"), snapshot)
+        grid = violation_grids(snapshot, rule_masks(snapshot, x))[table]
+        violations = find_violations(snapshot, x)
+    for problem in problems:
+        st.warning(problem)
+
+    hours = [index_to_hour_str(t, 'day' if shift == 'D' else 'night') for t in range(snapshot["n_slots"])]
+    staff_names = [s["name"] for s in snapshot["staff"]]
+    patient_names = [o["name"] for o in snapshot["observations"]]
+    if table == "staff":
+        busy = x.any(axis=1)
+        patient = x.argmax(axis=1)
+        rows = [[patient_names[patient[i, t]] if busy[i, t] else "OFF" for i in range(len(staff_names))]
+                for t in range(len(hours))]
+        frame = pd.DataFrame(rows, index=hours, columns=staff_names)
+        shown = busy.any(axis=1) | grid.any(axis=0)
     else:
-        st.warning(f"⚠️ Allocation Status: {status}")
-        print_results(staff, observations, assignments, shift)
-        return staff, observations, assignments
+        rows = [[", ".join(staff_names[i] for i in np.flatnonzero(x[:, j, t])) for j in range(len(patient_names))]
+                for t in range(len(hours))]
+        frame = pd.DataFrame(rows, index=hours, columns=patient_names)
+        shown = snapshot["covered"] | grid.any(axis=0)
+    highlight = np.where(grid[:, shown], "background-color: #f8d7da", "")
+    st.dataframe(frame.loc[:, shown].style.apply(lambda _: highlight, axis=None), width=1200)
+
+    if violations:
+        st.error(f"❌ The uploaded allocation breaks {len(violations)} rule(s)")
+        with st.expander("Rule breaks"):
+            st.write("\n".join(f"- {v}" for v in violations))
+    else:
+        st.success("✅ The uploaded allocation meets every rule")
+    cells = [(snapshot["staff_ids"][i], snapshot["patient_ids"][j], int(t)) for i, j, t in zip(*np.nonzero(x))]
+    return cells, not violations
 
+
+def edit_allocation(shift, assignments):
+    """
+    Editable Table 2 grid (staff along the top) for swapping staff between
+    patients by hand.
+
+    Each rerun applies only the cells changed since the last one to an
+    AllocationChecker kept in session state, so checking an edit costs the
+    same on any size of ward. Returns (cells, valid) for the edited
+    allocation, as check_uploaded_allocation does.
+    """
+    snapshot = build_snapshot(get_staff_rows_as_dict(), get_patient_rows_as_dict())
+    x = array_from_assignments(snapshot, assignments)
+    # A new base allocation starts a new grid, dropping edits made to the old one
+    grid_key = f"allocation_grid_{shift}_{hashlib.md5(x.tobytes()).hexdigest()[:12]}"
+    if st.session_state.get("allocation_editor", (None,))[0] != grid_key:
+        st.session_state["allocation_editor"] = (grid_key, AllocationChecker(snapshot, x), {})
+    _, checker, applied = st.session_state["allocation_editor"]
+
+    hours = [index_to_hour_str(t, 'day' if shift == 'D' else 'night') for t in range(snapshot["n_slots"])]
+    patient_names = [o["name"] for o in snapshot["observations"]]
+    patient_index = {name: j for j, name in enumerate(patient_names)}
+    # Staff on shift, labelled uniquely so edits map back to one staff position
+    on_shift = np.flatnonzero(snapshot["on_shift"].any(axis=1))
+    names = [snapshot["staff"][i]["name"] for i in on_shift]
+    columns = [name if names.count(name) == 1 else f"{name} ({snapshot['staff_ids'][i]})"
+               for name, i in zip(names, on_shift)]
+    busy, patient = x.any(axis=1), x.argmax(axis=1)
+    frame = pd.DataFrame([[patient_names[patient[i, t]] if busy[i, t] else "OFF" for i in on_shift]
+                          for t in range(len(hours))], index=hours, columns=columns)
+
+    st.write("##### :orange[Edit the allocation]")
+    st.data_editor(frame, key=grid_key, width=1200, height=455,
+                   column_config={column: st.column_config.SelectboxColumn(options=["OFF"] + patient_names)
+                                  for column in columns})
+    edited = {(row, column): value for row, changes in st.session_state[grid_key]["edited_rows"].items()
+              for column, value in changes.items()}
+    for row, column in set(edited) | set(applied):
+        value = edited.get((row, column), frame.iloc[row][column])
+        if applied.get((row, column), frame.iloc[row][column]) != value:
+            checker.assign(on_shift[columns.index(column)], row, patient_index.get(value))
+            applied[(row, column)] = value
+
+    if checker.valid:
+        st.success("✅ The edited allocation meets every rule")
+    else:
+        st.error(f"❌ The edited allocation breaks {sum(checker.violation_counts().values())} rule(s)")
+        st.write("\n".join(f"- {message}" for message in checker.messages()))
+    cells = [(snapshot["staff_ids"][i], snapshot["patient_ids"][j], int(t))
+             for i, j, t in zip(*np.nonzero(checker.x))]
+    return cells, checker.valid
@@ -0,0 +1,165 @@
+# portfolio.py
+
+"""
+Race several solver configurations on the same ward in parallel processes.
+
+Each configuration runs in its own worker process (and process group, so
+the CBC subprocess it starts can be killed with it). The first proven
+optimal or proven infeasible answer wins; otherwise the best incumbent
+reported by the deadline is returned. Remaining workers are killed either way.
+"""
+
+import multiprocessing
+import os
+import queue
+import signal
+import time
+
+import numpy as np
+
+# Default portfolio: a heuristic that often proves optimality on its own
+# (when it meets the analytic bound) plus CBC on differently-tuned models.
+DEFAULT_PORTFOLIO = (
+    {"name": "heuristic", "engine": "heuristic"},
+    {"name": "sparse", "engine": "sparse", "workload_bound": True, "warm_start": True},
+    {"name": "sparse_symmetry", "engine": "sparse", "workload_bound": True, "symmetry_breaking": True},
+    {"name": "sparse_aggressive", "engine": "sparse", "workload_bound": True, "warm_start": True,
+     "options": ["strategy", "2", "heuristics", "on"]},
+    {"name": "pulp", "engine": "pulp", "workload_bound": True, "warm_start": True},
+)
+
+
+def run_configuration(config, staff, observations):
+    """
+    Solve one portfolio configuration in the current process.
+
+    Returns a result dict with ``name``, ``status`` ("Optimal", "Feasible",
+    "Infeasible" or "Not Solved"), ``objective``, ``x`` and ``proven``
+    (True when the status is a proof: optimal or infeasible).
+    """
+    import pulp
+
+    from .bounds import workload_lower_bound
+    from .heuristic import solve_heuristic
+    from .milo_model import build_allocation_model, set_mip_start
+    from .snapshot import build_snapshot, array_from_assignments
+    from .sparse_model import build_sparse_model, solve_sparse_model
+    from .validator import max_workload
+
+    snapshot = build_snapshot(staff, observations)
+    bound = workload_lower_bound(snapshot)
+    result = {"name": config["name"], "status": "Not Solved", "objective": None, "x": None, "proven": False}
+    if bound is None:
+        result.update(status="Infeasible", proven=True)
+        return result
+
+    workload_bound = bound if config.get("workload_bound") else None
+    initial = solve_heuristic(snapshot) if config["engine"] == "heuristic" or config.get("warm_start") else None
+
+    if config["engine"] == "heuristic":
+        if initial is not None:
+            objective = max_workload(snapshot, initial)
+            result.update(status="Optimal" if objective == bound else "Feasible", objective=objective,
+                          x=initial, proven=objective == bound)
+        return result
+
+    if config["engine"] == "sparse":
+        model = build_sparse_model(snapshot, symmetry_breaking=config.get("symmetry_breaking", False),
+                                   workload_bound=workload_bound)
+        status, objective, x = solve_sparse_model(snapshot, model, options=config.get("options", ()),
+                                                  initial=initial)
+    else:
+        problem, assignments = build_allocation_model(staff, observations,
+                                                      symmetry_breaking=config.get("symmetry_breaking", False),
+                                                      workload_bound=workload_bound)
+        if initial is not None:
+            set_mip_start(problem, assignments, snapshot, initial)
+        problem.solve(pulp.PULP_CBC_CMD(msg=False, warmStart=initial is not None,
+                                        options=config.get("options", [])))
+        status = pulp.LpStatus[problem.status]
+        objective = pulp.value(problem.objective)
+        x = array_from_assignments(snapshot, assignments) if status == "Optimal" else None
+    result.update(status=status, objective=objective, x=x, proven=status in ("Optimal", "Infeasible"))
+    return result
+
+
+def _worker(config, staff, observations, results):
+    try:
+        # Own process group, so killing the group also stops the CBC child process (POSIX only)
+        if hasattr(os, "setsid"):
+            os.setsid()
+        results.put(run_configuration(config, staff, observations))
+    except Exception as error:  # report rather than leave the race waiting
+        results.put({"name": config["name"], "status": "Error", "objective": None, "x": None,
+                     "proven": False, "error": repr(error)})
+
+
+def _kill(process):
+    if not process.is_alive():
+        return
+    if not hasattr(os, "killpg"):
+        process.kill()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        process.kill()
+
+
+def _better(result, best):
+    if result["x"] is None or result["objective"] is None:
+        return False
+    return best is None or result["objective"] < best["objective"]
+
+
+def solve_portfolio(staff, observations, configs=DEFAULT_PORTFOLIO, deadline=30.0, start_method="spawn"):
+    """
+    Race ``configs`` on the ward in parallel worker processes.
+
+    Returns a dict with the winning ``status``, ``objective``, ``x`` (the
+    (S, P, T) allocation or None), ``winner`` (configuration name),
+    ``proven``, ``elapsed`` seconds and ``results`` (every result received,
+    without allocations). ``deadline`` is in seconds; None waits for the
+    first proven answer (or every worker) however long it takes.
+    """
+    context = multiprocessing.get_context(start_method)
+    results = context.Queue()
+    started = time.perf_counter()
+    processes = [context.Process(target=_worker, args=(config, staff, observations, results), daemon=True)
+                 for config in configs]
+    for process in processes:
+        process.start()
+
+    best, received = None, []
+    try:
+        while len(received) < len(processes):
+            remaining = None if deadline is None else deadline - (time.perf_counter() - started)
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                # Without a deadline, wake up now and then in case every worker died without reporting
+                result = results.get(timeout=1.0 if remaining is None else remaining)
+            except queue.Empty:
+                if remaining is None and any(process.is_alive() for process in processes):
+                    continue
+                break
+            result["elapsed"] = round(time.perf_counter() - started, 3)
+            received.append(result)
+            if result["proven"]:
+                best = result
+                break
+            if _better(result, best):
+                best = result
+    finally:
+        for process in processes:
+            _kill(process)
+        for process in processes:
+            process.join(timeout=1)
+
+    summary = [{k: v for k, v in r.items() if k != "x"} for r in received]
+    if best is None:
+        return {"status": "Not Solved", "objective": None, "x": None, "winner": None, "proven": False,
+                "elapsed": round(time.perf_counter() - started, 3), "results": summary}
+    return {"status": best["status"], "objective": best["objective"],
+            "x": None if best["x"] is None else np.asarray(best["x"]), "winner": best["name"],
+            "proven": best["proven"], "elapsed": round(time.perf_counter() - started, 3), "results": summary}
@@ -0,0 +1,141 @@
+# progress.py
+
+"""
+Live CBC solves: run the sparse model in a background CBC process, tail its
+log for incumbent and bound updates, and optionally stop it early to accept
+the best allocation found so far.
+"""
+
+import os
+import re
+import shutil
+import signal
+import tempfile
+import time
+
+from .cbc import start_cbc, read_solution, write_mip_start
+from .sparse_model import build_sparse_model, write_mps, mip_start_values, solution_to_array
+
+# CBC reports "no solution" as an objective of 1e+50
+NO_SOLUTION = 1e49
+
+_NUMBER = r"(-?[\d.]+(?:e[+-]?\d+)?)"
+_PATTERNS = (
+    (re.compile(rf"^Continuous objective value is {_NUMBER}"), ("bound",)),
+    (re.compile(rf"^Cuts at root node changed objective from {_NUMBER} to {_NUMBER}"), (None, "bound")),
+    (re.compile(rf"^Cbc0012I Integer solution of {_NUMBER}"), ("incumbent",)),
+    (re.compile(rf"^Cbc0004I Integer solution of {_NUMBER} found after \d+ iterations and (\d+) nodes"),
+     ("incumbent", "nodes")),
+    (re.compile(rf"^Cbc0010I After (\d+) nodes, \d+ on tree, {_NUMBER} best solution, best possible {_NUMBER}"),
+     ("nodes", "incumbent", "bound")),
+    (re.compile(rf"^Cbc0005I Partial search - best objective {_NUMBER} \(best possible {_NUMBER}\)"),
+     ("incumbent", "bound")),
+    (re.compile(rf"^Cbc0001I Search completed - best objective {_NUMBER}"), ("incumbent",)),
+)
+
+
+def parse_progress(line):
+    """
+    Progress values reported by one CBC log line, as a dict with any of
+    ``incumbent``, ``bound`` and ``nodes``; empty if the line reports none.
+    """
+    for pattern, keys in _PATTERNS:
+        match = pattern.match(line.strip())
+        if match:
+            values = {}
+            for key, text in zip(keys, match.groups()):
+                if key == "nodes":
+                    values[key] = int(text)
+                elif key is not None:
+                    values[key] = float(text)
+            if values.get("incumbent", 0) >= NO_SOLUTION:
+                del values["incumbent"]
+            return values
+    return {}
+
+
+class LogTail:
+    '''Incremental reader of a growing log file, returning only complete new lines.'''
+
+    def __init__(self, path):
+        self.path = path
+        self.position = 0
+        self.partial = ""
+
+    def read_lines(self):
+        try:
+            with open(self.path) as log:
+                log.seek(self.position)
+                text = log.read()
+                self.position = log.tell()
+        except OSError:
+            return []
+        lines = (self.partial + text).split("\n")
+        self.partial = lines.pop()
+        return lines
+
+
+class LiveSolve:
+    """
+    A sparse-model CBC solve running in the background.
+
+    Call poll() to pick up progress, accept() to stop CBC with its current
+    incumbent and result() once it has finished.
+    """
+
+    def __init__(self, snapshot, model=None, options=(), initial=None, log_path=None):
+        self.snapshot = snapshot
+        self.model = model if model is not None else build_sparse_model(snapshot)
+        self.directory = tempfile.mkdtemp()
+        self.solution_path = os.path.join(self.directory, "allocation.sol")
+        self.log_path = log_path or os.path.join(self.directory, "allocation.log")
+        mps_path = os.path.join(self.directory, "allocation.mps")
+        write_mps(self.model, mps_path)
+        mip_start_path = None
+        if initial is not None:
+            mip_start_path = os.path.join(self.directory, "allocation.mst")
+            write_mip_start(mip_start_path, mip_start_values(self.model, initial))
+        self.started = time.perf_counter()
+        self.progress = {"incumbent": None, "bound": None, "nodes": 0, "elapsed": 0.0}
+        self.accepted = False
+        self._tail = LogTail(self.log_path)
+        self.process = start_cbc(mps_path, self.solution_path, self.log_path, options, mip_start_path)
+
+    @property
+    def running(self):
+        return self.process.poll() is None
+
+    def poll(self):
+        '''Read new log lines and return the updated progress dict.'''
+        for line in self._tail.read_lines():
+            self.progress.update(parse_progress(line))
+        self.progress["elapsed"] = time.perf_counter() - self.started
+        return self.progress
+
+    def accept(self):
+        '''Ask CBC to stop and write its best solution so far.'''
+        self.accepted = True
+        if self.running:
+            self.process.send_signal(signal.SIGINT)
+
+    def cancel(self):
+        '''Stop CBC without keeping a result and remove its files.'''
+        if self.running:
+            self.process.kill()
+        self.process.wait()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def result(self, timeout=None):
+        """
+        Wait for CBC to finish and return (status, objective, x) as
+        solve_sparse_model does; the temporary files are removed.
+        """
+        self.process.wait(timeout)
+        self.poll()
+        try:
+            if not os.path.exists(self.solution_path):
+                return "Not Solved", None, None
+            status, objective, values = read_solution(self.solution_path)
+            return status, objective, solution_to_array(self.model, values) if values else None
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,126 @@
+# relaxation.py
+
+"""
+Provisional allocations from an LP relaxation.
+
+The LP solved is that of the break-first stage-one model
+(decomposition.build_break_model): works[s, t] with the break rules, each
+slot's demand and the eligible-staff rows. It is a relaxation of the full
+model and small enough for CBC to solve in well under a second on wards
+where the full model's LP takes tens of seconds. Its optimum, rounded up
+(workloads are whole slots), is a proven lower bound on max_workload, and an
+infeasible LP proves the ward infeasible.
+
+The fractional works values are rounded by the constructive heuristic: at
+each slot it tries staff in order of their LP value, least loaded first
+among equals, and repairs what the LP leaves out (consecutive hours, which
+patient each working staff member takes). Local search then balances the
+workloads as usual.
+"""
+
+import math
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from .cbc import read_duals, read_solution, run_cbc
+from .decomposition import build_break_model
+from .heuristic import construct_allocation, improve_allocation, solve_heuristic
+from .sparse_model import solution_columns, write_mps
+from .validator import max_workload
+
+# LP objectives within this of an integer count as that integer
+TOLERANCE = 1e-6
+
+
+def relax(model):
+    '''Copy of a sparse model with every column continuous.'''
+    return {**model, "integer": np.zeros(len(model["objective"]), dtype=bool)}
+
+
+def solve_relaxation(model, options=(), log_path=None):
+    """
+    Solve the LP relaxation of a sparse model with CBC.
+
+    Returns (status, objective, columns, duals) where columns holds every
+    column's value and duals every row's dual value (the change in the
+    objective per unit of right-hand side), both None when CBC wrote no
+    solution.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        mps_path = os.path.join(tmp, "relaxation.mps")
+        solution_path = os.path.join(tmp, "relaxation.sol")
+        write_mps(relax(model), mps_path)
+        run_cbc(mps_path, solution_path, log_path=log_path, options=options)
+        if not os.path.exists(solution_path):
+            return "Not Solved", None, None, None
+        status, objective, values = read_solution(solution_path)
+        marginals = read_duals(solution_path)
+    if not values:
+        return status, objective, None, None
+    duals = np.array([marginals.get(f"R{i}", 0.0) for i in range(len(model["rhs"]))])
+    return status, objective, solution_columns(model, values), duals
+
+
+def round_relaxation(snapshot, works, restarts=20, seed=0):
+    """
+    Round fractional works[s, t] into an allocation: the constructive
+    heuristic guided by the LP values, then local search. Returns the
+    (S, P, T) array, or None if no restart covered every slot.
+    """
+    rng = random.Random(seed)
+    preference = np.broadcast_to(works[:, None, :], snapshot["allowed"].shape)
+    for _ in range(restarts):
+        x = construct_allocation(snapshot, rng, preference=preference)
+        if x is not None:
+            return improve_allocation(snapshot, x, rng=rng)
+    return None
+
+
+def preview_allocation(snapshot, options=(), workload_bound=None, initial=None, restarts=20, seed=0):
+    """
+    Near-instant provisional allocation with a proven bound.
+
+    ``initial`` is an allocation already at hand (e.g. the heuristic's MIP
+    start); it is kept when it beats the rounded one. Without it the
+    unguided heuristic steps in when rounding fails.
+
+    Returns a dict with ``status`` ("Infeasible" when the LP proves it,
+    "Optimal" when the allocation meets the bound, "Feasible" when it does
+    not, "Not Solved" when there is no allocation), ``bound`` (the larger of
+    the rounded-up LP optimum and ``workload_bound``), ``x``,
+    ``max_workload``, ``method`` ("LP rounding" or "heuristic": where x came
+    from) and ``seconds``.
+    """
+    if "frozen" in snapshot:
+        raise ValueError("Re-plans are only supported by build_sparse_model")
+    started = time.perf_counter()
+    result = {"status": "Not Solved", "bound": workload_bound, "x": None, "max_workload": None,
+              "method": "LP rounding", "seconds": None}
+
+    model = build_break_model(snapshot, workload_bound)
+    status, objective, columns, _ = solve_relaxation(model, options=options)
+    if status == "Infeasible":
+        result.update(status="Infeasible", seconds=round(time.perf_counter() - started, 3))
+        return result
+    if status == "Optimal" and objective is not None:
+        result["bound"] = max(workload_bound or 0, math.ceil(objective - TOLERANCE))
+
+    found = []
+    if columns is not None:
+        index = model["cell_index"][:, 0, :]
+        works = np.where(index >= 0, columns[index], 0.0)
+        found.append((round_relaxation(snapshot, works, restarts=restarts, seed=seed), "LP rounding"))
+    if initial is None and not any(x is not None for x, _ in found):
+        initial = solve_heuristic(snapshot, restarts=restarts, seed=seed)
+    found.append((initial, "heuristic"))
+    found = [(max_workload(snapshot, x), k, x, method) for k, (x, method) in enumerate(found) if x is not None]
+    if found:
+        workload, _, x, method = min(found, key=lambda item: item[:2])
+        result.update(x=x, max_workload=workload, method=method,
+                      status="Optimal" if result["bound"] is not None and workload <= result["bound"] else "Feasible")
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
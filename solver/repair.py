@@ -0,0 +1,79 @@
+# repair.py
+
+"""
+Minimum-perturbation re-solves: keep the best achievable max_workload, then
+change as few (staff, patient, slot) cells of the published allocation as
+possible, so a small input change does not reshuffle the whole board.
+"""
+
+import numpy as np
+
+from .sparse_model import build_sparse_model, solve_sparse_model
+from .validator import find_violations, max_workload
+
+
+def min_change_model(snapshot, reference, workload_cap, symmetry_breaking=False):
+    """
+    Sparse model whose objective is the number of cells that differ from the
+    ``reference`` (S, P, T) allocation, with max_workload capped at
+    ``workload_cap``.
+
+    Changed cells are sum(1 - x) over reference cells plus sum(x) over the
+    others, i.e. ``objective_offset`` + sum((1 - 2 * reference) * x); reference
+    cells that are no longer allowed count as changed through the offset.
+    """
+    model = build_sparse_model(snapshot, symmetry_breaking=symmetry_breaking)
+    reference = np.asarray(reference, dtype=int)
+    present = model["cell_index"] >= 0
+    objective = np.zeros(len(model["objective"]))
+    objective[model["cell_index"][present]] = 1 - 2 * reference[present]
+    model["objective"] = objective
+    model["objective_offset"] = int(reference.sum())
+    model["col_upper"][model["workload_col"]] = workload_cap
+    return model
+
+
+def changed_cells(reference, x):
+    '''Number of (staff, patient, slot) cells that differ between two allocations.'''
+    return int((np.asarray(reference, dtype=int) != np.asarray(x, dtype=int)).sum())
+
+
+def solve_min_changes(snapshot, reference, options=(), log_path=None, workload_bound=None, initial=None,
+                      symmetry_breaking=False):
+    """
+    Two-stage re-solve against the ``reference`` (published) allocation.
+
+    Stage one solves the usual min-max model (warm-started from ``initial``)
+    for the best max_workload W*; stage two minimises changed cells with
+    max_workload <= W*. If the reference is still valid and within W* it is
+    the MIP start of stage two (usually making that stage trivial); otherwise
+    the stage-one allocation is. The stage-one CBC log goes to ``log_path``.
+    Stage one is skipped when the reference or ``initial`` is valid and
+    already meets the analytic ``workload_bound``.
+
+    Returns (status, workload, x, changes) where status is the stage-one
+    status and x is None when stage one found no allocation.
+    """
+    reference = np.asarray(reference, dtype=np.int8)
+    reference_valid = not find_violations(snapshot, reference)
+    # A valid allocation meeting the analytic bound already proves W*, so stage one can be skipped
+    proven = [y for y in (reference if reference_valid else None, initial)
+              if y is not None and workload_bound is not None and max_workload(snapshot, y) <= workload_bound]
+    if proven:
+        status, x = "Optimal", proven[0]
+    else:
+        model = build_sparse_model(snapshot, symmetry_breaking=symmetry_breaking, workload_bound=workload_bound)
+        status, _, x = solve_sparse_model(snapshot, model, options=options, log_path=log_path, initial=initial)
+        if x is None:
+            return status, None, None, None
+    workload = max_workload(snapshot, x)
+
+    start = x
+    if reference_valid and max_workload(snapshot, reference) <= workload:
+        start = reference
+    repair = min_change_model(snapshot, reference, workload, symmetry_breaking=symmetry_breaking)
+    repair_status, _, repaired = solve_sparse_model(snapshot, repair, options=options, initial=start)
+    # Keep the stage-one allocation if the repair stage was cut short without an incumbent
+    if repaired is not None and changed_cells(reference, repaired) <= changed_cells(reference, x):
+        x = repaired
+    return status, workload, x, changed_cells(reference, x)
@@ -0,0 +1,157 @@
+# scenarios.py
+
+"""
+What-if scenarios: evaluate staffing changes against a ward in parallel.
+
+A scenario is a dict with a ``name`` and a list of ``changes``, each one of
+
+    {"kind": "add_staff", "staff": {...}}                     (a staff row; id and name are filled in)
+    {"kind": "hours", "staff": name, "start_time": t0, "end_time": t1}
+    {"kind": "level", "patient": name, "observation_level": "1"}
+    {"kind": "clear_omit_time", "staff": name}
+    {"kind": "clear_omit_staff", "patient": name}
+    {"kind": "assign", "staff": name, "assigned": True}
+
+``evaluate_scenarios`` applies each scenario to copies of the ward's staff
+and observation rows in a process pool whose workers receive the base rows
+once, through the pool initializer, so each task only ships its scenario.
+Scenarios the analytic bound already shows infeasible are not solved.
+"""
+
+import copy
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# Base ward rows of a worker process, set by _init_worker
+_BASE = {}
+
+BANK_SHIFTS = ((0, 12), (0, 6), (6, 12))
+
+
+def _find(rows, name, kind):
+    for row in rows:
+        if row["name"] == name:
+            return row
+    raise ValueError(f"{kind} '{name}' is not on the ward")
+
+
+def apply_scenario(staff, observations, scenario):
+    '''Staff and observation rows with the scenario's changes applied (the inputs are not modified).'''
+    staff, observations = copy.deepcopy(staff), copy.deepcopy(observations)
+    for change in scenario["changes"]:
+        kind = change["kind"]
+        if kind == "add_staff":
+            row = {"gender": "F", "role": "HCA", "assigned": True, "start_time": 0, "end_time": 12,
+                   "omit_time": [], "special_list": [], **change["staff"]}
+            row.setdefault("id", max((s["id"] for s in staff), default=0) + 1)
+            row.setdefault("name", f"Bank {row['id']}")
+            row["duration"] = row["end_time"] - row["start_time"]
+            staff.append(row)
+        elif kind == "hours":
+            row = _find(staff, change["staff"], "Staff member")
+            row.update(start_time=change["start_time"], end_time=change["end_time"],
+                       duration=change["end_time"] - change["start_time"])
+        elif kind == "level":
+            _find(observations, change["patient"], "Patient")["observation_level"] = str(change["observation_level"])
+        elif kind == "clear_omit_time":
+            _find(staff, change["staff"], "Staff member")["omit_time"] = []
+        elif kind == "clear_omit_staff":
+            _find(observations, change["patient"], "Patient")["omit_staff"] = []
+        elif kind == "assign":
+            _find(staff, change["staff"], "Staff member")["assigned"] = change.get("assigned", True)
+        else:
+            raise ValueError(f"Unknown scenario change '{kind}'")
+    return staff, observations
+
+
+def evaluate_scenario(staff, observations, scenario, options=()):
+    """
+    Apply and solve one scenario in the current process.
+
+    Returns a row dict: ``scenario``, ``feasible``, ``max_workload`` (None
+    when infeasible), the analytic ``bound``, ``method`` ("bound" when the
+    pre-check settled it, otherwise the decomposition's method) and
+    ``seconds``.
+    """
+    from .bounds import workload_lower_bound
+    from .decomposition import solve_decomposed
+    from .snapshot import build_snapshot
+
+    started = time.perf_counter()
+    snapshot = build_snapshot(*apply_scenario(staff, observations, scenario))
+    bound = workload_lower_bound(snapshot)
+    row = {"scenario": scenario["name"], "feasible": False, "max_workload": None, "bound": bound,
+           "method": "bound"}
+    if bound is not None:
+        status, objective, x, method = solve_decomposed(snapshot, options=options, workload_bound=bound)
+        row.update(feasible=x is not None, max_workload=None if objective is None else int(round(objective)),
+                   method=method)
+    row["seconds"] = round(time.perf_counter() - started, 3)
+    return row
+
+
+def _init_worker(staff, observations, options):
+    _BASE.update(staff=staff, observations=observations, options=options)
+
+
+def _evaluate_in_worker(scenario):
+    try:
+        return evaluate_scenario(_BASE["staff"], _BASE["observations"], scenario, _BASE["options"])
+    except ValueError as error:
+        return {"scenario": scenario["name"], "feasible": False, "max_workload": None, "bound": None,
+                "method": f"error: {error}", "seconds": 0.0}
+
+
+def rank_scenarios(rows):
+    '''DataFrame of scenario results, feasible first, then by max_workload and number of changes.'''
+    frame = pd.DataFrame(rows, columns=["scenario", "feasible", "max_workload", "bound", "method", "seconds",
+                                        "changes"])
+    frame["max_workload"] = frame["max_workload"].astype("Int64")
+    return frame.sort_values(["feasible", "max_workload", "changes", "scenario"],
+                             ascending=[False, True, True, True], na_position="last").reset_index(drop=True)
+
+
+def evaluate_scenarios(staff, observations, scenarios, workers=None, options=(), start_method="spawn"):
+    """
+    Evaluate ``scenarios`` against the ward in a process pool and return the
+    ranked DataFrame (see rank_scenarios). ``workers=1`` runs them in this
+    process, which is quicker for a handful of small scenarios.
+    """
+    if workers == 1:
+        _init_worker(staff, observations, options)
+        rows = [_evaluate_in_worker(scenario) for scenario in scenarios]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method),
+                                 initializer=_init_worker, initargs=(staff, observations, options)) as pool:
+            rows = list(pool.map(_evaluate_in_worker, scenarios))
+    for row, scenario in zip(rows, scenarios):
+        row["changes"] = len(scenario["changes"])
+    return rank_scenarios(rows)
+
+
+def suggest_scenarios(staff, observations):
+    """
+    Common single-change scenarios for a tight or infeasible ward: one bank
+    shift of each BANK_SHIFTS pattern and gender, each patient above 1:1
+    reduced by one level, and each staff member's omit times cleared. The
+    unchanged ward comes first, for comparison.
+    """
+    scenarios = [{"name": "No change", "changes": []}]
+    for start_time, end_time in BANK_SHIFTS:
+        for gender in ("F", "M"):
+            scenarios.append({"name": f"Bank {gender}, slots {start_time}-{end_time}",
+                              "changes": [{"kind": "add_staff", "staff": {"gender": gender, "start_time": start_time,
+                                                                         "end_time": end_time}}]})
+    for o in observations:
+        level = int(o["observation_level"]) if str(o["observation_level"]).isdigit() else 0
+        if level >= 2:
+            scenarios.append({"name": f"{o['name']} to {level - 1}:1",
+                              "changes": [{"kind": "level", "patient": o["name"], "observation_level": level - 1}]})
+    for s in staff:
+        if s.get("assigned") and s.get("omit_time"):
+            scenarios.append({"name": f"{s['name']} without omit times",
+                              "changes": [{"kind": "clear_omit_time", "staff": s["name"]}]})
+    return scenarios
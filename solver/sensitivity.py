@@ -0,0 +1,122 @@
+# sensitivity.py
+
+"""
+Where a ward's pressure comes from, read off the LP relaxation's duals.
+
+The sparse model is made elastic: every coverage row gets a shortfall
+column, priced above any workload, so the LP is feasible even on an
+infeasible ward and the staff-slots it cannot cover are reported instead of
+a bare "infeasible". One LP solve then gives:
+
+* per coverage row (patient, slot): the shortfall and the dual, i.e. how
+  much the workload bound (or the shortfall) rises per extra staff member
+  required there;
+* per staff member: the duals of their rows (max_workload, one patient per
+  slot, break and consecutive-hours rules), i.e. how much relaxing that
+  constraint would lower the bound.
+
+Summing the coverage duals over patients ranks the slots, summing them over
+slots ranks the patients. No MIP is solved.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .relaxation import solve_relaxation
+from .sparse_model import build_sparse_model
+
+# Dual values smaller than this are noise
+TOLERANCE = 1e-6
+# Staff row kinds reported, grouped as in the staff table
+STAFF_ROWS = {"workload": "workload", "staff_slot": "staff_slot", "short_break": "breaks",
+              "long_break": "breaks", "consecutive": "consecutive"}
+
+
+def elastic_model(snapshot):
+    """
+    Sparse model with a shortfall column after max_workload for every
+    coverage row, costing n_slots + 1 per staff-slot, so no shortfall is
+    ever traded for a lower max_workload. ``shortfall_cols`` lists the
+    columns in coverage row order.
+    """
+    if "frozen" in snapshot:
+        raise ValueError("Re-plans are only supported by build_sparse_model")
+    model = build_sparse_model(snapshot)
+    rows = np.flatnonzero(model["row_kind"] == "coverage")
+    first = len(model["objective"])
+    columns = first + np.arange(len(rows))
+
+    # The shortfall goes at the end of its row, before the next row's entries
+    ends = model["indptr"][rows + 1]
+    added = np.zeros(len(model["rhs"]) + 1, dtype=np.int64)
+    added[rows + 1] = 1
+    model["indptr"] = model["indptr"] + np.cumsum(added)
+    model["indices"] = np.insert(model["indices"], ends, columns)
+    model["data"] = np.insert(model["data"], ends, 1.0)
+    model["objective"] = np.concatenate([model["objective"], np.full(len(rows), snapshot["n_slots"] + 1.0)])
+    model["col_lower"] = np.concatenate([model["col_lower"], np.zeros(len(rows))])
+    model["col_upper"] = np.concatenate([model["col_upper"], np.full(len(rows), np.inf)])
+    model["integer"] = np.concatenate([model["integer"], np.zeros(len(rows), dtype=bool)])
+    model["shortfall_cols"] = columns
+    return model
+
+
+def sensitivity_report(snapshot, options=()):
+    """
+    Rank the slots, patients and staff constraints that most limit the
+    workload bound, from one LP solve of the elastic model.
+
+    Returns a dict with ``status`` (the LP's), ``bound`` (the LP's
+    max_workload), ``shortfall`` (staff-slots the LP cannot cover; above 0
+    proves the ward infeasible) and three DataFrames, most pressing first:
+    ``slots`` (slot, shortfall, pressure), ``patients`` (patient, shortfall,
+    pressure) and ``staff`` (staff, workload, staff_slot, breaks,
+    consecutive, pressure). Pressure is the summed dual value: the rise per
+    extra required staff-slot for slots and patients, the fall per unit of
+    relaxed constraint for staff. It is measured in staff-slots of shortfall
+    when the ward is short, in max_workload otherwise. Staff with no binding
+    row are left out.
+    """
+    model = elastic_model(snapshot)
+    status, _, columns, duals = solve_relaxation(model, options=options)
+    report = {"status": status, "bound": None, "shortfall": None,
+              "slots": pd.DataFrame(columns=["slot", "shortfall", "pressure"]),
+              "patients": pd.DataFrame(columns=["patient", "shortfall", "pressure"]),
+              "staff": pd.DataFrame(columns=["staff", *dict.fromkeys(STAFF_ROWS.values()), "pressure"])}
+    if columns is None:
+        return report
+
+    n_slots = snapshot["n_slots"]
+    covered = np.flatnonzero(snapshot["covered"])
+    kind = model["row_kind"]
+    # Coverage rows run over the covered patients, then slots
+    short = columns[model["shortfall_cols"]].reshape(len(covered), n_slots)
+    # On a short ward the objective is almost all shortfall cost: report duals per staff-slot short
+    duals = np.where(np.abs(duals) > TOLERANCE, duals, 0.0)
+    if short.sum() > TOLERANCE:
+        duals = duals / (n_slots + 1)
+    coverage = duals[kind == "coverage"].reshape(len(covered), n_slots)
+    report.update(bound=round(float(columns[model["workload_col"]]), 3), shortfall=round(float(short.sum()), 3))
+
+    report["slots"] = pd.DataFrame({"slot": np.arange(n_slots), "shortfall": short.sum(axis=0),
+                                    "pressure": coverage.sum(axis=0)})
+    report["patients"] = pd.DataFrame({"patient": [snapshot["observations"][j]["name"] for j in covered],
+                                       "shortfall": short.sum(axis=1), "pressure": coverage.sum(axis=1)})
+
+    # Every staff row's cells belong to one staff member: attribute the row by its first cell
+    staff_of_cell = np.nonzero(snapshot["allowed"])[0]
+    first_cell = model["indices"][model["indptr"][:-1]]
+    groups = list(dict.fromkeys(STAFF_ROWS.values()))
+    values = np.zeros((len(snapshot["staff"]), len(groups)))
+    for row_kind, group in STAFF_ROWS.items():
+        rows = np.flatnonzero((kind == row_kind) & (duals != 0))
+        np.add.at(values[:, groups.index(group)], staff_of_cell[first_cell[rows]], -duals[rows])
+    table = pd.DataFrame(values, columns=groups)
+    table.insert(0, "staff", [row["name"] for row in snapshot["staff"]])
+    table["pressure"] = values.sum(axis=1)
+    report["staff"] = table[table["pressure"] > TOLERANCE]
+
+    for key, by in (("slots", ["shortfall", "pressure"]), ("patients", ["shortfall", "pressure"]),
+                    ("staff", ["pressure"])):
+        report[key] = report[key].sort_values(by, ascending=False, kind="stable").round(3).reset_index(drop=True)
+    return report
@@ -0,0 +1,254 @@
+# snapshot.py
+
+"""
+Array view of a ward's staff and observation rows.
+
+``build_snapshot`` turns the dicts returned by ``get_staff_rows_as_dict`` and
+``get_patient_rows_as_dict`` into NumPy arrays indexed by staff position,
+patient position and time slot, so model builders, heuristics and checks can
+work on the same pre-digested data instead of re-reading the rules.
+"""
+
+import numpy as np
+
+from utils.shift_calendar import HOURLY
+
+# Observation levels that carry a coverage requirement
+COVERAGE_LEVELS = ("1", "2", "3", "4")
+# The rules below are in hours; slot_rules converts them to a calendar's slots.
+# No staff member may stay with the same patient for more than this many hours in a row
+MAX_CONSECUTIVE = 2
+# Staff working >= LONG_SHIFT_HOURS take their break inside LONG_BREAK_HOURS
+# (hours from the start of the shift), working at most LONG_BREAK_MAX_WORKED of them
+LONG_SHIFT_HOURS = 12
+LONG_BREAK_HOURS = range(5, 12)
+LONG_BREAK_MAX_WORKED = 5
+# Staff working less than LONG_SHIFT_HOURS work at most SHORT_BREAK_MAX_WORKED
+# of every SHORT_BREAK_WINDOW hours from start_time + SHORT_BREAK_OFFSET - 1 on
+SHORT_BREAK_OFFSET = 3
+SHORT_BREAK_WINDOW = 2
+SHORT_BREAK_MAX_WORKED = 1
+
+
+def slot_rules(calendar=HOURLY):
+    """
+    The allocation rules in slots of ``calendar``: ``consecutive_cap`` (at
+    most that many slots in a row with one patient, so windows of cap + 1
+    slots), ``short_break_window`` / ``short_break_cap`` and
+    ``short_break_from`` (offset from start_time of the first window's last
+    slot), ``break_slots`` / ``break_max_worked`` for long shifts, and
+    ``long_shift_slots``. For hourly slots these are the familiar 2, (2, 1),
+    3, range(5, 12), 5 and 12.
+    """
+    short_break_window = calendar.slots(SHORT_BREAK_WINDOW)
+    return {
+        "consecutive_cap": calendar.slots(MAX_CONSECUTIVE),
+        "short_break_window": short_break_window,
+        "short_break_cap": calendar.slots(SHORT_BREAK_MAX_WORKED),
+        "short_break_from": calendar.slots(SHORT_BREAK_OFFSET - 1) + short_break_window - 1,
+        "break_slots": range(min(calendar.slots(LONG_BREAK_HOURS.start), calendar.n_slots),
+                             min(calendar.slots(LONG_BREAK_HOURS.stop), calendar.n_slots)),
+        "break_max_worked": calendar.slots(LONG_BREAK_MAX_WORKED),
+        "long_shift_slots": calendar.slots(LONG_SHIFT_HOURS),
+    }
+
+
+def _gender_conflict(patient, staff_member):
+    return (patient["gender_req"] == "M" and staff_member["gender"] == "F") or \
+        (patient["gender_req"] == "F" and staff_member["gender"] == "M")
+
+
+def build_snapshot(staff, observations, calendar=HOURLY):
+    """
+    Build the array view of the given staff and observation rows.
+
+    ``allowed[s, p, t]`` is True where the hard per-cell rules (level 0,
+    gender, assigned, working hours, omit_time, omit_staff, special_list)
+    leave staff s free to observe patient p at slot t; ``ignored``,
+    ``gender_conflict``, ``omitted`` (omit_staff) and ``outside_special``
+    (special_list) keep the individual reasons for the validator.
+
+    Staff hours (start_time, end_time, duration, omit_time) are in slots of
+    ``calendar``; ``rules`` holds the rules in those slots (see slot_rules).
+    """
+    rules = slot_rules(calendar)
+    n_staff, n_patients, n_slots = len(staff), len(observations), calendar.n_slots
+    slots = np.arange(n_slots)
+
+    start = np.array([s["start_time"] for s in staff], dtype=int).reshape(n_staff)
+    end = np.array([s["end_time"] for s in staff], dtype=int).reshape(n_staff)
+    duration = np.array([s["duration"] for s in staff], dtype=int).reshape(n_staff)
+    assigned = np.array([bool(s["assigned"]) for s in staff], dtype=bool).reshape(n_staff)
+
+    levels = [str(o["observation_level"]) for o in observations]
+    covered = np.array([level in COVERAGE_LEVELS for level in levels], dtype=bool).reshape(n_patients)
+    required = np.array([int(level) if level in COVERAGE_LEVELS else 0 for level in levels],
+                        dtype=int).reshape(n_patients)
+    ignored = np.array([level == "0" for level in levels], dtype=bool).reshape(n_patients)
+
+    # Staff availability by slot: assigned and within working hours, less omit times
+    on_shift = assigned[:, None] & (slots[None, :] >= start[:, None]) & (slots[None, :] < end[:, None])
+    available = on_shift.copy()
+    for i, s in enumerate(staff):
+        for t in s.get("omit_time") or []:
+            available[i, t] = False
+
+    # Staff/patient pairings ruled out by gender, omit_staff or special_list
+    gender_conflict = np.zeros((n_staff, n_patients), dtype=bool)
+    omitted = np.zeros((n_staff, n_patients), dtype=bool)
+    outside_special = np.zeros((n_staff, n_patients), dtype=bool)
+    for j, o in enumerate(observations):
+        omit_staff = o.get("omit_staff") or []
+        for i, s in enumerate(staff):
+            gender_conflict[i, j] = _gender_conflict(o, s)
+            omitted[i, j] = s["name"] in omit_staff
+    for i, s in enumerate(staff):
+        special = set(s.get("special_list") or [])
+        if special:
+            outside_special[i] = np.array([o["name"] not in special for o in observations], dtype=bool)
+    pairable = ~(gender_conflict | omitted | outside_special)
+    pairable[:, ignored] = False
+
+    allowed = pairable[:, :, None] & available[:, None, :]
+
+    return {
+        "staff": staff,
+        "observations": observations,
+        "staff_ids": [s["id"] for s in staff],
+        "patient_ids": [o["id"] for o in observations],
+        "n_slots": n_slots,
+        "start": start,
+        "end": end,
+        "duration": duration,
+        "assigned": assigned,
+        "covered": covered,
+        "required": required,
+        "ignored": ignored,
+        "on_shift": on_shift,
+        "available": available,
+        "gender_conflict": gender_conflict,
+        "omitted": omitted,
+        "outside_special": outside_special,
+        "pairable": pairable,
+        "allowed": allowed,
+        "long_break": duration >= rules["long_shift_slots"],
+        "calendar": calendar,
+        "rules": rules,
+    }
+
+
+def freeze_past(snapshot, published, current_slot):
+    """
+    Snapshot for re-planning a shift from ``current_slot`` onwards.
+
+    ``published`` lists the (staff id, patient id, slot) cells of the
+    allocation in force. Cells before ``current_slot`` are frozen: published
+    ones become the only allowed past cells (``frozen`` marks them, so the
+    model builders fix them to 1) and coverage is only required from
+    ``current_slot``. Staff or patients no longer on the ward are dropped.
+    """
+    frozen = array_from_cells(snapshot, published).astype(bool)
+    frozen[:, :, current_slot:] = False
+
+    allowed = snapshot["allowed"].copy()
+    allowed[:, :, :current_slot] = False
+    return {**snapshot, "allowed": allowed | frozen, "frozen": frozen, "current_slot": current_slot}
+
+
+def consecutive_window_starts(snapshot):
+    """
+    (S, T) mask of the slots t whose window (t - 1, ..., t + consecutive_cap - 1)
+    is capped at consecutive_cap for each patient, mirroring the "Consecutive
+    Hours" rows; for hourly slots that is the window (t - 1, t, t + 1).
+    """
+    slots = np.arange(snapshot["n_slots"])
+    last = slots + snapshot["rules"]["consecutive_cap"] - 1
+    return snapshot["assigned"][:, None] & (slots[None, :] >= snapshot["start"][:, None]) & \
+        (last[None, :] < snapshot["end"][:, None]) & (last[None, :] < snapshot["n_slots"])
+
+
+def short_break_window_ends(snapshot):
+    """
+    (S, T) mask of the slots t whose window of short_break_window slots
+    ending at t may hold at most short_break_cap assignments, mirroring the
+    "Minimum Break" rows for short shifts; for hourly slots the window is
+    (t - 1, t) and holds at most one.
+    """
+    slots = np.arange(snapshot["n_slots"])
+    return ~snapshot["long_break"][:, None] & \
+        (slots[None, :] >= snapshot["start"][:, None] + snapshot["rules"]["short_break_from"]) & \
+        (slots[None, :] < snapshot["end"][:, None])
+
+
+def window_sums(values, before, length):
+    """
+    Sums of ``values`` (..., T) over the windows of ``length`` slots that
+    start ``before`` slots before each slot t, zero-padded past both ends.
+    """
+    n_slots = values.shape[-1]
+    pad = [(0, 0)] * (values.ndim - 1) + [(before, max(length - before - 1, 0))]
+    padded = np.pad(np.asarray(values, dtype=int), pad)
+    return sum(padded[..., k:k + n_slots] for k in range(length))
+
+
+class AssignmentValue:
+    """Stand-in for a solved PuLP variable so array results can be passed to print_results."""
+    __slots__ = ("_value",)
+
+    def __init__(self, value):
+        self._value = value
+
+    def value(self):
+        return self._value
+
+
+def assignments_from_array(snapshot, x):
+    '''Convert an (S, P, T) 0/1 array to the assignments dict format used by print_results.'''
+    values = np.asarray(x).round().astype(int)
+    return {(s_id, o_id, t): AssignmentValue(int(values[i, j, t]))
+            for i, s_id in enumerate(snapshot["staff_ids"])
+            for j, o_id in enumerate(snapshot["patient_ids"])
+            for t in range(snapshot["n_slots"])}
+
+
+def array_from_assignments(snapshot, assignments):
+    '''Convert a solved assignments dict (PuLP variables or AssignmentValue) to an (S, P, T) 0/1 array.'''
+    x = np.zeros((len(snapshot["staff_ids"]), len(snapshot["patient_ids"]), snapshot["n_slots"]), dtype=np.int8)
+    for i, s_id in enumerate(snapshot["staff_ids"]):
+        for j, o_id in enumerate(snapshot["patient_ids"]):
+            for t in range(snapshot["n_slots"]):
+                value = assignments[(s_id, o_id, t)].value()
+                if value is not None and value > 0.5:
+                    x[i, j, t] = 1
+    return x
+
+
+def array_from_cells(snapshot, cells):
+    '''(S, P, T) 0/1 array of (staff id, patient id, slot) cells, skipping staff or patients no longer listed.'''
+    staff_position = {s_id: i for i, s_id in enumerate(snapshot["staff_ids"])}
+    patient_position = {o_id: j for j, o_id in enumerate(snapshot["patient_ids"])}
+    x = np.zeros(snapshot["allowed"].shape, dtype=np.int8)
+    for s_id, o_id, t in cells:
+        if s_id in staff_position and o_id in patient_position and 0 <= t < snapshot["n_slots"]:
+            x[staff_position[s_id], patient_position[o_id], t] = 1
+    return x
+
+
+def staff_equivalence_classes(snapshot):
+    """
+    Group staff the model cannot tell apart: same allowed (patient, slot)
+    cells, same working hours and the same break rule. Identical staff rows
+    (same gender, hours, no omit times, no special list and not named in any
+    omit_staff list) always fall in one class; role plays no part in the model.
+
+    Returns a list of classes with two or more staff positions, each sorted.
+    """
+    classes = {}
+    for i in range(len(snapshot["staff_ids"])):
+        if not snapshot["assigned"][i]:
+            continue
+        key = (int(snapshot["start"][i]), int(snapshot["end"][i]), bool(snapshot["long_break"][i]),
+               snapshot["allowed"][i].tobytes())
+        classes.setdefault(key, []).append(i)
+    return [members for members in classes.values() if len(members) > 1]
+
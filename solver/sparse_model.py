@@ -0,0 +1,453 @@
+# sparse_model.py
+
+"""
+Allocation model builder that emits coefficient arrays instead of PuLP objects.
+
+``build_sparse_model`` produces the same formulation as
+``milo_solve.build_allocation_model`` as a CSR matrix (indptr, indices, data)
+with row senses, right-hand sides and column bounds. Cells ruled out by the
+per-cell rules never become columns, and rows that cannot bind (a window with
+no more variables than its cap) are dropped, so the model is much smaller
+than the PuLP one while having the same feasible allocations and optimum.
+
+The arrays can be written straight to MPS and solved with the bundled CBC.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from .cbc import run_cbc, read_solution, write_mip_start
+from .snapshot import consecutive_window_starts, short_break_window_ends, staff_equivalence_classes
+
+
+def _rows_from_index_matrix(index_matrix, min_entries=1):
+    """
+    Turn an (R, K) matrix of column indices padded with -1 into CSR pieces.
+    Rows with fewer than ``min_entries`` columns are dropped.
+
+    Returns (counts per kept row, flat column indices in row order).
+    """
+    present = index_matrix >= 0
+    counts = present.sum(axis=1)
+    keep = counts >= min_entries
+    kept = index_matrix[keep]
+    return counts[keep], kept[kept >= 0]
+
+
+def _append_column(counts, indices, columns, coefficient):
+    """
+    Add ``columns[r]`` with ``coefficient`` at the end of each CSR row r whose
+    other entries (all coefficient 1) are given by (counts, indices).
+
+    Returns (counts, indices, data) of the extended rows.
+    """
+    starts_at = np.concatenate([[0], np.cumsum(counts + 1)[:-1]]).astype(np.int64)
+    extended = np.empty(int(counts.sum() + len(counts)), dtype=np.int64)
+    data = np.ones(len(extended))
+    last = starts_at + counts
+    fill = np.ones(len(extended), dtype=bool)
+    fill[last] = False
+    extended[fill] = indices
+    extended[last] = columns
+    data[last] = coefficient
+    return counts + 1, extended, data
+
+
+def _assemble_rows(blocks):
+    '''Stack (kind, sense, rhs, counts, indices, data or None) row blocks into CSR arrays.'''
+    row_counts = np.concatenate([b[3] for b in blocks]).astype(np.int64)
+    return {
+        "row_counts": row_counts,
+        "indptr": np.concatenate([[0], np.cumsum(row_counts)]).astype(np.int64),
+        "indices": np.concatenate([b[4] for b in blocks]).astype(np.int64),
+        "data": np.concatenate([b[5] if b[5] is not None else np.ones(len(b[4])) for b in blocks]),
+        "sense": np.concatenate([np.full(len(b[3]), b[1]) for b in blocks]),
+        "rhs": np.concatenate([np.asarray(b[2], dtype=float) for b in blocks]),
+        "row_kind": np.concatenate([np.full(len(b[3]), b[0], dtype=object) for b in blocks]),
+    }
+
+
+def _consecutive_rows(snapshot, cell_index):
+    '''CSR pieces of the consecutive-hours windows (t - 1, ..., t + cap - 1) of each staff, patient and start t.'''
+    n_staff, n_patients, n_slots = cell_index.shape
+    cap = snapshot["rules"]["consecutive_cap"]
+    padded = np.concatenate([np.full((n_staff, n_patients, 1), -1, dtype=np.int64), cell_index,
+                             np.full((n_staff, n_patients, cap - 1), -1, dtype=np.int64)], axis=2)
+    windows = np.stack([padded[:, :, k:k + n_slots] for k in range(cap + 1)], axis=-1)
+    starts = np.broadcast_to(consecutive_window_starts(snapshot)[:, None, :], windows.shape[:3])
+    return _rows_from_index_matrix(windows[starts], min_entries=cap + 1)
+
+
+def build_sparse_model(snapshot, symmetry_breaking=False, workload_bound=None):
+    """
+    Build the allocation MIP for a snapshot as arrays.
+
+    Returns a dict with ``indptr``/``indices``/``data`` (CSR rows), ``sense``
+    ('E' or 'L' per row), ``rhs``, ``row_kind`` (constraint family per row),
+    ``col_lower``/``col_upper``/``integer`` per column, ``objective`` and
+    ``cell_index`` mapping each (s, p, t) cell to its column or -1.
+    The last column is the continuous max_workload variable.
+
+    ``symmetry_breaking`` adds the same interchangeable-staff ordering rows
+    as ``build_allocation_model``; ``workload_bound`` likewise becomes the
+    lower bound of an integer max_workload column.
+    """
+    allowed = snapshot["allowed"]
+    rules = snapshot["rules"]
+    n_staff, n_patients, n_slots = allowed.shape
+
+    cell_index = np.full(allowed.shape, -1, dtype=np.int64)
+    n_cells = int(allowed.sum())
+    cell_index[allowed] = np.arange(n_cells)
+    workload_col = n_cells
+
+    blocks = []  # (kind, sense, rhs, counts, indices, data or None)
+
+    # Re-plans (see snapshot.freeze_past) only cover slots from current_slot
+    # and fix the published cells before it
+    current_slot = snapshot.get("current_slot", 0)
+
+    # Observation level coverage: sum over staff == level for each covered patient and slot
+    coverage = cell_index.transpose(1, 2, 0)[snapshot["covered"]][:, current_slot:].reshape(-1, n_staff)
+    counts, indices = _rows_from_index_matrix(coverage, min_entries=0)
+    rhs = np.repeat(snapshot["required"][snapshot["covered"]], n_slots - current_slot)
+    blocks.append(("coverage", "E", rhs, counts, indices, None))
+
+    # One patient per staff member per slot
+    per_slot = cell_index.transpose(0, 2, 1).reshape(-1, n_patients)
+    counts, indices = _rows_from_index_matrix(per_slot, min_entries=2)
+    blocks.append(("staff_slot", "L", np.ones(len(counts)), counts, indices, None))
+
+    # No more than consecutive_cap slots in a row with the same patient:
+    # window (t - 1, ..., t + cap - 1) for each staff, patient and window start t
+    counts, indices = _consecutive_rows(snapshot, cell_index)
+    blocks.append(("consecutive", "L", np.full(len(counts), rules["consecutive_cap"]), counts, indices, None))
+
+    # Short shifts: at most short_break_cap assignments in each window of
+    # short_break_window slots ending at t (for hourly slots: one in (t - 1, t))
+    window, short_cap = rules["short_break_window"], rules["short_break_cap"]
+    by_slot = np.concatenate([np.full((n_staff, window - 1, n_patients), -1, dtype=np.int64),
+                              cell_index.transpose(0, 2, 1)], axis=1)
+    short_windows = np.concatenate([by_slot[:, k:k + n_slots, :] for k in range(window)], axis=2)
+    counts, indices = _rows_from_index_matrix(short_windows[short_break_window_ends(snapshot)],
+                                              min_entries=short_cap + 1)
+    blocks.append(("short_break", "L", np.full(len(counts), short_cap), counts, indices, None))
+
+    # Long shifts: at most break_max_worked slots worked in the break window
+    break_slots, max_worked = rules["break_slots"], rules["break_max_worked"]
+    break_window = cell_index[:, :, break_slots.start:break_slots.stop].reshape(n_staff, -1)
+    counts, indices = _rows_from_index_matrix(break_window[snapshot["long_break"]], min_entries=max_worked + 1)
+    blocks.append(("long_break", "L", np.full(len(counts), max_worked), counts, indices, None))
+
+    # Workload of each assigned staff member - max_workload <= 0
+    # (allowed cells all lie inside the staff member's working hours)
+    totals = cell_index.reshape(n_staff, -1)[snapshot["assigned"]]
+    counts, indices = _rows_from_index_matrix(totals, min_entries=1)
+    counts, indices, data = _append_column(counts, indices, np.full(len(counts), workload_col), -1.0)
+    blocks.append(("workload", "L", np.zeros(len(counts)), counts, indices, data))
+
+    # workload(b) - workload(a) <= 0 for consecutive members of each interchangeable class
+    if symmetry_breaking:
+        sym_counts, sym_indices, sym_data = [], [], []
+        for members in staff_equivalence_classes(snapshot):
+            present = snapshot["allowed"][members[0]]
+            for a, b in zip(members, members[1:]):
+                sym_indices.extend([cell_index[b][present], cell_index[a][present]])
+                sym_data.extend([np.ones(int(present.sum())), -np.ones(int(present.sum()))])
+                sym_counts.append(2 * int(present.sum()))
+        if sym_counts:
+            blocks.append(("symmetry", "L", np.zeros(len(sym_counts)), np.array(sym_counts),
+                           np.concatenate(sym_indices), np.concatenate(sym_data)))
+
+    rows = _assemble_rows(blocks)
+    row_counts, indptr, indices, data = rows["row_counts"], rows["indptr"], rows["indices"], rows["data"]
+    sense, rhs, row_kind = rows["sense"], rows["rhs"], rows["row_kind"]
+
+    col_lower = np.concatenate([np.zeros(n_cells), [workload_bound or 0]])
+    col_upper = np.concatenate([np.ones(n_cells), [np.inf]])
+    if "frozen" in snapshot:
+        col_lower[cell_index[snapshot["frozen"]]] = 1
+        # Rows over frozen cells only record the past; the published allocation already met them
+        free = (col_lower < col_upper)[indices]
+        row_of_entry = np.repeat(np.arange(len(row_counts)), row_counts)
+        keep = (np.bincount(row_of_entry, weights=free, minlength=len(row_counts)) > 0) | (row_counts == 0)
+        entry_keep = np.repeat(keep, row_counts)
+        indptr = np.concatenate([[0], np.cumsum(row_counts[keep])]).astype(np.int64)
+        indices, data = indices[entry_keep], data[entry_keep]
+        sense, rhs, row_kind = sense[keep], rhs[keep], row_kind[keep]
+
+    n_cols = n_cells + 1
+    objective = np.zeros(n_cols)
+    objective[workload_col] = 1.0
+    return {
+        "indptr": indptr,
+        "indices": indices,
+        "data": data,
+        "sense": sense,
+        "rhs": rhs,
+        "row_kind": row_kind,
+        "col_lower": col_lower,
+        "col_upper": col_upper,
+        "integer": np.concatenate([np.ones(n_cells, dtype=bool), [workload_bound is not None]]),
+        "objective": objective,
+        "cell_index": cell_index,
+        "workload_col": workload_col,
+    }
+
+
+def build_aggregated_model(snapshot, workload_bound=None):
+    """
+    Alternative formulation with aggregated "works this slot" variables.
+
+    y[s, t] = sum over patients of x[s, p, t] replaces the per-slot sums:
+    one patient per slot becomes y's binary bound, the short-shift break
+    windows become y[s, t - 1] + y[s, t] <= 1 (for hourly slots) and workload
+    rows sum y. Long shifts get explicit break indicators b[s, t] over the
+    break window, with y[s, t] + b[s, t] <= 1 and at least len(window) -
+    break_max_worked breaks. Coverage and consecutive-hours rows are as
+    in build_sparse_model, and the feasible allocations and optimum are the
+    same.
+
+    Returns the build_sparse_model dict plus ``work_index`` and
+    ``break_index`` ((S, T) column of y and b, or -1); columns are the cells,
+    then y, then b, then max_workload. Re-plans and symmetry breaking are
+    only supported by build_sparse_model.
+    """
+    if "frozen" in snapshot:
+        raise ValueError("Re-plans are only supported by build_sparse_model")
+    allowed = snapshot["allowed"]
+    n_staff, n_patients, n_slots = allowed.shape
+
+    cell_index = np.full(allowed.shape, -1, dtype=np.int64)
+    n_cells = int(allowed.sum())
+    cell_index[allowed] = np.arange(n_cells)
+
+    works = allowed.any(axis=1)
+    work_index = np.full(works.shape, -1, dtype=np.int64)
+    work_index[works] = n_cells + np.arange(int(works.sum()))
+    n_work = int(works.sum())
+
+    rules = snapshot["rules"]
+    window = np.zeros(n_slots, dtype=bool)
+    window[rules["break_slots"].start:rules["break_slots"].stop] = True
+    breaks_needed = len(rules["break_slots"]) - rules["break_max_worked"]
+    # Slots where the staff member cannot work already count as breaks
+    idle = (~works & window[None, :]).sum(axis=1)
+    has_breaks = snapshot["long_break"] & (idle < breaks_needed)
+    takes_break = has_breaks[:, None] & works & window[None, :]
+    break_index = np.full(works.shape, -1, dtype=np.int64)
+    break_index[takes_break] = n_cells + n_work + np.arange(int(takes_break.sum()))
+    workload_col = n_cells + n_work + int(takes_break.sum())
+
+    blocks = []
+
+    # Observation level coverage: sum over staff == level for each covered patient and slot
+    coverage = cell_index.transpose(1, 2, 0)[snapshot["covered"]].reshape(-1, n_staff)
+    counts, indices = _rows_from_index_matrix(coverage, min_entries=0)
+    blocks.append(("coverage", "E", np.repeat(snapshot["required"][snapshot["covered"]], n_slots),
+                   counts, indices, None))
+
+    # sum over patients of x[s, p, t] - y[s, t] == 0
+    per_slot = cell_index.transpose(0, 2, 1)[works]
+    counts, indices = _rows_from_index_matrix(per_slot, min_entries=1)
+    counts, indices, data = _append_column(counts, indices, work_index[works], -1.0)
+    blocks.append(("works", "E", np.zeros(len(counts)), counts, indices, data))
+
+    # No more than consecutive_cap slots in a row with the same patient
+    counts, indices = _consecutive_rows(snapshot, cell_index)
+    blocks.append(("consecutive", "L", np.full(len(counts), rules["consecutive_cap"]), counts, indices, None))
+
+    # Short shifts: sum of y over each short-break window ending at t <= short_break_cap
+    # (for hourly slots y[s, t - 1] + y[s, t] <= 1)
+    window_length, short_cap = rules["short_break_window"], rules["short_break_cap"]
+    padded = np.concatenate([np.full((n_staff, window_length - 1), -1, dtype=np.int64), work_index], axis=1)
+    short_windows = np.stack([padded[:, k:k + n_slots] for k in range(window_length)], axis=-1)
+    counts, indices = _rows_from_index_matrix(short_windows[short_break_window_ends(snapshot)],
+                                              min_entries=short_cap + 1)
+    blocks.append(("short_break", "L", np.full(len(counts), short_cap), counts, indices, None))
+
+    # Long shifts: y[s, t] + b[s, t] <= 1 and enough breaks in the window
+    counts, indices = _rows_from_index_matrix(np.stack([work_index[takes_break], break_index[takes_break]],
+                                                       axis=-1), min_entries=2)
+    blocks.append(("long_break", "L", np.ones(len(counts)), counts, indices, None))
+    counts, indices = _rows_from_index_matrix(break_index[has_breaks], min_entries=1)
+    blocks.append(("break_count", "L", -(breaks_needed - idle[has_breaks]).astype(float), counts, indices,
+                   -np.ones(len(indices))))
+
+    # sum over slots of y[s, t] - max_workload <= 0 for each assigned staff member
+    counts, indices = _rows_from_index_matrix(work_index[snapshot["assigned"]], min_entries=1)
+    counts, indices, data = _append_column(counts, indices, np.full(len(counts), workload_col), -1.0)
+    blocks.append(("workload", "L", np.zeros(len(counts)), counts, indices, data))
+
+    rows = _assemble_rows(blocks)
+    n_binary = workload_col
+    objective = np.zeros(n_binary + 1)
+    objective[workload_col] = 1.0
+    return {
+        "indptr": rows["indptr"],
+        "indices": rows["indices"],
+        "data": rows["data"],
+        "sense": rows["sense"],
+        "rhs": rows["rhs"],
+        "row_kind": rows["row_kind"],
+        "col_lower": np.concatenate([np.zeros(n_binary), [workload_bound or 0]]),
+        "col_upper": np.concatenate([np.ones(n_binary), [np.inf]]),
+        "integer": np.concatenate([np.ones(n_binary, dtype=bool), [workload_bound is not None]]),
+        "objective": objective,
+        "cell_index": cell_index,
+        "work_index": work_index,
+        "break_index": break_index,
+        "workload_col": workload_col,
+    }
+
+
+def append_rows(model, kind, sense, rows):
+    """
+    Copy of the sparse model with extra rows of one kind: ``rows`` is a list
+    of (columns, coefficients, rhs) with ``sense`` "L" or "E".
+    """
+    extended = dict(model)
+    counts = [len(columns) for columns, _, _ in rows]
+    extended["indptr"] = np.concatenate([model["indptr"], model["indptr"][-1] + np.cumsum(counts)]).astype(np.int64)
+    extended["indices"] = np.concatenate([model["indices"]] + [columns for columns, _, _ in rows]).astype(np.int64)
+    extended["data"] = np.concatenate([model["data"]] + [np.broadcast_to(data, len(columns)).astype(float)
+                                                         for columns, data, _ in rows])
+    extended["sense"] = np.append(model["sense"], [sense] * len(rows))
+    extended["rhs"] = np.append(model["rhs"], [rhs for _, _, rhs in rows]).astype(float)
+    extended["row_kind"] = np.append(model["row_kind"], np.full(len(rows), kind, dtype=object))
+    return extended
+
+
+def _mps_line(field_1, name, entry=None, value=None):
+    # Fixed-format MPS fields: 2-3, 5-12, 15-22, 25-36 (as written by PuLP)
+    line = f" {field_1:<2} {name:<8}"
+    if entry is not None:
+        line += f"  {entry:<8}"
+    if value is not None:
+        line += f"  {value:.12e}"
+    return line.rstrip()
+
+
+def write_mps(model, path):
+    '''Write a sparse model to a fixed-format MPS file (rows R<i>, columns C<j>).'''
+    indptr, indices, data = model["indptr"], model["indices"], model["data"]
+    n_rows, n_cols = len(model["rhs"]), len(model["objective"])
+
+    # Column-major order for the COLUMNS section
+    row_of_entry = np.repeat(np.arange(n_rows), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    row_sorted, data_sorted = row_of_entry[order], data[order]
+    col_ptr = np.searchsorted(indices[order], np.arange(n_cols + 1))
+
+    lines = ["NAME          ALLOCATION", "ROWS", " N  OBJ"]
+    lines.extend(f" {s}  R{i}" for i, s in enumerate(model["sense"]))
+    lines.append("COLUMNS")
+    in_integer_block = False
+    for j in range(n_cols):
+        if model["integer"][j] != in_integer_block:
+            marker = "INTORG" if model["integer"][j] else "INTEND"
+            lines.append(f"    MARK      'MARKER'                 '{marker}'")
+            in_integer_block = bool(model["integer"][j])
+        column = f"C{j}"
+        # Columns must appear in COLUMNS even when they have no coefficients
+        if model["objective"][j] or col_ptr[j] == col_ptr[j + 1]:
+            lines.append(_mps_line("", column, "OBJ", model["objective"][j]))
+        for k in range(col_ptr[j], col_ptr[j + 1]):
+            lines.append(_mps_line("", column, f"R{row_sorted[k]}", data_sorted[k]))
+    if in_integer_block:
+        lines.append("    MARK      'MARKER'                 'INTEND'")
+    lines.append("RHS")
+    lines.extend(_mps_line("", "RHS", f"R{i}", value) for i, value in enumerate(model["rhs"]) if value)
+    lines.append("BOUNDS")
+    for j in range(n_cols):
+        lower, upper, column = model["col_lower"][j], model["col_upper"][j], f"C{j}"
+        if model["integer"][j] and lower == 0 and upper == 1:
+            lines.append(_mps_line("BV", "BND", column))
+            continue
+        if lower != 0:
+            lines.append(_mps_line("LO", "BND", column, lower))
+        if np.isinf(upper):
+            lines.append(_mps_line("PL", "BND", column))
+        else:
+            lines.append(_mps_line("UP", "BND", column, upper))
+    lines.append("ENDATA")
+    with open(path, "w") as file:
+        file.write("\n".join(lines) + "\n")
+
+
+def solve_sparse_model(snapshot, model=None, options=(), log_path=None, initial=None):
+    """
+    Build (unless given), write and solve the sparse model with CBC.
+    ``initial`` is an optional feasible (S, P, T) allocation passed to CBC as
+    a MIP start.
+
+    Returns (status, objective, x) where x is the (S, P, T) 0/1 allocation
+    array, or None when CBC found no solution.
+    """
+    if model is None:
+        model = build_sparse_model(snapshot)
+    with tempfile.TemporaryDirectory() as tmp:
+        mps_path = os.path.join(tmp, "allocation.mps")
+        solution_path = os.path.join(tmp, "allocation.sol")
+        write_mps(model, mps_path)
+        mip_start_path = None
+        if initial is not None:
+            mip_start_path = os.path.join(tmp, "allocation.mst")
+            write_mip_start(mip_start_path, mip_start_values(model, initial))
+        run_cbc(mps_path, solution_path, log_path=log_path, options=options, mip_start_path=mip_start_path)
+        if not os.path.exists(solution_path):
+            return "Not Solved", None, None
+        status, objective, values = read_solution(solution_path)
+    return status, objective, solution_to_array(model, values) if values else None
+
+
+def column_values(model, x):
+    '''Value of every model column for allocation x, including aggregated variables and max_workload.'''
+    x = np.asarray(x)
+    cell_index = model["cell_index"]
+    present = cell_index >= 0
+    columns = np.zeros(len(model["objective"]))
+    columns[cell_index[present]] = x[present]
+    if "work_index" in model:
+        busy = x.sum(axis=1)
+        works = model["work_index"] >= 0
+        columns[model["work_index"][works]] = busy[works]
+        breaks = model["break_index"] >= 0
+        columns[model["break_index"][breaks]] = 1 - busy[breaks]
+    if "staff_index" in model:
+        # Availability switch of each optional staff member: on when they work at all
+        optional = model["staff_index"] >= 0
+        columns[model["staff_index"][optional]] = x.any(axis=(1, 2))[optional]
+    columns[model["workload_col"]] = max(x.sum(axis=(1, 2)).max(initial=0),
+                                         model["col_lower"][model["workload_col"]])
+    if "group_index" in model:
+        # Largest workload summed over each staff member's rows, plus the hours they carry in
+        totals = np.bincount(model["group_index"], weights=x.sum(axis=(1, 2)), minlength=len(model["carried"]))
+        columns[model["cumulative_col"]] = (totals + model["carried"]).max(initial=0)
+    return columns
+
+
+def mip_start_values(model, x):
+    '''Column values (by MPS column name) of allocation x, including its max_workload.'''
+    return {f"C{j}": float(value) for j, value in enumerate(column_values(model, x))}
+
+
+def solution_columns(model, values):
+    '''Array of every column's solved value from CBC's values by MPS column name (rows are skipped).'''
+    columns = np.zeros(len(model["objective"]))
+    for name, value in values.items():
+        if name.startswith("C"):
+            columns[int(name[1:])] = value
+    return columns
+
+
+def solution_to_array(model, values):
+    '''Map solved column values (by MPS column name) back onto the (S, P, T) cell grid.'''
+    cell_index = model["cell_index"]
+    columns = solution_columns(model, values)
+    x = np.zeros(cell_index.shape, dtype=np.int8)
+    present = cell_index >= 0
+    x[present] = columns[cell_index[present]] > 0.5
+    return x
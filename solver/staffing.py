@@ -0,0 +1,175 @@
+# staffing.py
+
+"""
+Minimum extra staff that make a ward feasible for its observation mix.
+
+The ward is extended once with candidate bank staff: ``max_extra`` copies of
+each (hours pattern, gender) kind. The search then narrows the count from
+both sides, cheapest check first:
+
+1. the capacity pre-check: with every candidate working, can the staff
+   supply the required staff-slots at all (otherwise no count will do);
+2. the capacity bound: the fewest candidates that close the gap in
+   staff-slots over the shift, at each slot and in the 12h break window,
+   which no allocation can beat;
+3. the constructive heuristic on the same snapshot with all but the first n
+   candidates switched off, for n from the bound up, giving a count that
+   works and an allocation for it;
+4. when that count is above the bound, one MIP over the extended sparse
+   model with a 0/1 availability column per candidate, started from the
+   heuristic's allocation, which minimises the count (then max_workload).
+
+Switching candidates off only masks their rows of the snapshot, so neither
+the snapshot nor the model is rebuilt per count.
+"""
+
+import numpy as np
+
+from .bounds import required_staff_slots, staff_capacity, workload_lower_bound
+from .heuristic import solve_heuristic
+from .scenarios import apply_scenario
+from .snapshot import build_snapshot
+from .sparse_model import append_rows, build_sparse_model, solve_sparse_model
+from .validator import max_workload
+
+
+def candidate_changes(patterns=((0, 12),), genders=("F", "M"), max_extra=3):
+    '''add_staff scenario changes for max_extra candidates of each (pattern, gender), interleaved by copy.'''
+    changes = []
+    for copy in range(1, max_extra + 1):
+        for start_time, end_time in patterns:
+            for gender in genders:
+                changes.append({"kind": "add_staff", "staff": {
+                    "name": f"Bank {gender} {copy}, slots {start_time}-{end_time}", "gender": gender,
+                    "start_time": start_time, "end_time": end_time}})
+    return changes
+
+
+def with_candidates(snapshot, n_base, on):
+    '''Snapshot with the candidates (staff rows from n_base on) outside ``on`` switched off.'''
+    off = np.concatenate([np.zeros(n_base, dtype=bool), ~np.asarray(on, dtype=bool)])
+    masked = {key: snapshot[key].copy() for key in ("allowed", "assigned", "on_shift", "available")}
+    masked["allowed"][off] = False
+    for key in ("assigned", "on_shift", "available"):
+        masked[key][off] = False
+    return {**snapshot, **masked}
+
+
+def _fewest(base_supply, candidate_supply, demand):
+    # Fewest candidates, largest supply first, that close the gap; None if all of them do not
+    shortfall = demand - base_supply
+    if shortfall <= 0:
+        return 0
+    enough = np.flatnonzero(np.cumsum(np.sort(candidate_supply)[::-1]) >= shortfall)
+    return int(enough[0]) + 1 if len(enough) else None
+
+
+def capacity_bound(snapshot, n_base):
+    """
+    Fewest candidates the staff need to supply the demand, or None if all of
+    them are not enough. Takes the largest of three counts, each a relaxation
+    of the allocation rules: staff-slots over the shift (staff_capacity),
+    staff free at each slot, and staff-slots in the long-shift break window.
+    """
+    demand = int(snapshot["required"][snapshot["covered"]].sum())
+    break_slots = snapshot["rules"]["break_slots"]
+    workable = snapshot["allowed"].any(axis=1)
+    window = workable[:, break_slots.start:break_slots.stop].sum(axis=1)
+    window = np.where(snapshot["long_break"], np.minimum(window, snapshot["rules"]["break_max_worked"]), window)
+    capacity = staff_capacity(snapshot)
+    counts = [_fewest(capacity[:n_base].sum(), capacity[n_base:], required_staff_slots(snapshot)),
+              _fewest(window[:n_base].sum(), window[n_base:], demand * len(break_slots))]
+    counts += [_fewest(workable[:n_base, t].sum(), workable[n_base:, t], demand) for t in range(snapshot["n_slots"])]
+    return None if None in counts else max(counts)
+
+
+def _availability_model(snapshot, n_base, lower_bound):
+    """
+    Sparse model of the extended snapshot with an availability column u[k]
+    per candidate after max_workload: sum over patients of x[k, p, t] <= u[k]
+    at every slot, u in order within each kind, sum(u) >= lower_bound. The
+    objective counts each candidate as one more than the largest workload.
+    """
+    model = build_sparse_model(snapshot)
+    n_staff, _, n_slots = snapshot["allowed"].shape
+    n_candidates = n_staff - n_base
+    first = len(model["objective"])
+    staff_index = np.full(n_staff, -1, dtype=np.int64)
+    staff_index[n_base:] = first + np.arange(n_candidates)
+
+    model["objective"] = np.concatenate([model["objective"], np.full(n_candidates, n_slots + 1.0)])
+    model["col_lower"] = np.concatenate([model["col_lower"], np.zeros(n_candidates)])
+    model["col_upper"] = np.concatenate([model["col_upper"], np.ones(n_candidates)])
+    model["integer"] = np.concatenate([model["integer"], np.ones(n_candidates, dtype=bool)])
+    model["staff_index"] = staff_index
+
+    cell_index = model["cell_index"]
+    links = []
+    for k in range(n_base, n_staff):
+        for t in range(n_slots):
+            cells = cell_index[k, :, t][cell_index[k, :, t] >= 0]
+            if len(cells):
+                links.append((np.append(cells, staff_index[k]), np.append(np.ones(len(cells)), -1.0), 0))
+    model = append_rows(model, "availability", "L", links)
+
+    # Candidates of one kind are interchangeable: use them in order
+    kinds = {}
+    for k in range(n_base, n_staff):
+        kinds.setdefault((snapshot["start"][k], snapshot["end"][k], snapshot["staff"][k]["gender"]), []).append(k)
+    order = [(np.array([staff_index[b], staff_index[a]]), np.array([1.0, -1.0]), 0)
+             for members in kinds.values() for a, b in zip(members, members[1:])]
+    if order:
+        model = append_rows(model, "symmetry", "L", order)
+    return append_rows(model, "staff_count", "L", [(staff_index[n_base:], -1.0, -lower_bound)])
+
+
+def minimum_staffing(staff, observations, patterns=((0, 12),), genders=("F", "M"), max_extra=3, options=(),
+                     restarts=20, seed=0):
+    """
+    Fewest extra staff, drawn from ``max_extra`` candidates of each hours
+    pattern (start_time, end_time) and gender, that make the ward feasible.
+
+    Returns a dict with ``status`` ("Optimal", "Feasible" when the MIP was
+    stopped early, or "Infeasible" when even every candidate is not enough),
+    ``extra`` (the count, or None), ``added`` (the new staff rows),
+    ``lower_bound`` (the capacity bound), ``max_workload``, ``x`` (the
+    allocation over staff + added) and ``method`` ("bound", "heuristic" or
+    "MIP": what found the count).
+    """
+    n_base = len(staff)
+    extended_staff, _ = apply_scenario(staff, observations,
+                                       {"name": "candidates", "changes": candidate_changes(patterns, genders,
+                                                                                           max_extra)})
+    snapshot = build_snapshot(extended_staff, observations)
+    n_candidates = len(extended_staff) - n_base
+    result = {"status": "Infeasible", "extra": None, "added": [], "lower_bound": None, "max_workload": None,
+              "x": None, "method": "bound"}
+
+    lower_bound = capacity_bound(snapshot, n_base)
+    if lower_bound is None or workload_lower_bound(snapshot) is None:
+        return result
+    result["lower_bound"] = lower_bound
+
+    def found(status, used, x, method):
+        keep = np.concatenate([np.arange(n_base), n_base + np.flatnonzero(used)])
+        result.update(status=status, extra=int(np.sum(used)), added=[extended_staff[k] for k in keep[n_base:]],
+                      max_workload=max_workload({"assigned": snapshot["assigned"][keep]}, x[keep]),
+                      x=x[keep], method=method)
+        return result
+
+    # Heuristic ladder: the first n candidates in interleaved order
+    start = None
+    for n in range(lower_bound, n_candidates + 1):
+        on = np.arange(n_candidates) < n
+        x = solve_heuristic(with_candidates(snapshot, n_base, on), restarts=restarts, seed=seed)
+        if x is not None:
+            if n == lower_bound:
+                return found("Optimal", on, x, "heuristic")
+            start = x
+            break
+
+    status, _, x = solve_sparse_model(snapshot, _availability_model(snapshot, n_base, lower_bound),
+                                      options=options, initial=start)
+    if x is None or status == "Infeasible":
+        return result
+    return found("Optimal" if status == "Optimal" else "Feasible", x[n_base:].any(axis=(1, 2)), x, "MIP")
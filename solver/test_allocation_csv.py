@@ -0,0 +1,68 @@
+import codecs
+import io
+
+import numpy as np
+import streamlit as st
+
+from solver.allocation_csv import name_index, read_allocation_csv, violation_grids
+from solver.benchmarks import make_benchmark_ward
+from solver.heuristic import solve_heuristic
+from solver.milo_results import print_results
+from solver.snapshot import assignments_from_array, build_snapshot
+from solver.validator import rule_masks
+
+
+def _downloads(snapshot, x, monkeypatch, directory):
+    # The Table 1 and Table 2 files print_results hands to its download buttons
+    offered = {}
+
+    def download_button(label, data, file_name, mime):
+        offered[file_name] = data.read()
+    monkeypatch.setattr(st, "download_button", download_button)
+    monkeypatch.chdir(directory)
+    print_results(snapshot["staff"], snapshot["observations"], assignments_from_array(snapshot, x), "D")
+    return {"patients": offered["table1.csv"].decode(), "staff": offered["table2.csv"].decode()}
+
+
+def _ward():
+    staff, observations = make_benchmark_ward(8, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    return snapshot, solve_heuristic(snapshot)
+
+
+def test_both_tables_round_trip(monkeypatch, tmp_path):
+    snapshot, x = _ward()
+    for table, text in _downloads(snapshot, x, monkeypatch, tmp_path).items():
+        y, read_table, problems = read_allocation_csv(io.StringIO(text), snapshot)
+        assert (read_table, problems) == (table, [])
+        assert np.array_equal(y, x)
+
+
+def test_streams_uploaded_bytes(monkeypatch, tmp_path):
+    snapshot, x = _ward()
+    upload = io.BytesIO(_downloads(snapshot, x, monkeypatch, tmp_path)["staff"].encode("utf-8-sig"))
+    y, _, _ = read_allocation_csv(codecs.iterdecode(upload, "utf-8-sig"), snapshot)
+    assert np.array_equal(y, x)
+
+
+def test_unknown_names_are_reported_and_skipped(monkeypatch, tmp_path):
+    snapshot, x = _ward()
+    text = _downloads(snapshot, x, monkeypatch, tmp_path)["staff"].replace("OFF", "Nobody", 1)
+    y, _, problems = read_allocation_csv(io.StringIO(text), snapshot)
+    assert problems == ["Patient 'Nobody' is not on the ward"]
+    assert np.array_equal(y, x)
+
+
+def test_duplicate_names_are_ambiguous():
+    assert name_index(["A", "B", "A"]) == {"A": None, "B": 1}
+
+
+def test_edited_cell_is_highlighted():
+    snapshot, x = _ward()
+    i, j, t = (int(k[0]) for k in np.nonzero(x))
+    y = x.copy()
+    y[i, j, t] = 0
+    grids = violation_grids(snapshot, rule_masks(snapshot, y))
+    assert grids["patients"].shape == (12, x.shape[1]) and grids["staff"].shape == (12, x.shape[0])
+    assert np.argwhere(grids["patients"]).tolist() == [[t, j]]
+    assert not grids["staff"].any()
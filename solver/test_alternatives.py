@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from solver.alternatives import add_no_good_cut, solve_alternatives
+from solver.benchmarks import make_benchmark_ward
+from solver.decomposition import solve_decomposed
+from solver.snapshot import build_snapshot
+from solver.sparse_model import build_sparse_model, solve_sparse_model
+from solver.validator import find_violations, max_workload
+
+
+@pytest.mark.parametrize("attempts", [50, 0])
+def test_alternatives_are_distinct_valid_and_optimal(attempts):
+    staff, observations = make_benchmark_ward(8, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    _, objective, x, _ = solve_decomposed(snapshot)
+    pool = solve_alternatives(snapshot, x, k=4, attempts=attempts, min_difference=2)
+    assert len(pool) == 4 and np.array_equal(pool[0], x)
+    for k, y in enumerate(pool):
+        assert find_violations(snapshot, y) == []
+        assert max_workload(snapshot, y) == objective
+        for earlier in pool[:k]:
+            assert ((earlier > 0) & (y == 0)).sum() >= 2
+
+
+def test_no_good_cut_excludes_the_allocation():
+    staff, observations = make_benchmark_ward(6, seed=0)
+    snapshot = build_snapshot(staff, observations)
+    model = build_sparse_model(snapshot)
+    _, objective, x = solve_sparse_model(snapshot, model)
+    cut = add_no_good_cut(model, x)
+    assert len(cut["rhs"]) == len(model["rhs"]) + 1 and cut["row_kind"][-1] == "no_good"
+    _, cut_objective, y = solve_sparse_model(snapshot, cut)
+    assert cut_objective >= objective and not np.array_equal(x, y)
+
+
+def test_pool_stops_when_no_alternative_is_left():
+    staff = [{"id": 1, "name": "S1", "gender": "M", "assigned": True, "start_time": 0, "end_time": 2,
+              "duration": 2, "omit_time": [], "special_list": []}]
+    observations = [{"id": 10, "name": "P1", "observation_level": "0", "gender_req": None, "omit_staff": []}]
+    snapshot = build_snapshot(staff, observations)
+    x = np.zeros(snapshot["allowed"].shape, dtype=np.int8)
+    assert len(solve_alternatives(snapshot, x, k=3)) == 1
@@ -0,0 +1,56 @@
+import math
+
+import pulp
+import pytest
+
+from solver.benchmarks import make_benchmark_ward
+from solver.bounds import staff_capacity, workload_lower_bound, required_staff_slots
+from solver.milo_model import build_allocation_model
+from solver.snapshot import build_snapshot
+
+
+def staff_member(i, start_time=0, end_time=12, **overrides):
+    row = {"id": i, "name": f"S{i}", "gender": "F", "assigned": True, "start_time": start_time,
+           "end_time": end_time, "duration": end_time - start_time, "omit_time": [], "special_list": []}
+    row.update(overrides)
+    return row
+
+
+def test_staff_capacity_follows_break_rules():
+    staff = [staff_member(1), staff_member(2, 0, 8), staff_member(3, assigned=False),
+             staff_member(4, omit_time=[0, 1])]
+    observations = [{"id": 10, "name": "P1", "observation_level": "2", "gender_req": None, "omit_staff": []}]
+    capacity = staff_capacity(build_snapshot(staff, observations))
+    # 12h: 5 slots before the break window + 5 of 7 inside it
+    # 8h: slots 0-1 freely, then no two in a row over slots 2-7 (3 of 6)
+    assert capacity.tolist() == [10, 5, 0, 8]
+
+
+def test_bound_is_average_rounded_up_when_capacity_is_ample():
+    staff = [staff_member(i) for i in range(1, 6)]
+    observations = [{"id": 10, "name": "P1", "observation_level": "3", "gender_req": None, "omit_staff": []}]
+    snapshot = build_snapshot(staff, observations)
+    assert required_staff_slots(snapshot) == 36
+    assert workload_lower_bound(snapshot) == math.ceil(36 / 5)
+
+
+def test_bound_is_none_when_demand_exceeds_capacity():
+    staff = [staff_member(1), staff_member(2)]
+    observations = [{"id": 10, "name": "P1", "observation_level": "2", "gender_req": None, "omit_staff": []}]
+    assert workload_lower_bound(build_snapshot(staff, observations)) is None
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_bound_never_exceeds_optimum_and_keeps_it(seed):
+    staff, observations = make_benchmark_ward(5, seed=seed, restriction_share=0.3)
+    bound = workload_lower_bound(build_snapshot(staff, observations))
+    objectives = []
+    for workload_bound in (None, bound):
+        problem, _ = build_allocation_model(staff, observations, workload_bound=workload_bound)
+        problem.solve(pulp.PULP_CBC_CMD(msg=False))
+        if pulp.LpStatus[problem.status] != "Optimal":
+            assert workload_bound is None
+            return
+        objectives.append(pulp.value(problem.objective))
+        assert bound is not None and bound <= objectives[0]
+    assert objectives[0] == objectives[1]
@@ -0,0 +1,71 @@
+from solver.benchmarks import make_benchmark_ward
+from solver.bounds import workload_lower_bound
+from solver.budget import DEFAULT_BUDGET, solve_budget, cbc_options, pulp_options, assess_result
+from solver.cbc import read_log_summary
+from solver.snapshot import build_snapshot
+from solver.sparse_model import build_sparse_model, solve_sparse_model
+from solver.validator import max_workload
+
+TIME_LIMIT_LOG = """Cbc0012I Integer solution of 9 found by Reduced search after 0 iterations and 0 nodes (9.52 seconds)
+
+Result - Stopped on time limit
+
+Objective value:                9.00000000
+Lower bound:                    7.384
+Gap:                            0.22
+Enumerated nodes:               0
+"""
+
+
+def test_ward_budget_overrides_default():
+    budgets = {"default": {"time_limit": 120}, "ward_a": {"gap": 0.05, "threads": 4}}
+    assert solve_budget("ward_a", budgets) == {"time_limit": 120, "gap": 0.05, "threads": 4}
+    assert solve_budget("ward_b", budgets) == {**DEFAULT_BUDGET, "time_limit": 120}
+    assert solve_budget(None) == DEFAULT_BUDGET
+
+
+def test_budget_options():
+    budget = {"time_limit": 30, "gap": 0.1, "threads": 2}
+    assert cbc_options(budget) == ["sec", "30", "ratio", "0.1", "threads", "2", "timeMode", "elapsed"]
+    assert pulp_options(budget) == {"timeLimit": 30, "gapRel": 0.1, "threads": 2}
+    assert cbc_options({"time_limit": 0, "gap": 0, "threads": 0}) == []
+
+
+def test_time_limited_result_reports_gap(tmp_path):
+    log = tmp_path / "log.txt"
+    log.write_text(TIME_LIMIT_LOG)
+    summary = read_log_summary(log)
+    assert summary == {"result": "Stopped on time limit", "objective": 9.0, "bound": 7.384, "gap": 0.22}
+    quality = assess_result(9, summary, DEFAULT_BUDGET)
+    assert not quality["proven"] and quality["gap"] == 1 / 9
+    # The analytic bound can close the gap CBC left open
+    assert assess_result(9, summary, DEFAULT_BUDGET, workload_bound=9)["proven"]
+
+
+def test_gap_tolerance_is_not_reported_as_proven():
+    summary = {"result": "Optimal solution found", "objective": 9.0, "bound": None, "gap": None}
+    assert assess_result(9, summary, DEFAULT_BUDGET)["proven"]
+    assert assess_result(9, summary, {**DEFAULT_BUDGET, "gap": 0.1}) == {"proven": False, "gap": 0.1}
+
+
+def test_budgeted_sparse_solve_is_assessed(tmp_path):
+    staff, observations = make_benchmark_ward(8, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    budget = {"time_limit": 30, "gap": 0.0, "threads": 1}
+    log = tmp_path / "log.txt"
+    status, _, x = solve_sparse_model(snapshot, build_sparse_model(snapshot), options=cbc_options(budget),
+                                      log_path=str(log))
+    assert status == "Optimal"
+    quality = assess_result(max_workload(snapshot, x), read_log_summary(log), budget)
+    assert quality == {"proven": True, "gap": 0.0}
+    assert max_workload(snapshot, x) == workload_lower_bound(snapshot)
+
+
+def test_tuned_parameters_reach_cbc_and_pulp():
+    budgets = {"default": {"parameters": {"presolve": "more", "strategy": 2}},
+               "ward_a": {"threads": 2, "parameters": {"strategy": 1}}}
+    budget = solve_budget("ward_a", budgets)
+    assert budget == {**DEFAULT_BUDGET, "threads": 2, "parameters": {"presolve": "more", "strategy": 1}}
+    assert cbc_options(budget) == ["sec", "60", "threads", "2", "presolve", "more", "strategy", "1",
+                                   "timeMode", "elapsed"]
+    assert pulp_options(budget)["options"] == ["presolve more", "strategy 1"]
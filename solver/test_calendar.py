@@ -0,0 +1,126 @@
+import random
+import time
+
+import numpy as np
+import pulp
+import pytest
+
+from solver.benchmarks import make_benchmark_ward
+from solver.bounds import staff_capacity, workload_lower_bound
+from solver.decomposition import solve_decomposed
+from solver.heuristic import solve_heuristic
+from solver.incremental import AllocationChecker
+from solver.milo_model import build_allocation_model
+from solver.snapshot import build_snapshot, slot_rules
+from solver.sparse_model import build_sparse_model, solve_sparse_model
+from solver.validator import find_violations, is_valid, max_workload, rule_masks
+from utils.shift_calendar import HOURLY, ShiftCalendar
+from utils.time_utils import ALL_HOURS, TIME_CONVERTER, hour_str_to_index
+
+HALF_HOURLY = ShiftCalendar(slot_minutes=30)
+
+
+def staff_member(i, start_time=0, end_time=24, **overrides):
+    row = {"id": i, "name": f"S{i}", "gender": "F", "assigned": True, "start_time": start_time,
+           "end_time": end_time, "duration": end_time - start_time, "omit_time": [], "special_list": []}
+    row.update(overrides)
+    return row
+
+
+def patient(i, level="1"):
+    return {"id": 100 + i, "name": f"P{i}", "observation_level": level, "gender_req": None, "omit_staff": []}
+
+
+def test_hourly_calendar_keeps_the_hour_tables():
+    assert HOURLY.n_slots == 12
+    assert ALL_HOURS[:2] == ["08:00", "09:00"] and ALL_HOURS[-1] == "07:00"
+    assert TIME_CONVERTER["20:00"] == 0 and TIME_CONVERTER["19:00"] == 11
+    assert slot_rules(HOURLY) == {"consecutive_cap": 2, "short_break_window": 2, "short_break_cap": 1,
+                                  "short_break_from": 3, "break_slots": range(5, 12), "break_max_worked": 5,
+                                  "long_shift_slots": 12}
+
+
+def test_finer_calendars_label_and_scale_slots():
+    assert HALF_HOURLY.n_slots == 24
+    assert HALF_HOURLY.label(1) == "08:30" and HALF_HOURLY.label(23, "night") == "07:30"
+    assert hour_str_to_index("20:30", HALF_HOURLY) == 1 and hour_str_to_index("20:30") is None
+    quarter = ShiftCalendar(slot_minutes=15, shift_hours=8, day_start="07:00")
+    assert quarter.n_slots == 32 and quarter.labels["day"][-1] == "14:45"
+    assert slot_rules(HALF_HOURLY) == {"consecutive_cap": 4, "short_break_window": 4, "short_break_cap": 2,
+                                       "short_break_from": 7, "break_slots": range(10, 24),
+                                       "break_max_worked": 10, "long_shift_slots": 24}
+    with pytest.raises(ValueError):
+        ShiftCalendar(slot_minutes=25)
+
+
+def broken_rules(snapshot, x):
+    return [rule for rule, mask in rule_masks(snapshot, x).items() if rule != "coverage" and mask.any()]
+
+
+def test_rules_apply_in_hours_at_half_hour_slots():
+    staff = [staff_member(1), staff_member(2, 0, 16)]
+    snapshot = build_snapshot(staff, [patient(1)], HALF_HOURLY)
+    x = np.zeros(snapshot["allowed"].shape, dtype=np.int8)
+    # Two hours (four slots) in a row with one patient is allowed, five slots is not
+    x[0, 0, 0:4] = 1
+    assert not broken_rules(snapshot, x)
+    x[0, 0, 4] = 1
+    assert broken_rules(snapshot, x) == ["consecutive"]
+    # 8h shift: at most one hour in every two from the first window (slots 4-7) on
+    x = np.zeros(snapshot["allowed"].shape, dtype=np.int8)
+    x[1, 0, 4:6] = 1
+    assert not broken_rules(snapshot, x)
+    x[1, 0, 7] = 1
+    assert broken_rules(snapshot, x) == ["short_break"]
+    # 12h shift: 5 slots before the break window + 10 of 14 inside it; 8h: 4 slots freely, then 2 of every 4
+    assert staff_capacity(snapshot).tolist() == [20, 10]
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_half_hour_ward_solves_to_a_valid_allocation(seed):
+    staff, observations = make_benchmark_ward(4, seed=seed, slots_per_hour=2)
+    snapshot = build_snapshot(staff, observations, HALF_HOURLY)
+    bound = workload_lower_bound(snapshot)
+    x = solve_heuristic(snapshot)
+    assert x is not None and is_valid(snapshot, x)
+    status, objective, y = solve_sparse_model(snapshot, build_sparse_model(snapshot, workload_bound=bound),
+                                              initial=x)
+    assert status == "Optimal" and is_valid(snapshot, y)
+    assert bound <= objective == max_workload(snapshot, y) <= max_workload(snapshot, x)
+    _, decomposed_objective, z, _ = solve_decomposed(snapshot, workload_bound=bound)
+    assert is_valid(snapshot, z) and decomposed_objective == objective
+
+
+def test_incremental_checker_matches_validator_at_half_hour_slots():
+    staff, observations = make_benchmark_ward(8, seed=1, restriction_share=0.3, slots_per_hour=2)
+    snapshot = build_snapshot(staff, observations, HALF_HOURLY)
+    checker = AllocationChecker(snapshot, solve_heuristic(snapshot))
+    assert checker.valid
+    rng = random.Random(1)
+    n_staff, n_patients, n_slots = checker.x.shape
+    for _ in range(300):
+        checker.assign(rng.randrange(n_staff), rng.randrange(n_slots), rng.choice([None] + list(range(n_patients))))
+        masks = rule_masks(snapshot, checker.x)
+        assert checker.violated == {rule: {tuple(int(k) for k in key) for key in zip(*np.nonzero(mask))}
+                                    for rule, mask in masks.items()}
+    assert checker.messages() == find_violations(snapshot, checker.x)
+
+
+@pytest.mark.parametrize("seed", [0, 3])
+def test_pulp_model_matches_sparse_model_at_half_hour_slots(seed):
+    staff, observations = make_benchmark_ward(3, seed=seed, slots_per_hour=2)
+    snapshot = build_snapshot(staff, observations, HALF_HOURLY)
+    problem, _ = build_allocation_model(staff, observations, calendar=HALF_HOURLY)
+    problem.solve(pulp.PULP_CBC_CMD(msg=False))
+    status, objective, _ = solve_sparse_model(snapshot)
+    assert pulp.LpStatus[problem.status] == status == "Optimal"
+    assert pulp.value(problem.objective) == pytest.approx(objective)
+
+
+def test_sparse_model_builds_quickly_at_quarter_hour_slots():
+    calendar = ShiftCalendar(slot_minutes=15)
+    staff, observations = make_benchmark_ward(50, slots_per_hour=calendar.slots_per_hour)
+    started = time.perf_counter()
+    model = build_sparse_model(build_snapshot(staff, observations, calendar))
+    assert time.perf_counter() - started < 5
+    assert model["cell_index"].shape[2] == 48
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from solver import decomposition
+from solver.benchmarks import make_benchmark_ward
+from solver.decomposition import assign_slots, build_break_model, solve_decomposed
+from solver.snapshot import build_snapshot, freeze_past
+from solver.sparse_model import solve_sparse_model
+from solver.validator import find_violations, max_workload
+
+
+@pytest.mark.parametrize("n_patients,seed", [(6, 0), (10, 1), (12, 3)])
+def test_decomposition_matches_full_model(n_patients, seed):
+    staff, observations = make_benchmark_ward(n_patients, seed=seed)
+    snapshot = build_snapshot(staff, observations)
+    status, objective, _ = solve_sparse_model(snapshot)
+    split_status, split_objective, x, method = solve_decomposed(snapshot)
+    assert (split_status, split_objective) == (status, objective)
+    assert method == "decomposed"
+    assert find_violations(snapshot, x) == []
+    assert max_workload(snapshot, x) == objective
+
+
+def test_assign_slots_follows_break_placement():
+    staff, observations = make_benchmark_ward(10, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    _, _, works = solve_sparse_model(snapshot, build_break_model(snapshot))
+    works = works[:, 0, :].astype(bool)
+    x = assign_slots(snapshot, works)
+    assert find_violations(snapshot, x) == []
+    assert np.array_equal(x.sum(axis=1).astype(bool), works)
+
+
+def test_unmatchable_slot_returns_none():
+    staff, observations = make_benchmark_ward(6, seed=0)
+    snapshot = build_snapshot(staff, observations)
+    # Nobody working: no slot with observations can be matched
+    assert assign_slots(snapshot, np.zeros(snapshot["allowed"][:, 0, :].shape, dtype=bool)) is None
+
+
+def test_falls_back_to_full_model(monkeypatch):
+    staff, observations = make_benchmark_ward(8, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    _, objective, _ = solve_sparse_model(snapshot)
+    monkeypatch.setattr(decomposition, "assign_slots", lambda snapshot, works: None)
+    status, split_objective, x, method = solve_decomposed(snapshot)
+    assert (status, split_objective, method) == ("Optimal", objective, "full model")
+    assert find_violations(snapshot, x) == []
+
+
+def test_infeasible_ward_stops_at_stage_one():
+    staff, observations = make_benchmark_ward(8, seed=1)
+    staff = staff[:2]
+    snapshot = build_snapshot(staff, observations)
+    assert solve_decomposed(snapshot) == ("Infeasible", None, None, "decomposed")
+
+
+def test_break_model_rejects_replans():
+    staff, observations = make_benchmark_ward(6, seed=0)
+    snapshot = freeze_past(build_snapshot(staff, observations), [], 3)
+    with pytest.raises(ValueError):
+        build_break_model(snapshot)
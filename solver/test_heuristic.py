@@ -0,0 +1,80 @@
+import random
+
+import numpy as np
+import pulp
+import pytest
+
+from solver.benchmarks import make_benchmark_ward
+from solver.bounds import workload_lower_bound
+from solver.heuristic import solve_heuristic, improve_allocation, construct_allocation
+from solver.milo_model import build_allocation_model, set_mip_start
+from solver.snapshot import build_snapshot
+from solver.sparse_model import build_sparse_model, solve_sparse_model
+from solver.validator import find_violations, max_workload
+
+
+@pytest.mark.parametrize("n_patients,seed", [(4, 0), (8, 1), (12, 2), (30, 3)])
+def test_heuristic_allocation_passes_validator(n_patients, seed):
+    staff, observations = make_benchmark_ward(n_patients, seed=seed, restriction_share=0.2)
+    snapshot = build_snapshot(staff, observations)
+    x = solve_heuristic(snapshot)
+    assert x is not None
+    assert find_violations(snapshot, x) == []
+    assert max_workload(snapshot, x) >= workload_lower_bound(snapshot)
+
+
+def test_local_search_does_not_raise_max_workload():
+    staff, observations = make_benchmark_ward(10, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    x = next(x for x in (construct_allocation(snapshot, random.Random(seed)) for seed in range(20))
+             if x is not None)
+    improved = improve_allocation(snapshot, x)
+    assert find_violations(snapshot, improved) == []
+    assert max_workload(snapshot, improved) <= max_workload(snapshot, x)
+
+
+def test_heuristic_reports_understaffed_ward():
+    staff, observations = make_benchmark_ward(4, n_staff=2, seed=3)
+    assert solve_heuristic(build_snapshot(staff, observations), restarts=3) is None
+
+
+def test_heuristic_is_a_valid_mip_start():
+    staff, observations = make_benchmark_ward(6, seed=5)
+    snapshot = build_snapshot(staff, observations)
+    x = solve_heuristic(snapshot)
+
+    problem, assignments = build_allocation_model(staff, observations)
+    set_mip_start(problem, assignments, snapshot, x)
+    problem.solve(pulp.PULP_CBC_CMD(msg=False, warmStart=True))
+    assert pulp.LpStatus[problem.status] == "Optimal"
+
+    status, objective, _ = solve_sparse_model(snapshot, build_sparse_model(snapshot), initial=x)
+    assert status == "Optimal"
+    assert objective == pytest.approx(pulp.value(problem.objective))
+    assert objective <= max_workload(snapshot, x)
+
+
+def test_validator_flags_each_rule():
+    staff = [
+        {"id": 1, "name": "Long", "gender": "F", "assigned": True, "start_time": 0, "end_time": 12,
+         "duration": 12, "omit_time": [], "special_list": []},
+        {"id": 2, "name": "Short", "gender": "M", "assigned": True, "start_time": 0, "end_time": 6,
+         "duration": 6, "omit_time": [], "special_list": []},
+    ]
+    observations = [
+        {"id": 10, "name": "P1", "observation_level": "1", "gender_req": "F", "omit_staff": []},
+        {"id": 20, "name": "P2", "observation_level": "0", "gender_req": None, "omit_staff": []},
+    ]
+    snapshot = build_snapshot(staff, observations)
+    x = np.zeros((2, 2, 12), dtype=int)
+    x[0, 0, :] = 1                  # 12 slots in a row, no break
+    x[1, 0, 0] = 1                  # gender clash and over-coverage at slot 0
+    x[1, 1, 3:5] = 1                # level-0 patient, two slots in a row after start + 3
+    messages = find_violations(snapshot, x)
+    text = "\n".join(messages)
+    assert "P1 at slot 0: 2 staff assigned" in text
+    assert "Short may not observe P1 at slot 0" in text
+    assert "Short may not observe P2 at slot 3" in text
+    assert "Long observes P1 for more than 2 slots in a row" in text
+    assert "Short works slots 3 and 4 without a break" in text
+    assert "Long works 7 of the break-window slots" in text
@@ -0,0 +1,61 @@
+import random
+
+import numpy as np
+
+from solver.benchmarks import make_benchmark_ward
+from solver.horizon import join_blocks, plan_rolling_horizon, shift_blocks, window_snapshot
+from solver.snapshot import build_snapshot
+from solver.validator import find_violations
+
+
+def _run(n_shifts=3, seed=0):
+    staff, observations = make_benchmark_ward(6, seed=seed)
+    rng = random.Random(seed)
+    return [{"name": f"Shift {k}", "staff": rng.sample(staff, len(staff) - 1), "observations": observations}
+            for k in range(n_shifts)]
+
+
+def test_window_snapshot_keeps_shifts_apart():
+    shifts = _run(2)
+    snapshot = window_snapshot(shifts)
+    own = snapshot["staff_shift"][:, None] == snapshot["patient_shift"][None, :]
+    assert not snapshot["allowed"][~own].any()
+    singles = [build_snapshot(shift["staff"], shift["observations"]) for shift in shifts]
+    assert [block.sum() for block in shift_blocks(snapshot, snapshot["allowed"])] == \
+        [single["allowed"].sum() for single in singles]
+    blocks = [single["allowed"].astype(np.int8) for single in singles]
+    assert all((a == b).all() for a, b in zip(shift_blocks(snapshot, join_blocks(snapshot, blocks)), blocks))
+
+
+def test_rolling_horizon_commits_valid_shifts_and_carries_hours():
+    shifts = _run(3)
+    allocations, carried, table = plan_rolling_horizon(shifts, window=2)
+    assert list(table["status"]) == ["Optimal"] * 3 and table["warm_start"].all()
+    for shift, x in zip(shifts, allocations):
+        assert not find_violations(build_snapshot(shift["staff"], shift["observations"]), x)
+    hours = {}
+    for shift, x in zip(shifts, allocations):
+        for row, worked in zip(shift["staff"], x.sum(axis=(1, 2))):
+            hours[row["name"]] = hours.get(row["name"], 0) + worked
+    assert carried == hours and table["cumulative_max"].iloc[-1] == max(hours.values())
+
+
+def test_carried_hours_shift_work_to_fresher_staff():
+    # Three 12h staff on one 1:1 patient: fresh, each takes 4 of the 12 hours; the other two can
+    # cover the shift alone (two hours on, two off), so a tired first staff member gets none
+    staff = [{"id": i, "name": f"S{i}", "gender": "F", "assigned": True, "start_time": 0, "end_time": 12,
+              "duration": 12, "omit_time": [], "special_list": []} for i in range(3)]
+    observations = [{"id": 100, "name": "P1", "observation_level": "1", "gender_req": None, "omit_staff": []}]
+    shifts = [{"name": "Shift 0", "staff": staff, "observations": observations}]
+    (fresh,), _, _ = plan_rolling_horizon(shifts, window=1)
+    (rested,), carried, _ = plan_rolling_horizon(shifts, window=1, carried={"S0": 20})
+    assert fresh.sum(axis=(1, 2)).tolist() == [4, 4, 4]
+    assert rested[0].sum() == 0 < fresh[0].sum() and carried["S0"] == 20
+
+
+def test_infeasible_shift_gets_no_allocation():
+    shifts = _run(2)
+    shifts[0] = dict(shifts[0], staff=shifts[0]["staff"][:1])
+    allocations, _, table = plan_rolling_horizon(shifts, window=2)
+    assert allocations[0] is None and table["status"].iloc[0] == "Infeasible"
+    assert allocations[1] is not None and table["window"].iloc[1] == 1
@@ -0,0 +1,60 @@
+from solver import hospital
+from solver.benchmarks import make_benchmark_ward
+from solver.hospital import float_changes, hospital_objective, master_allocation, plan_float_pool
+
+
+def _float(k, gender="F"):
+    return {"id": 900 + k, "name": f"Float {k}", "role": "HCA", "gender": gender, "assigned": False,
+            "start_time": 0, "end_time": 12, "duration": 12, "omit_time": [], "special_list": ["Patient 0"]}
+
+
+def _wards(missing=4):
+    short_staff, short_observations = make_benchmark_ward(10, seed=1)
+    staff, observations = make_benchmark_ward(8, seed=0)
+    return [{"name": "Short", "staff": short_staff[:-missing], "observations": short_observations},
+            {"name": "Staffed", "staff": staff, "observations": observations}]
+
+
+def test_float_rows_are_placed_as_assigned_ward_staff():
+    change, = float_changes([_float(0)])
+    row = change["staff"]
+    assert row["assigned"] and row["name"] == "Float 0 (float)"
+    assert "id" not in row and "special_list" not in row
+
+
+def test_master_sends_floats_to_the_worst_ward():
+    assignment = master_allocation(_wards(), [_float(0), _float(1, "M")])
+    assert assignment["Short"] and not assignment["Staffed"]
+
+
+def test_float_pool_makes_every_ward_feasible():
+    wards = _wards()
+    floats = [_float(k, "FM"[k % 2]) for k in range(4)]
+    assignment, table = plan_float_pool(wards, floats, workers=1)
+    assert table["feasible"].all() and set(table["ward"]) == {"Short", "Staffed"}
+    assigned = [name for names in assignment.values() for name in names]
+    assert len(assigned) == len(set(assigned)) and set(assigned) <= {f["name"] for f in floats}
+
+
+def test_ward_short_of_several_floats_gets_them_all():
+    # Without 8 of its staff the ward needs 3 floats before its bound is even feasible
+    wards = _wards(missing=8)
+    floats = [_float(k, "FM"[k % 2]) for k in range(10)]
+    assert len(master_allocation(wards, floats)["Short"]) >= 3
+    assignment, table = plan_float_pool(wards, floats, workers=1)
+    assert table["feasible"].all() and len(assignment["Short"]) >= 3
+
+
+def test_coordination_moves_several_floats_at_once(monkeypatch):
+    wards = _wards(missing=8)
+    floats = [_float(k, "FM"[k % 2]) for k in range(10)]
+    # Left to coordination alone, one float at a time never makes the short ward feasible
+    monkeypatch.setattr(hospital, "master_allocation", lambda wards, floats: {ward["name"]: [] for ward in wards})
+    assignment, table = plan_float_pool(wards, floats, workers=1)
+    assert table["feasible"].all() and len(assignment["Short"]) >= 3
+
+
+def test_objective_counts_infeasible_wards_first():
+    worse = {"a": {"feasible": False, "max_workload": None}, "b": {"feasible": True, "max_workload": 5}}
+    better = {"a": {"feasible": True, "max_workload": 9}, "b": {"feasible": True, "max_workload": 9}}
+    assert hospital_objective(better) < hospital_objective(worse)
@@ -0,0 +1,81 @@
+import random
+
+import numpy as np
+import pytest
+
+from solver.benchmarks import make_benchmark_ward
+from solver.heuristic import solve_heuristic
+from solver.incremental import AllocationChecker
+from solver.snapshot import build_snapshot, freeze_past
+from solver.validator import CELL_RULES, find_violations, rule_masks
+
+
+def _keys(masks):
+    return {rule: {tuple(int(k) for k in key) for key in zip(*np.nonzero(mask))} for rule, mask in masks.items()}
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_random_edits_match_full_validation(seed):
+    staff, observations = make_benchmark_ward(10, seed=seed, restriction_share=0.3)
+    snapshot = build_snapshot(staff, observations)
+    checker = AllocationChecker(snapshot, solve_heuristic(snapshot))
+    assert checker.valid
+    rng = random.Random(seed)
+    n_staff, n_patients, n_slots = checker.x.shape
+    for _ in range(300):
+        i, t = rng.randrange(n_staff), rng.randrange(n_slots)
+        if rng.random() < 0.5:
+            checker.assign(i, t, rng.choice([None] + list(range(n_patients))))
+        else:
+            checker.set_cell(i, rng.randrange(n_patients), t, rng.random() < 0.5)
+        assert checker.violated == _keys(rule_masks(snapshot, checker.x))
+    assert np.array_equal(checker.coverage, checker.x.sum(axis=0))
+    assert checker.messages() == find_violations(snapshot, checker.x)
+
+
+def test_undoing_an_edit_restores_validity():
+    staff, observations = make_benchmark_ward(8, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    x = solve_heuristic(snapshot)
+    checker = AllocationChecker(snapshot, x)
+    i, j, t = (int(k[0]) for k in np.nonzero(x))
+    checker.assign(i, t, None)
+    assert checker.violation_counts()["coverage"] == 1
+    checker.assign(i, t, j)
+    assert checker.valid and np.array_equal(checker.x, x)
+
+
+def test_replan_history_edits_are_flagged():
+    staff, observations = make_benchmark_ward(8, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    x = solve_heuristic(snapshot)
+    published = [(snapshot["staff_ids"][i], snapshot["patient_ids"][j], int(t)) for i, j, t in zip(*np.nonzero(x))]
+    replan = freeze_past(snapshot, published, 4)
+    checker = AllocationChecker(replan, x)
+    i, j = np.argwhere(x[:, :, 1] == 0)[0]
+    checker.set_cell(i, j, 1, 1)
+    assert checker.violated["frozen"] == {(int(i), int(j), 1)}
+
+
+def test_edit_rechecks_a_bounded_number_of_rules():
+    # An edit touches only the rule instances around its cell, however large the ward
+    counts = []
+    for n_patients in (10, 200):
+        staff, observations = make_benchmark_ward(n_patients, seed=1)
+        snapshot = build_snapshot(staff, observations)
+        checker = AllocationChecker(snapshot, solve_heuristic(snapshot))
+        rechecked = []
+        recheck = checker._recheck
+
+        def counting_recheck(rule, key):
+            rechecked.append(rule)
+            recheck(rule, key)
+        checker._recheck = counting_recheck
+        # A break-window slot, so the long-break rule is rechecked too
+        i, j = np.argwhere(checker.x[:, :, 6])[0]
+        checker.assign(i, 6, None)
+        checker.assign(i, 6, j)
+        counts.append(len(rechecked))
+    rules = snapshot["rules"]
+    per_cell = 2 + len(CELL_RULES) + rules["consecutive_cap"] + 1 + rules["short_break_window"] + 1
+    assert counts[0] == counts[1] <= 2 * per_cell
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from solver.benchmarks import make_benchmark_ward
+from solver.bounds import workload_lower_bound
+from solver.heuristic import solve_heuristic
+from solver.lazy import select_rows, solve_lazy, violated_rows
+from solver.snapshot import build_snapshot
+from solver.sparse_model import build_sparse_model, solve_sparse_model
+from solver.validator import find_violations
+
+
+@pytest.mark.parametrize("n_patients,seed", [(6, 0), (10, 1), (12, 3)])
+@pytest.mark.parametrize("lazy_kinds", [("consecutive",), ("consecutive", "short_break", "long_break")])
+def test_lazy_rows_match_full_model(n_patients, seed, lazy_kinds):
+    staff, observations = make_benchmark_ward(n_patients, seed=seed)
+    snapshot = build_snapshot(staff, observations)
+    model = build_sparse_model(snapshot)
+    status, objective, _ = solve_sparse_model(snapshot, model)
+    lazy_status, lazy_objective, x, rounds, rows = solve_lazy(snapshot, model, lazy_kinds=lazy_kinds)
+    assert (lazy_status, lazy_objective) == (status, objective)
+    assert rows <= len(model["rhs"])
+    if x is not None:
+        assert find_violations(snapshot, x) == []
+        assert not violated_rows(model, x).any()
+
+
+def test_violated_rows_flags_rule_breaks():
+    staff, observations = make_benchmark_ward(8, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    model = build_sparse_model(snapshot)
+    x = solve_heuristic(snapshot)
+    assert not violated_rows(model, x).any()
+    i, j, t = (int(k[0]) for k in np.nonzero(x))
+    x[i, j, t] = 0
+    assert set(model["row_kind"][violated_rows(model, x)]) == {"coverage"}
+
+
+def test_select_rows_keeps_columns():
+    staff, observations = make_benchmark_ward(8, seed=1)
+    model = build_sparse_model(build_snapshot(staff, observations))
+    keep = model["row_kind"] != "consecutive"
+    sub = select_rows(model, keep)
+    assert len(sub["rhs"]) == keep.sum()
+    assert len(sub["indices"]) == sub["indptr"][-1]
+    assert len(sub["col_lower"]) == len(model["col_lower"])
+
+
+def test_bounded_start_finishes_in_one_round():
+    staff, observations = make_benchmark_ward(10, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    bound = workload_lower_bound(snapshot)
+    initial = solve_heuristic(snapshot)
+    _, objective, _, rounds, _ = solve_lazy(snapshot, build_sparse_model(snapshot, workload_bound=bound),
+                                            initial=initial)
+    assert objective == bound and rounds == 1
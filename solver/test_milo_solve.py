@@ -126,3 +126,89 @@ def test_workload_balancing(monkeypatch):
     assert max_workload - min_workload <= 1, "Workload should be balanced within 1 hour difference"
 
 
+
+
+def test_rerun_shows_the_solved_allocation_without_solving(monkeypatch, tmp_path):
+    """Edits, publishing and downloads rerun the page; the allocation must not be solved again."""
+    import streamlit as st
+    from solver import milo_solve
+    from solver.benchmarks import make_benchmark_ward
+    from solver.budget import DEFAULT_BUDGET
+    from solver.sparse_model import solve_sparse_model
+
+    staff, patients = make_benchmark_ward(6, seed=0)
+    monkeypatch.setattr(st, "session_state", {})
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(milo_solve, "get_staff_rows_as_dict", lambda: staff)
+    monkeypatch.setattr(milo_solve, "get_patient_rows_as_dict", lambda: patients)
+    solves = []
+
+    def counting_solve(*args, **kwargs):
+        solves.append(1)
+        return solve_sparse_model(*args, **kwargs)
+    monkeypatch.setattr(milo_solve, "solve_sparse_model", counting_solve)
+
+    first = milo_solve.solve_staff_allocation("D", backend="sparse", warm_start=False)[2]
+    second = milo_solve.solve_staff_allocation("D", backend="sparse", warm_start=False)[2]
+    assert len(solves) == 1
+    assert {key: value.value() for key, value in first.items()} == \
+           {key: value.value() for key, value in second.items()}
+    milo_solve.solve_staff_allocation("n", backend="sparse", warm_start=False)
+    assert len(solves) == 2
+    # Options that change the allocation or its quality label are solved afresh
+    milo_solve.solve_staff_allocation("D", backend="sparse", warm_start=False, symmetry_breaking=True)
+    assert len(solves) == 3
+    milo_solve.solve_staff_allocation("D", backend="sparse", warm_start=False,
+                                      budget={**DEFAULT_BUDGET, "time_limit": 30})
+    assert len(solves) == 4
+
+
+def test_live_rerun_reuses_the_lp_preview(monkeypatch, tmp_path):
+    """Reruns while CBC is still running must not solve the LP relaxation again."""
+    import streamlit as st
+    from solver import milo_solve
+    from solver.benchmarks import make_benchmark_ward
+    from solver.relaxation import preview_allocation
+
+    staff, patients = make_benchmark_ward(6, seed=0)
+    monkeypatch.setattr(st, "session_state", {})
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(milo_solve, "get_staff_rows_as_dict", lambda: staff)
+    monkeypatch.setattr(milo_solve, "get_patient_rows_as_dict", lambda: patients)
+    previews = []
+
+    def counting_preview(*args, **kwargs):
+        previews.append(1)
+        return preview_allocation(*args, **kwargs)
+    monkeypatch.setattr(milo_solve, "preview_allocation", counting_preview)
+
+    milo_solve.solve_staff_allocation("D", backend="sparse", live=True)
+    # As if the page reran before the solve finished
+    st.session_state.pop("solved_allocation")
+    st.session_state.pop("live_result")
+    assert milo_solve.solve_staff_allocation("D", backend="sparse", live=True)[2] is not None
+    assert len(previews) == 1
+    milo_solve.solve_staff_allocation("n", backend="sparse", live=True)
+    assert len(previews) == 2
+
+
+def test_proven_portfolio_result_is_shown_as_optimal(monkeypatch, tmp_path):
+    """Without the analytic bound, only the race's own proof can mark the result optimal."""
+    import streamlit as st
+    from solver import milo_solve
+    from solver.benchmarks import make_benchmark_ward
+    from solver.snapshot import build_snapshot
+    from solver.sparse_model import solve_sparse_model
+
+    staff, patients = make_benchmark_ward(6, seed=0)
+    _, objective, x = solve_sparse_model(build_snapshot(staff, patients))
+    monkeypatch.setattr(st, "session_state", {})
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(milo_solve, "get_staff_rows_as_dict", lambda: staff)
+    monkeypatch.setattr(milo_solve, "get_patient_rows_as_dict", lambda: patients)
+    monkeypatch.setattr(milo_solve, "solve_portfolio", lambda *args, **kwargs: {
+        "status": "Optimal", "objective": objective, "x": x, "winner": "sparse", "proven": True, "elapsed": 0.1})
+
+    milo_solve.solve_staff_allocation("D", backend="portfolio", use_lower_bound=False)
+    (_, (_, quality)), = st.session_state["solved_allocation"]
+    assert quality == {"proven": True, "gap": 0.0}
@@ -0,0 +1,65 @@
+import os
+import queue
+import time
+
+from solver.benchmarks import make_benchmark_ward
+from solver.bounds import workload_lower_bound
+from solver.portfolio import _worker, solve_portfolio, run_configuration
+from solver.snapshot import build_snapshot
+from solver.validator import find_violations, max_workload
+
+
+def test_portfolio_returns_proven_allocation():
+    staff, observations = make_benchmark_ward(8, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    race = solve_portfolio(staff, observations, deadline=60)
+    assert race["status"] == "Optimal" and race["proven"]
+    assert find_violations(snapshot, race["x"]) == []
+    assert max_workload(snapshot, race["x"]) == race["objective"] == workload_lower_bound(snapshot)
+
+
+def test_portfolio_without_deadline_waits_for_a_proof():
+    # A budget time_limit of 0 means no limit, passed on as deadline=None
+    staff, observations = make_benchmark_ward(6, seed=0)
+    race = solve_portfolio(staff, observations, deadline=None)
+    assert race["proven"] and race["x"] is not None
+
+
+def test_portfolio_reports_infeasible_ward():
+    staff, observations = make_benchmark_ward(4, n_staff=2, seed=3)
+    race = solve_portfolio(staff, observations, deadline=60)
+    assert race["status"] == "Infeasible"
+    assert race["x"] is None
+
+
+def test_portfolio_kills_workers_at_deadline():
+    staff, observations = make_benchmark_ward(8, seed=1)
+    slow = [{"name": "slow_sparse", "engine": "sparse", "options": ["maxNodes", "100000000"]}] * 2
+    started = time.perf_counter()
+    race = solve_portfolio(staff, observations, configs=slow, deadline=0.5)
+    # Spawned workers need a moment to import; none can have proven anything yet
+    assert time.perf_counter() - started < 5
+    assert race["status"] == "Not Solved" and race["winner"] is None
+
+
+def test_configurations_agree_on_objective():
+    staff, observations = make_benchmark_ward(6, seed=2)
+    objectives = {config: run_configuration({"name": config, "engine": config, "workload_bound": True},
+                                            staff, observations)["objective"]
+                  for config in ("sparse", "pulp")}
+    assert objectives["sparse"] == objectives["pulp"]
+
+
+def test_worker_reports_process_group_failures(monkeypatch):
+    staff, observations = make_benchmark_ward(4, seed=0)
+    results = queue.Queue()
+
+    def fail():
+        raise PermissionError("setsid")
+    monkeypatch.setattr(os, "setsid", fail)
+    _worker({"name": "heuristic", "engine": "heuristic"}, staff, observations, results)
+    assert results.get_nowait()["status"] == "Error"
+    # Without process groups (Windows) the worker still runs
+    monkeypatch.delattr(os, "setsid")
+    _worker({"name": "heuristic", "engine": "heuristic"}, staff, observations, results)
+    assert results.get_nowait()["status"] != "Error"
@@ -0,0 +1,83 @@
+import time
+
+from solver.benchmarks import make_benchmark_ward
+from solver.heuristic import solve_heuristic
+from solver.progress import LiveSolve, LogTail, parse_progress
+from solver.snapshot import build_snapshot
+from solver.sparse_model import solve_sparse_model
+from solver.validator import find_violations, max_workload
+
+
+def test_parse_progress_lines():
+    assert parse_progress("Continuous objective value is 8.21831 - 23.07 seconds") == {"bound": 8.21831}
+    assert parse_progress("Cbc0012I Integer solution of 9 found by feasibility pump after 0 iterations "
+                          "and 0 nodes (41.68 seconds)") == {"incumbent": 9.0}
+    assert parse_progress("Cbc0010I After 100 nodes, 12 on tree, 9 best solution, best possible 8.5 "
+                          "(12.40 seconds)") == {"nodes": 100, "incumbent": 9.0, "bound": 8.5}
+    assert parse_progress("Cbc0010I After 0 nodes, 1 on tree, 1e+50 best solution, best possible 8.5 "
+                          "(2.10 seconds)") == {"nodes": 0, "bound": 8.5}
+    assert parse_progress("Cbc0005I Partial search - best objective 9 (best possible 8.2183099), took 0 "
+                          "iterations and 0 nodes (40.98 seconds)") == {"incumbent": 9.0, "bound": 8.2183099}
+    assert parse_progress("Coin0008I MODEL read with 0 errors") == {}
+
+
+def test_log_tail_returns_complete_lines_once(tmp_path):
+    log = tmp_path / "log.txt"
+    tail = LogTail(str(log))
+    assert tail.read_lines() == []
+    log.write_text("first\nsec")
+    assert tail.read_lines() == ["first"]
+    with open(log, "a") as file:
+        file.write("ond\n")
+    assert tail.read_lines() == ["second"]
+
+
+def test_live_solve_matches_blocking_solve():
+    staff, observations = make_benchmark_ward(8, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    solve = LiveSolve(snapshot)
+    status, objective, x = solve.result(timeout=60)
+    assert status == "Optimal"
+    assert (status, objective) == solve_sparse_model(snapshot)[:2]
+    assert solve.progress["incumbent"] == objective
+    assert find_violations(snapshot, x) == []
+
+
+def test_accepted_solve_keeps_incumbent():
+    staff, observations = make_benchmark_ward(30, seed=3)
+    snapshot = build_snapshot(staff, observations)
+    initial = solve_heuristic(snapshot)
+    solve = LiveSolve(snapshot, initial=initial)
+    deadline = time.perf_counter() + 60
+    while solve.running and solve.poll()["incumbent"] is None and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    solve.accept()
+    _, _, x = solve.result(timeout=60)
+    assert x is not None and find_violations(snapshot, x) == []
+    assert max_workload(snapshot, x) <= max_workload(snapshot, initial)
+
+
+def test_finished_live_solve_is_reused_until_the_ward_changes(monkeypatch, tmp_path):
+    import streamlit as st
+    from solver import milo_solve
+
+    monkeypatch.setattr(st, "session_state", {})
+    monkeypatch.chdir(tmp_path)
+    started = []
+
+    class CountingSolve(LiveSolve):
+        def __init__(self, *args, **kwargs):
+            started.append(1)
+            super().__init__(*args, **kwargs)
+    monkeypatch.setattr(milo_solve, "LiveSolve", CountingSolve)
+
+    staff, observations = make_benchmark_ward(6, seed=0)
+    snapshot = build_snapshot(staff, observations)
+    budget = {"time_limit": 60, "gap": 0.0, "threads": 1}
+    status, objective, x = milo_solve.run_live_solve("D", snapshot, budget)
+    assert status == "Optimal" and len(started) == 1
+    # A rerun of the page (e.g. after an edit) gets the same allocation back without solving
+    again = milo_solve.run_live_solve("D", snapshot, budget)
+    assert again[:2] == (status, objective) and (again[2] == x).all() and len(started) == 1
+    milo_solve.run_live_solve("n", snapshot, budget)
+    assert len(started) == 2
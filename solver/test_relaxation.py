@@ -0,0 +1,69 @@
+import time
+
+import numpy as np
+import pytest
+
+from solver.benchmarks import make_benchmark_ward
+from solver.bounds import workload_lower_bound
+from solver.relaxation import preview_allocation, relax, solve_relaxation
+from solver.snapshot import build_snapshot, freeze_past
+from solver.sparse_model import build_sparse_model, solve_sparse_model
+from solver.validator import find_violations, max_workload
+
+
+@pytest.mark.parametrize("n_patients,seed", [(6, 0), (6, 4), (10, 1), (10, 7)])
+def test_preview_is_valid_and_bounds_the_optimum(n_patients, seed):
+    staff, observations = make_benchmark_ward(n_patients, seed=seed, restriction_share=0.4, short_shift_share=0.4)
+    snapshot = build_snapshot(staff, observations)
+    preview = preview_allocation(snapshot, workload_bound=workload_lower_bound(snapshot))
+    status, objective, _ = solve_sparse_model(snapshot)
+    if preview["status"] == "Infeasible":
+        # The relaxation is infeasible only when the full model is
+        assert status == "Infeasible"
+    if status == "Infeasible":
+        assert preview["x"] is None
+        return
+    assert status == "Optimal"
+    assert find_violations(snapshot, preview["x"]) == []
+    assert preview["max_workload"] == max_workload(snapshot, preview["x"])
+    assert preview["bound"] <= objective <= preview["max_workload"]
+    assert (preview["status"] == "Optimal") == (preview["max_workload"] == preview["bound"])
+
+
+def test_relaxation_bounds_the_full_model():
+    staff, observations = make_benchmark_ward(8, seed=2)
+    snapshot = build_snapshot(staff, observations)
+    model = build_sparse_model(snapshot)
+    status, lp_objective, columns, duals = solve_relaxation(model)
+    assert status == "Optimal" and len(columns) == len(model["objective"]) and len(duals) == len(model["rhs"])
+    # Workload rows share out the objective: one more unit of max_workload is worth exactly 1
+    assert -duals[model["row_kind"] == "workload"].sum() == pytest.approx(1)
+    assert model["integer"].any() and not relax(model)["integer"].any()
+    _, objective, _ = solve_sparse_model(snapshot, model)
+    assert lp_objective <= objective + 1e-6
+
+
+def test_preview_keeps_a_better_initial_allocation():
+    staff, observations = make_benchmark_ward(6, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    _, objective, optimal = solve_sparse_model(snapshot)
+    preview = preview_allocation(snapshot, initial=optimal)
+    assert preview["max_workload"] == objective
+
+
+def test_preview_is_fast_on_large_ward():
+    staff, observations = make_benchmark_ward(100, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    started = time.perf_counter()
+    preview = preview_allocation(snapshot, workload_bound=workload_lower_bound(snapshot))
+    assert time.perf_counter() - started < 5
+    assert preview["x"] is not None and find_violations(snapshot, preview["x"]) == []
+
+
+def test_preview_rejects_replans():
+    staff, observations = make_benchmark_ward(6, seed=0)
+    snapshot = build_snapshot(staff, observations)
+    _, _, x = solve_sparse_model(snapshot)
+    cells = [(snapshot["staff_ids"][i], snapshot["patient_ids"][j], int(t)) for i, j, t in zip(*np.nonzero(x))]
+    with pytest.raises(ValueError):
+        preview_allocation(freeze_past(snapshot, cells, 4))
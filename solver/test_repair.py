@@ -0,0 +1,51 @@
+import copy
+
+import numpy as np
+
+from solver.benchmarks import make_benchmark_ward
+from solver.repair import changed_cells, min_change_model, solve_min_changes
+from solver.snapshot import build_snapshot
+from solver.sparse_model import solve_sparse_model
+from solver.validator import find_violations, max_workload
+
+
+def published_ward():
+    staff, observations = make_benchmark_ward(10, seed=2)
+    snapshot = build_snapshot(staff, observations)
+    _, _, x = solve_sparse_model(snapshot)
+    return staff, observations, snapshot, x
+
+
+def test_unchanged_ward_keeps_published_allocation():
+    _, _, snapshot, x = published_ward()
+    status, workload, y, changes = solve_min_changes(snapshot, x)
+    assert status == "Optimal" and changes == 0
+    assert workload == max_workload(snapshot, x)
+    assert (y == x).all()
+
+
+def test_level_change_moves_few_cells():
+    staff, observations, snapshot, x = published_ward()
+    observations = copy.deepcopy(observations)
+    raised = int(np.flatnonzero(snapshot["required"] == 1)[0])
+    observations[raised]["observation_level"] = "2"
+    changed = build_snapshot(staff, observations)
+
+    _, _, fresh = solve_sparse_model(changed)
+    status, workload, y, changes = solve_min_changes(changed, x)
+    assert status == "Optimal"
+    assert find_violations(changed, y) == []
+    assert workload == max_workload(changed, fresh)
+    assert changes == changed_cells(x, y) <= changed_cells(x, fresh)
+    # The raised patient needs 12 more staff-slots; little else should move
+    assert changes < 3 * 12
+
+
+def test_objective_counts_changed_cells():
+    _, _, snapshot, x = published_ward()
+    model = min_change_model(snapshot, x, workload_cap=max_workload(snapshot, x))
+    other = np.roll(x, 1, axis=0)
+    present = model["cell_index"] >= 0
+    columns = np.zeros(len(model["objective"]))
+    columns[model["cell_index"][present]] = other[present]
+    assert model["objective_offset"] + model["objective"] @ columns == changed_cells(x, other * present)
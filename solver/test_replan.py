@@ -0,0 +1,62 @@
+import copy
+
+import numpy as np
+
+from solver.benchmarks import make_benchmark_ward
+from solver.snapshot import build_snapshot, freeze_past
+from solver.sparse_model import build_sparse_model, solve_sparse_model
+from solver.validator import find_violations
+
+CURRENT_SLOT = 6
+
+
+def published_cells(snapshot, x):
+    return [(snapshot["staff_ids"][i], snapshot["patient_ids"][j], int(t)) for i, j, t in zip(*np.nonzero(x))]
+
+
+def solved_ward():
+    staff, observations = make_benchmark_ward(10, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    status, _, x = solve_sparse_model(snapshot)
+    assert status == "Optimal"
+    return staff, observations, snapshot, x
+
+
+def test_replan_keeps_past_and_respects_changes():
+    staff, observations, snapshot, x = solved_ward()
+    # Mid-shift: a staff member working the current slot goes home sick and a patient's level rises
+    staff, observations = copy.deepcopy(staff), copy.deepcopy(observations)
+    sick = int(np.flatnonzero(x[:, :, CURRENT_SLOT].any(axis=1))[0])
+    staff[sick]["end_time"] = CURRENT_SLOT
+    raised = int(np.flatnonzero(snapshot["required"] == 1)[0])
+    observations[raised]["observation_level"] = "2"
+    staff.append({**staff[0], "id": 99, "name": "Bank", "assigned": True, "start_time": CURRENT_SLOT,
+                  "end_time": 12, "duration": 6, "omit_time": [], "special_list": []})
+
+    replan = freeze_past(build_snapshot(staff, observations), published_cells(snapshot, x), CURRENT_SLOT)
+    status, _, y = solve_sparse_model(replan)
+    assert status == "Optimal"
+    assert (y[:len(x), :, :CURRENT_SLOT] == x[:, :, :CURRENT_SLOT]).all()
+    assert not y[sick, :, CURRENT_SLOT:].any()
+    assert (y[:, raised, CURRENT_SLOT:].sum(axis=0) == 2).all()
+    # Consecutive-hours and break windows crossing CURRENT_SLOT are checked against the frozen slots
+    assert find_violations(replan, y) == []
+
+
+def test_replan_carries_consecutive_hours():
+    staff, observations, snapshot, x = solved_ward()
+    # Someone who watched a patient for the two slots before CURRENT_SLOT must hand them over
+    pairs = x[:, :, CURRENT_SLOT - 2] & x[:, :, CURRENT_SLOT - 1]
+    i, j = (int(k[0]) for k in np.nonzero(pairs))
+    status, _, y = solve_sparse_model(freeze_past(snapshot, published_cells(snapshot, x), CURRENT_SLOT))
+    assert status == "Optimal"
+    assert y[i, j, CURRENT_SLOT] == 0
+
+
+def test_replan_model_is_smaller():
+    _, _, snapshot, x = solved_ward()
+    full = build_sparse_model(snapshot)
+    replan = build_sparse_model(freeze_past(snapshot, published_cells(snapshot, x), CURRENT_SLOT))
+    assert len(replan["rhs"]) < len(full["rhs"])
+    free = (replan["col_lower"] < replan["col_upper"]).sum()
+    assert free < len(full["col_lower"]) * 0.75
@@ -0,0 +1,62 @@
+import pytest
+
+from solver.benchmarks import make_benchmark_ward
+from solver.scenarios import apply_scenario, evaluate_scenarios, suggest_scenarios
+
+
+def _tight_ward():
+    staff, observations = make_benchmark_ward(10, seed=1)
+    return staff[:-4], observations
+
+
+def test_apply_scenario_changes_copies_only():
+    staff, observations = make_benchmark_ward(6, seed=0)
+    name, patient = staff[0]["name"], observations[0]["name"]
+    changed_staff, changed_observations = apply_scenario(staff, observations, {"name": "all", "changes": [
+        {"kind": "add_staff", "staff": {"gender": "M", "start_time": 6, "end_time": 12}},
+        {"kind": "hours", "staff": name, "start_time": 2, "end_time": 8},
+        {"kind": "level", "patient": patient, "observation_level": 3},
+        {"kind": "clear_omit_time", "staff": name},
+        {"kind": "assign", "staff": name, "assigned": False},
+    ]})
+    assert len(changed_staff) == len(staff) + 1
+    assert changed_staff[-1]["duration"] == 6 and changed_staff[-1]["id"] == max(s["id"] for s in staff) + 1
+    assert (changed_staff[0]["start_time"], changed_staff[0]["duration"], changed_staff[0]["assigned"]) == (2, 6, False)
+    assert changed_observations[0]["observation_level"] == "3"
+    assert staff[0]["assigned"] and len(staff) == len(changed_staff) - 1
+
+
+def test_unknown_change_is_rejected():
+    staff, observations = make_benchmark_ward(4, seed=0)
+    with pytest.raises(ValueError):
+        apply_scenario(staff, observations, {"name": "bad", "changes": [{"kind": "hours", "staff": "Nobody",
+                                                                        "start_time": 0, "end_time": 4}]})
+
+
+def test_ranked_table_puts_fixes_first():
+    staff, observations = _tight_ward()
+    scenarios = suggest_scenarios(staff, observations) + [
+        {"name": "Missing patient", "changes": [{"kind": "level", "patient": "Nobody", "observation_level": 1}]}]
+    ranked = evaluate_scenarios(staff, observations, scenarios, workers=1)
+    assert len(ranked) == len(scenarios)
+    assert not ranked.set_index("scenario").loc["No change", "feasible"]
+    feasible = ranked["feasible"].tolist()
+    assert feasible[0] and feasible == sorted(feasible, reverse=True)
+    fixes = ranked[ranked["feasible"]]["max_workload"].tolist()
+    assert fixes == sorted(fixes)
+    assert ranked.set_index("scenario").loc["Missing patient", "method"].startswith("error")
+
+
+def test_bound_settles_hopeless_scenarios_without_solving():
+    staff, observations = make_benchmark_ward(10, seed=1)
+    ranked = evaluate_scenarios(staff[:2], observations, [{"name": "No change", "changes": []}], workers=1)
+    assert ranked.loc[0, "method"] == "bound" and not ranked.loc[0, "feasible"]
+
+
+def test_process_pool_matches_serial_run():
+    staff, observations = _tight_ward()
+    scenarios = suggest_scenarios(staff, observations)[:5]
+    columns = ["scenario", "feasible", "max_workload", "method"]
+    serial = evaluate_scenarios(staff, observations, scenarios, workers=1)[columns]
+    pooled = evaluate_scenarios(staff, observations, scenarios, workers=2)[columns]
+    assert serial.equals(pooled)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from solver.benchmarks import make_benchmark_ward
+from solver.sensitivity import elastic_model, sensitivity_report
+from solver.snapshot import build_snapshot, freeze_past
+from solver.sparse_model import build_sparse_model, solve_sparse_model
+
+
+def test_elastic_model_adds_one_shortfall_per_coverage_row():
+    staff, observations = make_benchmark_ward(6, seed=0)
+    snapshot = build_snapshot(staff, observations)
+    model = build_sparse_model(snapshot)
+    elastic = elastic_model(snapshot)
+    coverage = np.flatnonzero(model["row_kind"] == "coverage")
+    assert len(elastic["objective"]) == len(model["objective"]) + len(coverage)
+    for row in range(len(model["rhs"])):
+        before = model["indices"][model["indptr"][row]:model["indptr"][row + 1]].tolist()
+        after = elastic["indices"][elastic["indptr"][row]:elastic["indptr"][row + 1]].tolist()
+        if row in coverage:
+            assert after == before + [elastic["shortfall_cols"][np.searchsorted(coverage, row)]]
+        else:
+            assert after == before
+
+
+def test_feasible_ward_has_no_shortfall_and_bounds_the_optimum():
+    staff, observations = make_benchmark_ward(6, seed=0)
+    snapshot = build_snapshot(staff, observations)
+    report = sensitivity_report(snapshot)
+    _, objective, _ = solve_sparse_model(snapshot)
+    assert report["status"] == "Optimal" and report["shortfall"] == 0
+    assert report["bound"] <= objective
+    assert list(report["staff"].columns) == ["staff", "workload", "staff_slot", "breaks", "consecutive", "pressure"]
+    assert (report["staff"]["pressure"] > 0).all()
+
+
+def test_short_ward_reports_where_the_shortfall_is():
+    staff, observations = make_benchmark_ward(10, seed=0, n_staff=10)
+    snapshot = build_snapshot(staff, observations)
+    report = sensitivity_report(snapshot)
+    assert solve_sparse_model(snapshot)[0] == "Infeasible"
+    assert report["shortfall"] > 0
+    assert report["slots"]["shortfall"].sum() == pytest.approx(report["shortfall"])
+    assert report["patients"]["shortfall"].sum() == pytest.approx(report["shortfall"])
+    # Most pressing first
+    assert report["slots"]["shortfall"].is_monotonic_decreasing
+    assert report["slots"]["pressure"].iloc[0] > 0
+
+
+def test_sensitivity_rejects_replans():
+    staff, observations = make_benchmark_ward(6, seed=0)
+    snapshot = build_snapshot(staff, observations)
+    _, _, x = solve_sparse_model(snapshot)
+    cells = [(snapshot["staff_ids"][i], snapshot["patient_ids"][j], int(t)) for i, j, t in zip(*np.nonzero(x))]
+    with pytest.raises(ValueError):
+        sensitivity_report(freeze_past(snapshot, cells, 4))
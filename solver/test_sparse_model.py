@@ -0,0 +1,115 @@
+import numpy as np
+import pulp
+import pytest
+
+from solver.benchmarks import make_benchmark_ward
+from solver.milo_model import build_allocation_model
+from solver.snapshot import build_snapshot, array_from_assignments
+from solver.heuristic import solve_heuristic
+from solver.lazy import violated_rows
+from solver.sparse_model import build_aggregated_model, build_sparse_model, solve_sparse_model
+from solver.validator import find_violations
+
+
+def solve_pulp(staff, observations):
+    problem, assignments = build_allocation_model(staff, observations)
+    problem.solve(pulp.PULP_CBC_CMD(msg=False))
+    return problem, assignments
+
+
+def row_activity(model, x):
+    '''Evaluate every sparse row at allocation x with max_workload set to its best value.'''
+    columns = np.zeros(model["workload_col"] + 1)
+    present = model["cell_index"] >= 0
+    columns[model["cell_index"][present]] = x[present]
+    workload_rows = model["row_kind"] == "workload"
+    row_of_entry = np.repeat(np.arange(len(model["rhs"])), np.diff(model["indptr"]))
+    cell_part = np.bincount(row_of_entry, weights=model["data"] * (model["indices"] != model["workload_col"])
+                            * columns[model["indices"]], minlength=len(model["rhs"]))
+    columns[model["workload_col"]] = cell_part[workload_rows].max(initial=0)
+    return np.bincount(row_of_entry, weights=model["data"] * columns[model["indices"]],
+                       minlength=len(model["rhs"])), columns[model["workload_col"]]
+
+
+def satisfies(model, x):
+    activity, _ = row_activity(model, x)
+    equal = model["sense"] == "E"
+    return np.allclose(activity[equal], model["rhs"][equal]) and \
+        np.all(activity[~equal] <= model["rhs"][~equal] + 1e-9)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_sparse_model_matches_pulp_model(seed):
+    staff, observations = make_benchmark_ward(5, seed=seed, restriction_share=0.3)
+    snapshot = build_snapshot(staff, observations)
+    model = build_sparse_model(snapshot)
+
+    problem, assignments = solve_pulp(staff, observations)
+    status, objective, x = solve_sparse_model(snapshot, model)
+
+    assert pulp.LpStatus[problem.status] == status
+    if status != "Optimal":
+        return
+    assert objective == pytest.approx(pulp.value(problem.objective))
+
+    # The PuLP optimum is feasible for the sparse model ...
+    assert satisfies(model, array_from_assignments(snapshot, assignments))
+
+    # ... and the sparse optimum satisfies every constraint of the PuLP model
+    for (s_id, o_id, t), var in assignments.items():
+        var.varValue = float(x[snapshot["staff_ids"].index(s_id), snapshot["patient_ids"].index(o_id), t])
+    problem.variablesDict()["max_workload"].varValue = objective
+    assert all(constraint.valid() for constraint in problem.constraints.values())
+
+
+def test_sparse_model_detects_infeasible_ward():
+    staff, observations = make_benchmark_ward(4, n_staff=2, seed=3)
+    status, _, x = solve_sparse_model(build_snapshot(staff, observations))
+    assert status == "Infeasible"
+
+
+def test_sparse_model_drops_ruled_out_cells():
+    staff, observations = make_benchmark_ward(6, seed=4)
+    snapshot = build_snapshot(staff, observations)
+    model = build_sparse_model(snapshot)
+    assert model["workload_col"] == int(snapshot["allowed"].sum())
+    assert len(model["indptr"]) == len(model["rhs"]) + 1
+
+
+def test_solve_staff_allocation_sparse_backend(monkeypatch):
+    staff, observations = make_benchmark_ward(4, seed=5)
+    from solver import milo_solve
+
+    monkeypatch.setattr(milo_solve, "get_staff_rows_as_dict", lambda: staff)
+    monkeypatch.setattr(milo_solve, "get_patient_rows_as_dict", lambda: observations)
+    monkeypatch.setattr(milo_solve, "print_results", lambda *args: None)
+
+    _staff, _patients, assignments = milo_solve.solve_staff_allocation("D", backend="sparse")
+
+    for o in observations:
+        for t in range(12):
+            covered = sum(assignments[(s["id"], o["id"], t)].value() for s in staff)
+            assert covered == int(o["observation_level"])
+
+
+@pytest.mark.parametrize("n_patients,seed", [(6, 0), (10, 1), (14, 0)])
+def test_aggregated_model_matches_sparse_model(n_patients, seed):
+    staff, observations = make_benchmark_ward(n_patients, seed=seed, restriction_share=0.2)
+    snapshot = build_snapshot(staff, observations)
+    status, objective, _ = solve_sparse_model(snapshot, build_sparse_model(snapshot))
+    aggregated_status, aggregated_objective, x = solve_sparse_model(snapshot, build_aggregated_model(snapshot))
+    assert (aggregated_status, aggregated_objective) == (status, objective)
+    assert find_violations(snapshot, x) == []
+
+
+def test_aggregated_model_accepts_feasible_allocation():
+    staff, observations = make_benchmark_ward(10, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    model = build_aggregated_model(snapshot)
+    x = solve_heuristic(snapshot)
+    assert not violated_rows(model, x).any()
+    # Working all seven break-window slots needs a break indicator that cannot be set
+    long_staff = int(np.flatnonzero(snapshot["long_break"] & snapshot["assigned"])[0])
+    x[long_staff] = 0
+    x[long_staff, np.flatnonzero(snapshot["allowed"][long_staff, :, 5:12].all(axis=1))[0], 5:12] = 1
+    assert "break_count" in set(model["row_kind"][violated_rows(model, x)])
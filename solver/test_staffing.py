@@ -0,0 +1,62 @@
+import numpy as np
+
+from solver.benchmarks import make_benchmark_ward
+from solver.scenarios import apply_scenario
+from solver.snapshot import build_snapshot
+from solver.sparse_model import append_rows, solve_sparse_model
+from solver.staffing import (_availability_model, candidate_changes, capacity_bound, minimum_staffing,
+                             with_candidates)
+from solver.validator import find_violations
+
+
+def _extended(staff, observations, max_extra=2):
+    changes = candidate_changes(max_extra=max_extra)
+    extended, _ = apply_scenario(staff, observations, {"name": "candidates", "changes": changes})
+    return build_snapshot(extended, observations)
+
+
+def test_feasible_ward_needs_no_extra_staff():
+    staff, observations = make_benchmark_ward(10, seed=1)
+    result = minimum_staffing(staff, observations)
+    assert (result["status"], result["extra"], result["added"]) == ("Optimal", 0, [])
+    assert not find_violations(build_snapshot(staff, observations), result["x"])
+
+
+def test_short_ward_gets_the_fewest_extra_staff():
+    staff, observations = make_benchmark_ward(10, seed=1)
+    staff = staff[:-4]
+    result = minimum_staffing(staff, observations)
+    assert result["status"] == "Optimal" and result["extra"] >= max(1, result["lower_bound"])
+    assert not find_violations(build_snapshot(staff + result["added"], observations), result["x"])
+    # One fewer candidate is not enough
+    snapshot = _extended(staff, observations, max_extra=3)
+    model = _availability_model(snapshot, len(staff), 0)
+    row = np.flatnonzero(model["row_kind"] == "staff_count")[0]
+    candidates = model["indices"][model["indptr"][row]:model["indptr"][row + 1]]
+    model = append_rows(model, "staff_count", "L", [(candidates, 1.0, result["extra"] - 1)])
+    status, _, _ = solve_sparse_model(snapshot, model)
+    assert status == "Infeasible"
+
+
+def test_switched_off_candidates_cannot_work():
+    staff, observations = make_benchmark_ward(6, seed=0)
+    snapshot = _extended(staff, observations)
+    on = np.array([True, False, False, True])
+    masked = with_candidates(snapshot, len(staff), on)
+    assert not masked["allowed"][len(staff) + np.flatnonzero(~on)].any()
+    assert masked["allowed"][len(staff) + np.flatnonzero(on)].any()
+    assert snapshot["allowed"][len(staff):].any(axis=(1, 2)).all()
+
+
+def test_hopeless_ward_is_settled_by_the_bound():
+    staff, observations = make_benchmark_ward(12, seed=0)
+    snapshot = _extended(staff[:1], observations, max_extra=1)
+    assert capacity_bound(snapshot, 1) is None
+    result = minimum_staffing(staff[:1], observations, max_extra=1)
+    assert (result["status"], result["extra"], result["method"]) == ("Infeasible", None, "bound")
+
+
+def test_custom_hours_candidates():
+    changes = candidate_changes(patterns=((0, 12), (6, 12)), genders=("F",), max_extra=2)
+    assert [c["staff"]["name"] for c in changes] == ["Bank F 1, slots 0-12", "Bank F 1, slots 6-12",
+                                                     "Bank F 2, slots 0-12", "Bank F 2, slots 6-12"]
@@ -0,0 +1,46 @@
+import pulp
+
+from solver.benchmarks import make_benchmark_ward
+from solver.milo_model import build_allocation_model
+from solver.snapshot import build_snapshot, staff_equivalence_classes
+from solver.sparse_model import build_sparse_model, solve_sparse_model
+
+
+def staff_member(i, **overrides):
+    row = {"id": i, "name": f"S{i}", "role": "HCA", "gender": "F", "assigned": True, "start_time": 0,
+           "end_time": 12, "duration": 12, "omit_time": [], "special_list": []}
+    row.update(overrides)
+    return row
+
+
+def test_equivalence_classes_split_on_model_relevant_fields():
+    staff = [
+        staff_member(1),
+        staff_member(2, role="RMN"),          # role is not used by the model
+        staff_member(3, gender="M"),          # gender matters for the F-only patient
+        staff_member(4, omit_time=[3]),
+        staff_member(5, assigned=False),
+        staff_member(6),
+        staff_member(7, gender="M"),
+        staff_member(8, name="Omitted"),
+    ]
+    observations = [
+        {"id": 10, "name": "P1", "observation_level": "1", "gender_req": "F", "omit_staff": []},
+        {"id": 20, "name": "P2", "observation_level": "1", "gender_req": None, "omit_staff": ["Omitted"]},
+    ]
+    classes = staff_equivalence_classes(build_snapshot(staff, observations))
+    assert sorted(classes) == [[0, 1, 5], [2, 6]]
+
+
+def test_symmetry_breaking_keeps_the_optimum():
+    staff, observations = make_benchmark_ward(5, seed=1, short_shift_share=0, restriction_share=0)
+    objectives = []
+    for flag in (False, True):
+        problem, _ = build_allocation_model(staff, observations, symmetry_breaking=flag)
+        problem.solve(pulp.PULP_CBC_CMD(msg=False))
+        assert pulp.LpStatus[problem.status] == "Optimal"
+        objectives.append(pulp.value(problem.objective))
+    snapshot = build_snapshot(staff, observations)
+    status, objective, _ = solve_sparse_model(snapshot, build_sparse_model(snapshot, symmetry_breaking=True))
+    assert status == "Optimal"
+    assert objectives[0] == objectives[1] == objective
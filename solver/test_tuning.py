@@ -0,0 +1,47 @@
+import tomllib
+
+from solver.benchmarks import make_benchmark_ward
+from solver.budget import cbc_options, solve_budget
+from solver.tuning import budget_entry, load_corpus, parameter_sets, store_ward, tune
+
+
+def test_corpus_stores_each_ward_state_once(tmp_path):
+    staff, observations = make_benchmark_ward(6, seed=0)
+    path = store_ward(tmp_path, staff, observations, ward="ward_a")
+    assert store_ward(tmp_path, staff, observations, ward="ward_a") == path
+    staff[0]["end_time"] = 8
+    store_ward(tmp_path, staff, observations, ward="ward_a")
+    corpus = load_corpus(tmp_path)
+    assert len(corpus) == 2 and corpus[0]["name"].startswith("ward_a-")
+    assert {ward["staff"][0]["end_time"] for ward in corpus} == {8, 12}
+
+
+def test_parameter_sets_cover_or_sample_the_grid():
+    grid = {"presolve": ["on", "off"], "strategy": [0, 1, 2]}
+    assert len(parameter_sets(grid)) == 6
+    sample = parameter_sets(grid, samples=4, seed=1)
+    assert len(sample) == 4 and len({tuple(p.values()) for p in sample}) == 4
+    assert sample == parameter_sets(grid, samples=4, seed=1)
+
+
+def test_tune_ranks_parameter_sets_and_includes_defaults(tmp_path):
+    for seed in (0, 1):
+        store_ward(tmp_path, *make_benchmark_ward(6, seed=seed))
+    # Too few staff: proven infeasible by the analytic bound, never timed
+    store_ward(tmp_path, *make_benchmark_ward(10, seed=0, n_staff=3))
+    grid = {"presolve": ["on", "off"], "threads": [1]}
+    report = tune(load_corpus(tmp_path), grid=grid, time_limit=30)
+    results = report["results"]
+    assert report["wards"] == 2 and len(results) == 3
+    assert "default" in results["presolve"].tolist()
+    assert (results["unsolved"] == 0).all() and (results["median_s"] <= results["p95_s"]).all()
+    assert results["median_s"].is_monotonic_increasing
+    assert report["best_median"] in [{"presolve": None, "threads": None}, *parameter_sets(grid)]
+
+
+def test_budget_entry_deploys_through_the_solve_budgets():
+    entry = budget_entry({"presolve": "more", "cuts": None, "threads": 2, "strategy": 1})
+    budgets = tomllib.loads(entry)["solve_budgets"]
+    budget = solve_budget("any_ward", budgets)
+    assert budget["threads"] == 2 and budget["parameters"] == {"presolve": "more", "strategy": 1}
+    assert cbc_options(budget)[2:8] == ["threads", "2", "presolve", "more", "strategy", "1"]
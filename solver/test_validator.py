@@ -0,0 +1,87 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from solver.benchmarks import make_benchmark_ward
+from solver.heuristic import solve_heuristic
+from solver.snapshot import build_snapshot, freeze_past
+from solver.validator import (RULES, find_violations, invalid_cells, is_valid, rule_masks,
+                              violation_counts)
+
+STAFF = [
+    {"id": 1, "name": "Long", "gender": "F", "assigned": True, "start_time": 0, "end_time": 12,
+     "duration": 12, "omit_time": [4], "special_list": []},
+    {"id": 2, "name": "Short", "gender": "M", "assigned": True, "start_time": 0, "end_time": 6,
+     "duration": 6, "omit_time": [], "special_list": ["P3"]},
+]
+OBSERVATIONS = [
+    {"id": 10, "name": "P1", "observation_level": "1", "gender_req": "F", "omit_staff": []},
+    {"id": 20, "name": "P2", "observation_level": "0", "gender_req": None, "omit_staff": []},
+    {"id": 30, "name": "P3", "observation_level": "1", "gender_req": None, "omit_staff": ["Long"]},
+]
+
+
+def _single(rule, i, j, t):
+    x = np.zeros((2, 3, 12), dtype=int)
+    x[i, j, t] = 1
+    return rule_masks(build_snapshot(STAFF, OBSERVATIONS), x)[rule]
+
+
+@pytest.mark.parametrize("rule,cell", [
+    ("level_0", (0, 1, 0)),
+    ("gender", (1, 0, 0)),
+    ("off_shift", (1, 2, 8)),
+    ("omit_time", (0, 0, 4)),
+    ("omit_staff", (0, 2, 0)),
+    ("special_list", (1, 0, 1)),
+])
+def test_cell_rules_mark_the_cell(rule, cell):
+    mask = _single(rule, *cell)
+    assert mask.shape == (2, 3, 12)
+    assert list(zip(*np.nonzero(mask))) == [cell]
+
+
+def test_every_rule_reported():
+    snapshot = build_snapshot(STAFF, OBSERVATIONS)
+    x = np.zeros((2, 3, 12), dtype=int)
+    x[0, 0, :] = 1                  # consecutive, long break, omit_time at slot 4
+    x[1, 0, 0] = 1                  # gender and special list, over-coverage of P1
+    x[1, 2, 0] = 1                  # two patients at slot 0
+    x[1, 2, 3:5] = 1                # no short break
+    masks = rule_masks(snapshot, x)
+    assert tuple(masks) == RULES
+    counts = violation_counts(masks)
+    for rule in ("coverage", "gender", "omit_time", "special_list", "staff_slot", "consecutive",
+                 "short_break", "long_break"):
+        assert counts[rule] > 0, rule
+    assert counts["level_0"] == counts["frozen"] == 0
+    assert invalid_cells(masks)[1, 0, 0]
+    assert not is_valid(snapshot, x)
+    assert "Short may not observe P1 at slot 0 (gender, special_list)" in find_violations(snapshot, x)
+
+
+def test_replan_past_must_match_published():
+    staff, observations = make_benchmark_ward(8, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    x = solve_heuristic(snapshot)
+    published = [(snapshot["staff_ids"][i], snapshot["patient_ids"][j], int(t)) for i, j, t in zip(*np.nonzero(x))]
+    replan = freeze_past(snapshot, published, 4)
+    assert is_valid(replan, x)
+    y = x.copy()
+    i, j = np.argwhere(x[:, :, 1] == 0)[0]
+    y[i, j, 1] = 1
+    assert np.argwhere(rule_masks(replan, y)["frozen"]).tolist() == [[i, j, 1]]
+
+
+# Wall-clock checks are flaky on loaded machines: run them only when asked to
+@pytest.mark.skipif(not os.environ.get("ALLOCATION_BENCHMARKS"), reason="set ALLOCATION_BENCHMARKS=1 to run")
+def test_validator_is_fast_on_large_ward():
+    staff, observations = make_benchmark_ward(100, seed=1)
+    snapshot = build_snapshot(staff, observations)
+    x = solve_heuristic(snapshot)
+    start = time.perf_counter()
+    for _ in range(10):
+        assert is_valid(snapshot, x)
+    assert (time.perf_counter() - start) / 10 < 0.05
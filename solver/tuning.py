@@ -0,0 +1,169 @@
+# tuning.py
+
+"""
+Tune CBC's parameters on a corpus of stored ward snapshots.
+
+A corpus is a directory of JSON files, one per distinct ward state, each
+holding the staff and observation rows a solve started from. The
+allocations page stores them there when ``tuning_corpus`` is set in the
+app secrets (see store_ward).
+
+``tune`` replays every ward the way the sparse backend solves it (analytic
+workload bound, heuristic MIP start) under each parameter set of a grid,
+or of a random sample of it, and ranks the sets by median and
+95th-percentile solve time. A run that hits the time limit counts as the
+full limit. CBC's own defaults are always timed as the baseline.
+
+The winning set is deployed through the solve budgets: ``budget_entry``
+renders it as the ``[solve_budgets.default]`` entry for the app secrets,
+and budget.cbc_options / pulp_options then pass it to every CBC solve.
+
+Run ``python -m solver.tuning CORPUS_DIR`` from the repository root.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from .budget import DEFAULT_BUDGET, cbc_options
+from .bounds import workload_lower_bound
+from .heuristic import solve_heuristic
+from .snapshot import build_snapshot
+from .sparse_model import build_sparse_model, solve_sparse_model
+
+# CBC values tried for each parameter; threads goes to the budget's own threads
+PARAMETER_GRID = {
+    "presolve": ["on", "off", "more"],
+    "cuts": ["on", "off", "root"],
+    "heuristics": ["on", "off"],
+    "threads": [1, 2],
+    "strategy": [0, 1, 2],
+}
+
+
+def store_ward(directory, staff, observations, ward=None):
+    """
+    Save the rows of a solve to the corpus in ``directory``. Files are named
+    by ward and content, so re-solving an unchanged ward stores nothing new.
+    Returns the file path.
+    """
+    text = json.dumps({"staff": staff, "observations": observations}, sort_keys=True, default=str)
+    digest = hashlib.sha1(text.encode()).hexdigest()[:12]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{ward or 'ward'}-{digest}.json")
+    if not os.path.exists(path):
+        with open(path, "w") as file:
+            file.write(text)
+    return path
+
+
+def load_corpus(directory):
+    '''Every stored ward in ``directory`` as {"name", "staff", "observations"}, in file name order.'''
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name)) as file:
+                rows = json.load(file)
+            corpus.append({"name": name[:-len(".json")], **rows})
+    return corpus
+
+
+def parameter_sets(grid=PARAMETER_GRID, samples=None, seed=0):
+    '''Every combination of the grid, or ``samples`` of them drawn at random without repeats.'''
+    names = list(grid)
+    combinations = list(itertools.product(*(grid[name] for name in names)))
+    if samples is not None and samples < len(combinations):
+        combinations = random.Random(seed).sample(combinations, samples)
+    return [dict(zip(names, values)) for values in combinations]
+
+
+def tuned_budget(parameters, time_limit):
+    '''Solve budget running CBC with ``parameters``; None values keep CBC's default.'''
+    parameters = {name: value for name, value in parameters.items() if value is not None}
+    budget = {**DEFAULT_BUDGET, "time_limit": time_limit, "gap": 0.0,
+              "threads": parameters.pop("threads", DEFAULT_BUDGET["threads"])}
+    if parameters:
+        budget["parameters"] = parameters
+    return budget
+
+
+def tune(corpus, grid=PARAMETER_GRID, samples=None, seed=0, time_limit=60):
+    """
+    Time every parameter set on every ward of ``corpus`` (as from
+    load_corpus). Wards the analytic bound already proves infeasible never
+    reach CBC in the pipeline and are skipped.
+
+    Returns a dict with ``results`` (a DataFrame of one row per parameter
+    set: the parameters, ``median_s``, ``p95_s`` and ``unsolved``, the runs
+    that hit the time limit, best first), ``best_median`` and ``best_p95``
+    (the winning parameter sets; fewer unsolved runs always win) and
+    ``wards`` (the number replayed). CBC's defaults are timed as the set
+    with every parameter None, shown as "default".
+    """
+    wards = []
+    for ward in corpus:
+        snapshot = build_snapshot(ward["staff"], ward["observations"])
+        bound = workload_lower_bound(snapshot)
+        if bound is not None:
+            wards.append((snapshot, build_sparse_model(snapshot, workload_bound=bound), solve_heuristic(snapshot)))
+
+    candidates = [dict.fromkeys(grid)] + parameter_sets(grid, samples, seed)
+    rows = []
+    for parameters in candidates:
+        options = cbc_options(tuned_budget(parameters, time_limit))
+        seconds, unsolved = [], 0
+        for snapshot, model, initial in wards:
+            started = time.perf_counter()
+            status, _, _ = solve_sparse_model(snapshot, model, options=options, initial=initial)
+            elapsed = time.perf_counter() - started
+            if status not in ("Optimal", "Infeasible"):
+                unsolved, elapsed = unsolved + 1, time_limit
+            seconds.append(elapsed)
+        rows.append({**{name: "default" if value is None else value for name, value in parameters.items()},
+                     "median_s": round(float(np.median(seconds)), 3) if seconds else None,
+                     "p95_s": round(float(np.percentile(seconds, 95)), 3) if seconds else None,
+                     "unsolved": unsolved})
+
+    results = pd.DataFrame(rows)
+    best = {}
+    for key, by in (("best_median", ["unsolved", "median_s", "p95_s"]), ("best_p95", ["unsolved", "p95_s", "median_s"])):
+        best[key] = candidates[results.sort_values(by, kind="stable").index[0]]
+    results = results.sort_values(["unsolved", "median_s", "p95_s"], kind="stable").reset_index(drop=True)
+    return {"results": results, **best, "wards": len(wards)}
+
+
+def budget_entry(parameters, ward="default"):
+    """
+    The solve_budgets entry deploying ``parameters`` for ``ward`` (every
+    ward for "default"), as TOML to merge into the app secrets.
+    """
+    budget = tuned_budget(parameters, DEFAULT_BUDGET["time_limit"])
+    lines = [f"[solve_budgets.{ward}]", f"threads = {budget['threads']}"]
+    if budget.get("parameters"):
+        lines += ["", f"[solve_budgets.{ward}.parameters]"]
+        lines += [f"{name} = {json.dumps(value)}" for name, value in budget["parameters"].items()]
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune CBC parameters on a corpus of stored wards.")
+    parser.add_argument("corpus", help="directory of stored ward JSON files")
+    parser.add_argument("--samples", type=int, help="random parameter sets to try instead of the full grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-limit", type=float, default=60, help="seconds per solve")
+    args = parser.parse_args()
+
+    report = tune(load_corpus(args.corpus), samples=args.samples, seed=args.seed, time_limit=args.time_limit)
+    print(f"{report['wards']} ward(s) replayed")
+    print(report["results"].to_string(index=False))
+    print("\nBest median:", report["best_median"])
+    print("Best p95:   ", report["best_p95"])
+    print("\nTo deploy the best median as the default, merge into the app secrets:\n")
+    print(budget_entry(report["best_median"]))
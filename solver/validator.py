@@ -0,0 +1,149 @@
+# validator.py
+
+"""
+Rule check for an allocation array against a snapshot, independent of any
+solver model.
+
+``rule_masks`` evaluates every allocation rule with array operations and
+returns one boolean mask per rule; ``find_violations`` turns the masks into
+messages for display. solve_staff_allocation runs it on every allocation a
+backend returns, and the tests use it as the reference check.
+"""
+
+import numpy as np
+
+from .snapshot import consecutive_window_starts, short_break_window_ends, window_sums
+
+# Rules in report order
+RULES = ("coverage", "level_0", "gender", "off_shift", "omit_time", "omit_staff", "special_list", "frozen",
+         "staff_slot", "consecutive", "short_break", "long_break")
+# Rules on single (staff, patient, slot) cells, i.e. the "allowed" mask
+CELL_RULES = ("level_0", "gender", "off_shift", "omit_time", "omit_staff", "special_list", "frozen")
+
+
+def rule_masks(snapshot, x):
+    """
+    Evaluate every allocation rule on the (S, P, T) 0/1 allocation x.
+
+    Returns {rule: mask} in RULES order, each mask True where that rule is
+    broken: coverage at (patient, slot); the per-cell rules at the offending
+    cell; staff_slot and short_break at (staff, slot), short_break marking
+    the last slot of the window; consecutive at the second slot of the
+    window (the middle one for hourly slots); long_break per staff member.
+    Window lengths and caps come from the snapshot's ``rules``. For re-plans, cells before
+    ``current_slot`` are history: the published (frozen) ones are taken as
+    they are and any other past cell breaks the "frozen" rule.
+    """
+    x = np.asarray(x, dtype=bool)
+    rules = snapshot["rules"]
+    n_slots = x.shape[2]
+    current_slot = snapshot.get("current_slot", 0)
+    past = np.arange(n_slots) < current_slot
+    cells = x & ~past[None, None, :]
+    busy = x.sum(axis=1)
+
+    # Observation levels: exact coverage for every covered patient and slot
+    coverage = snapshot["covered"][:, None] & (x.sum(axis=0) != snapshot["required"][:, None])
+    coverage[:, past] = False
+
+    # Per-cell rules, split by reason (together they make up ~allowed)
+    off_shift = ~snapshot["on_shift"]
+    omit_time = snapshot["on_shift"] & ~snapshot["available"]
+
+    # No more than consecutive_cap slots in a row with the same patient
+    consecutive = window_sums(x, 1, rules["consecutive_cap"] + 1) > rules["consecutive_cap"]
+
+    # Short shifts: at most short_break_cap worked slots in each short-break window;
+    # long shifts: at most break_max_worked slots in the break window
+    short_break = window_sums(busy, rules["short_break_window"] - 1, rules["short_break_window"]) > \
+        rules["short_break_cap"]
+    in_window = busy[:, rules["break_slots"].start:rules["break_slots"].stop].sum(axis=1)
+
+    return {
+        "coverage": coverage,
+        "level_0": cells & snapshot["ignored"][None, :, None],
+        "gender": cells & snapshot["gender_conflict"][:, :, None],
+        "off_shift": cells & off_shift[:, None, :],
+        "omit_time": cells & omit_time[:, None, :],
+        "omit_staff": cells & snapshot["omitted"][:, :, None],
+        "special_list": cells & snapshot["outside_special"][:, :, None],
+        "frozen": x & ~snapshot.get("frozen", np.zeros_like(x)) & past[None, None, :],
+        "staff_slot": busy > 1,
+        "consecutive": consecutive & consecutive_window_starts(snapshot)[:, None, :],
+        "short_break": short_break & short_break_window_ends(snapshot),
+        "long_break": snapshot["long_break"] & (in_window > rules["break_max_worked"]),
+    }
+
+
+def violation_counts(masks):
+    '''Number of violations per rule, from rule_masks.'''
+    return {rule: int(mask.sum()) for rule, mask in masks.items()}
+
+
+def is_valid(snapshot, x):
+    '''True if the allocation breaks no rule.'''
+    return not any(mask.any() for mask in rule_masks(snapshot, x).values())
+
+
+def invalid_cells(masks):
+    '''(S, P, T) mask of the cells breaking a per-cell rule, for highlighting.'''
+    return np.logical_or.reduce([masks[rule] for rule in CELL_RULES])
+
+
+def consecutive_message(staff_name, patient_name, t, rules):
+    return (f"{staff_name} observes {patient_name} for more than {rules['consecutive_cap']} slots in a row "
+            f"around slot {t}")
+
+
+def short_break_message(staff_name, t, rules):
+    window, cap = rules["short_break_window"], rules["short_break_cap"]
+    if (window, cap) == (2, 1):
+        return f"{staff_name} works slots {t - 1} and {t} without a break"
+    return f"{staff_name} works more than {cap} of slots {t - window + 1}-{t} without a break"
+
+
+def find_violations(snapshot, x):
+    """
+    Check an (S, P, T) 0/1 allocation array against every allocation rule.
+
+    Returns a list of human-readable violation messages; empty if the
+    allocation is valid.
+    """
+    x = np.asarray(x, dtype=int)
+    masks = rule_masks(snapshot, x)
+    staff, observations = snapshot["staff"], snapshot["observations"]
+    violations = []
+
+    coverage = x.sum(axis=0)
+    for j, t in zip(*np.nonzero(masks["coverage"])):
+        violations.append(f"{observations[j]['name']} at slot {t}: {coverage[j, t]} staff assigned, "
+                          f"level needs {snapshot['required'][j]}")
+
+    # One message per cell, naming every per-cell rule it breaks
+    for i, j, t in zip(*np.nonzero(invalid_cells(masks))):
+        reasons = ", ".join(rule for rule in CELL_RULES if masks[rule][i, j, t])
+        violations.append(f"{staff[i]['name']} may not observe {observations[j]['name']} at slot {t} "
+                          f"({reasons})")
+
+    busy = x.sum(axis=1)
+    for i, t in zip(*np.nonzero(masks["staff_slot"])):
+        violations.append(f"{staff[i]['name']} has {busy[i, t]} patients at slot {t}")
+
+    rules = snapshot["rules"]
+    for i, j, t in zip(*np.nonzero(masks["consecutive"])):
+        violations.append(consecutive_message(staff[i]["name"], observations[j]["name"], t, rules))
+
+    for i, t in zip(*np.nonzero(masks["short_break"])):
+        violations.append(short_break_message(staff[i]["name"], t, rules))
+
+    in_window = busy[:, rules["break_slots"].start:rules["break_slots"].stop].sum(axis=1)
+    for i in np.flatnonzero(masks["long_break"]):
+        violations.append(f"{staff[i]['name']} works {in_window[i]} of the break-window slots "
+                          f"(at most {rules['break_max_worked']})")
+    return violations
+
+
+def max_workload(snapshot, x):
+    '''Largest number of slots any assigned staff member works in the allocation.'''
+    workloads = np.asarray(x).sum(axis=(1, 2))[snapshot["assigned"]]
+    return int(workloads.max(initial=0))
@@ -0,0 +1,60 @@
+# shift_calendar.py
+
+"""
+Slot layout of the day and night shifts.
+
+A shift is ``shift_hours`` long and cut into slots of ``slot_minutes``
+(60, 30 or 15; any divisor of 60 works). The calendar precomputes the slot
+tables every page and model needs, so nothing downstream assumes hourly
+12-slot shifts: the clock label of each slot for day and night shifts, the
+label -> slot index lookup, and hour <-> slot conversion.
+"""
+
+
+class ShiftCalendar:
+    """
+    Slot tables of a shift layout.
+
+    ``n_slots`` is the number of slots per shift, ``labels[shift_type]`` the
+    clock time at which each slot starts ("day" or "night") and ``index``
+    maps every label of either shift to its slot.
+    """
+
+    def __init__(self, slot_minutes=60, shift_hours=12, day_start="08:00", night_start="20:00"):
+        if slot_minutes <= 0 or 60 % slot_minutes:
+            raise ValueError(f"Slots of {slot_minutes} minutes do not divide the hour")
+        self.slot_minutes = slot_minutes
+        self.shift_hours = shift_hours
+        self.slots_per_hour = 60 // slot_minutes
+        self.n_slots = int(shift_hours * self.slots_per_hour)
+        self.labels = {"day": self._labels(day_start), "night": self._labels(night_start)}
+        self.index = {label: t for labels in self.labels.values() for t, label in enumerate(labels)}
+
+    def _labels(self, start):
+        hours, minutes = (int(part) for part in start.split(":"))
+        first = hours * 60 + minutes
+        return [f"{(first + t * self.slot_minutes) // 60 % 24:02d}:{(first + t * self.slot_minutes) % 60:02d}"
+                for t in range(self.n_slots)]
+
+    def __repr__(self):
+        return f"ShiftCalendar(slot_minutes={self.slot_minutes}, shift_hours={self.shift_hours})"
+
+    def slots(self, hours):
+        '''Number of slots in ``hours`` hours (rounded to whole slots).'''
+        return int(round(hours * self.slots_per_hour))
+
+    def hours(self, slots):
+        '''Length of ``slots`` slots in hours.'''
+        return slots / self.slots_per_hour
+
+    def label(self, t, shift_type="day"):
+        '''Clock time at which slot t of a "day" or "night" shift starts.'''
+        return self.labels[shift_type][t % self.n_slots]
+
+    def to_index(self, label):
+        '''Slot starting at clock time ``label`` ("08:30") in either shift, or None.'''
+        return self.index.get(label)
+
+
+# The ward's shifts: two 12h shifts of hourly slots
+HOURLY = ShiftCalendar()
@@ -0,0 +1,51 @@
+import json
+
+from utils import timing
+
+
+def test_span_is_noop_without_run():
+    timing.finish_run()
+    with timing.span("model_build"):
+        pass
+    assert timing.finish_run() is None
+
+
+def test_run_reports_phase_breakdown():
+    reports = []
+    timing.start_run("Suggested Allocations", [reports.append])
+    with timing.span("snapshot_load"):
+        with timing.span("authentication"):
+            pass
+    with timing.span("authentication"):
+        pass
+    report = timing.finish_run()
+
+    assert reports == [report]
+    phases = {p["phase"]: p for p in report["phases"]}
+    assert list(phases) == ["authentication", "snapshot_load"]
+    assert phases["authentication"]["calls"] == 2
+    assert phases["snapshot_load"]["calls"] == 1
+    assert report["total_seconds"] >= phases["snapshot_load"]["seconds"]
+
+
+def test_sinks_from_setting(tmp_path):
+    path = tmp_path / "timings.jsonl"
+    sinks = timing.sinks_from_setting(f"log, json:{path}, bogus")
+    assert sinks[0] is timing.log_sink
+    assert len(sinks) == 2
+
+    timing.start_run("page", sinks)
+    with timing.span("cbc_solve"):
+        pass
+    timing.finish_run()
+    line = json.loads(path.read_text().splitlines()[0])
+    assert line["label"] == "page"
+    assert line["phases"][0]["phase"] == "cbc_solve"
+
+
+def test_failing_sink_does_not_raise():
+    def broken(report):
+        raise RuntimeError("boom")
+
+    timing.start_run("page", [broken])
+    assert timing.finish_run()["label"] == "page"
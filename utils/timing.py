@@ -0,0 +1,144 @@
+# timing.py
+
+"""
+Lightweight phase timing for the allocation request path.
+
+Wrap a phase in ``with span("model_build"):`` and it is timed only while a
+run is active on the current thread (Streamlit runs each session's script in
+its own thread). With no active run, ``span`` hands back a shared no-op
+context manager, so instrumented code pays one attribute lookup per phase.
+
+A page starts a run with ``start_run`` and calls ``finish_run`` at the end,
+which builds a breakdown report and hands it to every configured sink.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Environment variable selecting the sinks, e.g. "log", "panel",
+# "json:timings.jsonl" or a comma separated combination of them.
+TIMING_ENV_VAR = "ALLOCATION_TIMING"
+
+_local = threading.local()
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("phases", "name", "started")
+
+    def __init__(self, phases, name):
+        self.phases = phases
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        entry = self.phases.get(self.name)
+        if entry is None:
+            self.phases[self.name] = [elapsed, 1]
+        else:
+            entry[0] += elapsed
+            entry[1] += 1
+        return False
+
+
+def span(name):
+    '''Time the enclosed block as phase ``name`` if a run is active.'''
+    run = getattr(_local, "run", None)
+    if run is None:
+        return _NULL_SPAN
+    return _Span(run["phases"], name)
+
+
+def start_run(label, sinks):
+    '''Start collecting spans for this thread; a run without sinks is not started.'''
+    if not sinks:
+        _local.run = None
+        return
+    _local.run = {"label": label, "sinks": list(sinks), "started": time.perf_counter(), "phases": {}}
+
+
+def finish_run():
+    '''Stop the current run, emit its report to the sinks and return it (None if no run).'''
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is None:
+        return None
+    report = {
+        "label": run["label"],
+        "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "total_seconds": round(time.perf_counter() - run["started"], 6),
+        "phases": [{"phase": name, "seconds": round(seconds, 6), "calls": calls}
+                   for name, (seconds, calls) in run["phases"].items()],
+    }
+    for sink in run["sinks"]:
+        try:
+            sink(report)
+        except Exception:  # a broken sink must never break the page
+            logger.exception("Timing sink %r failed", sink)
+    return report
+
+
+def log_sink(report):
+    '''Write the breakdown to the ``utils.timing`` logger.'''
+    phases = ", ".join(f"{p['phase']}={p['seconds']:.3f}s" for p in report["phases"])
+    logger.info("%s took %.3fs: %s", report["label"], report["total_seconds"], phases)
+
+
+def json_file_sink(path):
+    '''Return a sink that appends each report as one JSON line to ``path``.'''
+    def sink(report):
+        with open(path, "a") as file:
+            file.write(json.dumps(report) + "\n")
+    return sink
+
+
+def streamlit_sink(report):
+    '''Render the breakdown in a collapsed debug panel at the bottom of the page.'''
+    import pandas as pd
+    import streamlit as st
+
+    with st.expander(f"⏱ Timing: {report['label']} ({report['total_seconds']:.2f}s)"):
+        if report["phases"]:
+            st.dataframe(pd.DataFrame(report["phases"]).set_index("phase"))
+        st.caption("Nested phases (e.g. authentication inside snapshot_load) are "
+                   "included in their parent's time as well.")
+
+
+def sinks_from_setting(setting):
+    '''Parse a sink setting such as "log,json:timings.jsonl,panel" into sink callables.'''
+    sinks = []
+    for item in (setting or "").split(","):
+        item = item.strip()
+        if item == "log":
+            sinks.append(log_sink)
+        elif item == "panel":
+            sinks.append(streamlit_sink)
+        elif item.startswith("json:") and item[5:]:
+            sinks.append(json_file_sink(item[5:]))
+        elif item:
+            logger.warning("Unknown timing sink %r ignored", item)
+    return sinks
+
+
+def sinks_from_env():
+    return sinks_from_setting(os.environ.get(TIMING_ENV_VAR))